@@ -0,0 +1,186 @@
+import io
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, abort, stream_with_context
+from flask_login import current_user
+from sqlalchemy.orm import joinedload, load_only, undefer_group
+
+from forms import RegisterForm
+from models import User, Edital
+from extensions import db
+from clausulas_store import clausulas_store, ClausulasError
+from replacements import build_replacements
+import search_index
+from user_cache import user_cache
+from file_gc import file_reaper
+from zip_export import stream_zip
+from pdf_convert import pdf_converter
+from editais import get_storage, listar_editais, render_edital_bytes
+
+bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+# Decorador para exigir que o usuário seja administrador
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or not current_user.is_admin():
+            flash('Acesso negado. Você não tem permissões de administrador.', 'danger')
+            return redirect(url_for('editais.dashboard')) # Redireciona para o dashboard ou outra página
+        return f(*args, **kwargs)
+    return decorated_function
+
+@bp.route('')
+@admin_required
+def admin_dashboard():
+    total_users = User.query.count()
+    total_editals = Edital.query.count()
+    return render_template('admin_dashboard.html', total_users=total_users, total_editals=total_editals,
+                           user_cache_stats=user_cache.stats(), pdf_stats=pdf_converter.stats())
+
+@bp.route('/editals')
+@admin_required
+def admin_all_editals():
+    # Carrega todos os editais, ordenados pela data de criação, uma página por vez
+    # (o criador vem no mesmo SELECT, sem uma consulta por linha da tabela)
+    query = Edital.query.options(joinedload(Edital.creator).load_only(User.id, User.username))
+    all_editals, next_cursor = listar_editais(query, request.args.get('cursor'))
+    # Opções do formulário de exportação
+    users = User.query.options(load_only(User.id, User.username)).order_by(User.username).all()
+    try:
+        modos_disputa = sorted(clausulas_store.get()['modo_disputa'])
+    except (FileNotFoundError, ClausulasError):
+        modos_disputa = []
+    return render_template('admin_all_editals.html', editals=all_editals, next_cursor=next_cursor,
+                           is_first_page=not request.args.get('cursor'), users=users,
+                           modos_disputa=modos_disputa)
+
+@bp.route('/export_editais')
+@admin_required
+def admin_export_editais():
+    # Exporta em um .zip os editais filtrados por criador, período de criação e modo de disputa.
+    # O .zip é montado enquanto é enviado: os editais vêm do banco em lotes (yield_per) e cada
+    # .docx é copiado do armazenamento em blocos, sem arquivo temporário nem o .zip inteiro na memória.
+    query = Edital.query
+    try:
+        creator_id = request.args.get('creator', type=int)
+        de = request.args.get('de')
+        ate = request.args.get('ate')
+        de = datetime.strptime(de, '%Y-%m-%d') if de else None
+        ate = datetime.strptime(ate, '%Y-%m-%d') + timedelta(days=1) if ate else None
+    except ValueError:
+        abort(400)
+    if creator_id:
+        query = query.filter(Edital.creator_id == creator_id)
+    if de:
+        query = query.filter(Edital.data_criacao >= de)
+    if ate:
+        query = query.filter(Edital.data_criacao < ate)
+    if request.args.get('modo_disputa'):
+        query = query.filter(Edital.modo_disputa == request.args['modo_disputa'])
+
+    render_missing = current_app.config['RENDER_ON_DOWNLOAD']
+    if render_missing:
+        # Documentos ausentes são renderizados a partir dos campos salvos, então carrega a linha inteira
+        query = query.options(undefer_group('textos'), joinedload(Edital.creator).load_only(User.id, User.username))
+    else:
+        query = query.options(load_only(Edital.id, Edital.form_name, Edital.data_criacao, Edital.storage_key))
+    query = query.order_by(Edital.data_criacao, Edital.id).yield_per(current_app.config['EXPORT_YIELD_PER'])
+
+    storage = get_storage()
+    modelo_edital_path = current_app.config['MODELO_EDITAL_PATH']
+    skipped = []
+
+    def entries():
+        template = clausulas_data = None
+        for edital in query:
+            name = f"{edital.id}_Edital_{edital.form_name.replace(' ', '_').replace('/', '_')}.docx"
+            try:
+                source = storage.open(edital.storage_key) if edital.storage_key else None
+            except FileNotFoundError:
+                source = None
+            if source is not None:
+                yield name, edital.data_criacao, source
+            elif render_missing:
+                try:
+                    if template is None:
+                        from docx_render import get_compiled_template
+                        template = get_compiled_template(modelo_edital_path)
+                        clausulas_data = clausulas_store.get()
+                    data = render_edital_bytes(template, build_replacements(edital, clausulas_data, edital.creator.username))
+                except (FileNotFoundError, ClausulasError) as e:
+                    skipped.append(f"{edital.id}\t{edital.form_name}\t{e}")
+                    continue
+                yield name, edital.data_criacao, io.BytesIO(data)
+            else:
+                skipped.append(f"{edital.id}\t{edital.form_name}\tarquivo não encontrado")
+        if skipped:
+            report = '\n'.join(skipped).encode('utf-8') + b'\n'
+            yield 'nao_incluidos.txt', datetime.utcnow(), io.BytesIO(report)
+
+    filename = f"editais_{datetime.utcnow():%Y%m%d_%H%M%S}.zip"
+    return current_app.response_class(stream_with_context(stream_zip(entries())), mimetype='application/zip',
+                                      headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@bp.route('/users')
+@admin_required
+def admin_manage_users():
+    users = User.query.all()
+    return render_template('admin_manage_users.html', users=users)
+
+@bp.route('/add_user', methods=['GET', 'POST'])
+@admin_required
+def admin_add_user():
+    form = RegisterForm()
+    if form.validate_on_submit():
+        existing_user = User.query.filter_by(username=form.username.data).first()
+        if existing_user:
+            flash('Este nome de usuário já existe. Por favor, escolha outro.', 'danger')
+        else:
+            user = User(username=form.username.data, email=form.email.data)
+            user.set_password(form.password.data)
+            # Admin pode criar usuários comuns por aqui
+            db.session.add(user)
+            db.session.commit()
+            flash(f'Usuário {form.username.data} adicionado com sucesso!', 'success')
+            return redirect(url_for('admin.admin_manage_users'))
+    return render_template('admin_add_user.html', form=form)
+
+@bp.route('/delete_user/<int:user_id>', methods=['POST'])
+@admin_required
+def admin_delete_user(user_id):
+    user_to_delete = User.query.get_or_404(user_id)
+
+    if user_to_delete.id == current_user.id:
+        flash('Você não pode excluir sua própria conta de administrador.', 'danger')
+        return redirect(url_for('admin.admin_manage_users'))
+
+    # Opcional: Impedir a exclusão do último admin
+    if user_to_delete.is_admin() and User.query.filter_by(role='admin').count() == 1:
+        flash('Não é possível excluir o último usuário administrador.', 'danger')
+        return redirect(url_for('admin.admin_manage_users'))
+
+    try:
+        # Excluir todos os editais criados por este usuário antes de excluir o usuário
+        # Primeiro, guarde as chaves dos arquivos DOCX dos editais do usuário (uma consulta só);
+        # eles são removidos em segundo plano depois do commit, exceto os compartilhados
+        keys = db.session.scalars(
+            db.select(Edital.storage_key).distinct()
+            .where(Edital.creator_id == user_to_delete.id, Edital.storage_key.isnot(None))
+        ).all()
+
+        # Agora exclua os registros dos editais do banco de dados (e do índice de busca,
+        # já que a exclusão em lote não passa pelo flush da sessão)
+        search_index.unindex_creator(db.session, user_to_delete.id)
+        Edital.query.filter_by(creator_id=user_to_delete.id).delete()
+
+        # Finalmente, exclua o usuário
+        db.session.delete(user_to_delete)
+        db.session.commit()
+        file_reaper.enqueue(*keys)
+        flash(f'Usuário {user_to_delete.username} e seus editais excluídos com sucesso.', 'success')
+    except Exception as e:
+        flash(f'Erro ao excluir usuário: {str(e)}', 'danger')
+        db.session.rollback()
+    return redirect(url_for('admin.admin_manage_users'))
@@ -0,0 +1,104 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import update
+
+from forms import LoginForm, RegisterForm
+from models import User
+from extensions import db, login_manager
+from user_cache import user_cache
+from password_hashing import password_hasher, PasswordHashingBusy
+
+bp = Blueprint('auth', __name__)
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    # A sessão guarda "id:versão" (ver User.get_id); sessões anteriores guardavam só o id
+    user_id, _, version = user_id.partition(':')
+    user_id = int(user_id)
+    version = int(version) if version else None
+    user = user_cache.get(user_id, version)
+    if user is None:
+        user = db.session.get(User, user_id)
+        if user is None or (version is not None and user.version != version):
+            return None
+        user_cache.put(user)
+    return user
+
+# Regrava a senha com o custo atual do bcrypt se o hash foi criado com outro custo.
+# UPDATE direto (sem passar pelo version_id_col): não encerra as outras sessões do usuário.
+def rehash_password(user, password):
+    if not password_hasher.needs_rehash(user.password):
+        return
+    try:
+        new_hash = password_hasher.hash(password)
+    except PasswordHashingBusy:
+        return # tenta de novo no próximo login
+    db.session.execute(update(User).where(User.id == user.id).values(password=new_hash))
+    db.session.commit()
+    user_cache.invalidate(user.id)
+
+@bp.app_errorhandler(PasswordHashingBusy)
+def password_hashing_busy(e):
+    # Cadastro durante um pico de logins: volta para o formulário em vez de esperar o bcrypt
+    flash('Muitos acessos no momento. Tente novamente em alguns segundos.', 'warning')
+    return redirect(request.url)
+
+@bp.route('/')
+def index():
+    if current_user.is_authenticated:
+        return redirect(url_for('editais.dashboard'))
+    return redirect(url_for('auth.login'))
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('editais.dashboard'))
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(username=form.username.data).first()
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except PasswordHashingBusy:
+            flash('Muitos acessos no momento. Tente novamente em alguns segundos.', 'warning')
+            return render_template('login.html', form=form), 503, {'Retry-After': '5'}
+        if valid:
+            rehash_password(user, form.password.data)
+            login_user(user)
+            flash('Login bem-sucedido!', 'success')
+            next_page = request.args.get('next')
+            return redirect(next_page) if next_page else redirect(url_for('editais.dashboard'))
+        else:
+            flash('Usuário ou senha inválidos.', 'danger')
+    return render_template('login.html', form=form)
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        # Se o usuário já está logado, redireciona para o dashboard
+        flash('Você já está logado.', 'info')
+        return redirect(url_for('editais.dashboard'))
+
+    form = RegisterForm()
+    if form.validate_on_submit():
+        # Verifica se o usuário já existe
+        existing_user = User.query.filter_by(username=form.username.data).first()
+        if existing_user:
+            flash('Este nome de usuário já existe. Por favor, escolha outro.', 'danger')
+        else:
+            user = User(username=form.username.data, email=form.email.data)
+            user.set_password(form.password.data)
+            # A lógica de criação de admin inicial foi movida para o comando 'flask init-db'
+
+            db.session.add(user)
+            db.session.commit()
+            flash('Registro bem-sucedido! Faça login agora.', 'success')
+            return redirect(url_for('auth.login'))
+    return render_template('register.html', form=form)
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('Você foi desconectado.', 'info')
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,187 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from extensions import db
+from models import Edital, EDITAL_FORM_FIELDS, STATUS_CONCLUIDO, STATUS_ERRO, edital_field_type
+from column_types import Enumerado, OpcaoClausula, SimNao
+from clausulas_store import clausulas_store
+from forms import OPCOES_CLAUSULAS
+from generation_queue import render_edital_file
+from render_cache import render_key
+from storage import document_key, open_storage
+from replacements import build_replacements
+
+TRUE_VALUES = {'1', 'true', 'sim', 's', 'x', 'yes', 'on'}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+
+# Resultado de um lote: editais criados, arquivos renderizados, arquivos reaproveitados,
+# erros [(registro, mensagem)] e tempo total em segundos
+BatchResult = namedtuple('BatchResult', ['created', 'rendered', 'reused', 'errors', 'elapsed'])
+
+
+def read_rows(path):
+    """Lê os registros de um CSV (separado por ',' ou ';') ou de um JSON (lista de objetos)."""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('o JSON deve conter uma lista de objetos')
+        return rows
+
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;')
+        except csv.Error:
+            dialect = csv.excel
+        return list(csv.DictReader(f, dialect=dialect))
+
+
+def row_to_values(row, partial=False, clausulas_data=None):
+    """Converte um registro (campos do EditalForm) nos valores das colunas do Edital.
+
+    As opções de cláusula são conferidas com as chaves do clausulas.json
+    (`clausulas_data`, ou as atuais do clausulas_store), como no EditalForm.
+    Com partial=True (formulário ainda em preenchimento, ver /preview_edital)
+    datas incompletas e opções inválidas ficam vazias e form_name não é obrigatório.
+    """
+    unknown = set(row) - set(EDITAL_FORM_FIELDS)
+    if unknown:
+        raise ValueError(f"campos desconhecidos: {', '.join(sorted(str(field) for field in unknown))}")
+
+    if clausulas_data is None:
+        clausulas_data = clausulas_store.get()
+    values = {}
+    for field in EDITAL_FORM_FIELDS:
+        raw = row.get(field)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        column_type = edital_field_type(field)
+        if isinstance(column_type, db.Boolean):
+            values[field] = raw if isinstance(raw, bool) else str(raw or '').lower() in TRUE_VALUES
+        elif raw in (None, ''):
+            values[field] = None
+        elif isinstance(column_type, db.Date):
+            try:
+                values[field] = _parse_date(field, raw)
+            except ValueError:
+                if not partial:
+                    raise
+                values[field] = None
+        elif isinstance(column_type, (Enumerado, SimNao)):
+            # Só os valores que a coluna sabe gravar (o banco guarda o código, não o texto)
+            allowed = column_type.values if isinstance(column_type, Enumerado) else ('sim', 'nao')
+            raw = str(raw).lower()
+            if raw in allowed:
+                values[field] = raw
+            elif partial:
+                values[field] = None
+            else:
+                raise ValueError(f"{field}: valor inválido {raw!r} (use {', '.join(allowed)})")
+        elif isinstance(column_type, OpcaoClausula):
+            # Cada valor novo vira uma linha da tabela opcao: só as chaves da seção do clausulas.json
+            allowed = clausulas_data.get(OPCOES_CLAUSULAS[field]) or {}
+            raw = str(raw)
+            if raw in allowed:
+                values[field] = raw
+            elif partial:
+                values[field] = None
+            else:
+                raise ValueError(f"{field}: opção inválida {raw!r} (use {', '.join(allowed)})")
+        else:
+            values[field] = str(raw)
+
+    if not values['form_name'] and not partial:
+        raise ValueError('form_name é obrigatório')
+    return values
+
+
+def _parse_date(field, raw):
+    if isinstance(raw, date):
+        return raw
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"{field}: data inválida '{raw}' (use AAAA-MM-DD ou DD/MM/AAAA)")
+
+
+def _render_job(job):
+    """Executado no pool: renderiza um arquivo e devolve (chave, erro)."""
+    template_path, replacements, storage_url, key = job
+    try:
+        render_edital_file(template_path, replacements, storage_url, key)
+    except Exception as e:
+        return key, str(e) or e.__class__.__name__
+    return key, None
+
+
+def generate_batch(rows, creator, clausulas_snapshot, template_path, storage_url, workers=None, batch_size=500):
+    """Cria os editais de `rows` e renderiza os .docx em paralelo.
+
+    As substituições são as mesmas da rota generate_edital e os arquivos usam
+    o cache de renderização (registros idênticos compartilham um arquivo).
+    Os editais são inseridos em lotes de `batch_size`, um commit por lote.
+    Registros inválidos não são inseridos; registros cuja renderização falhou
+    são inseridos com status 'erro'.
+    """
+    from docx_render import get_compiled_template
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    template = get_compiled_template(template_path)
+    storage = open_storage(storage_url)
+
+    errors = []
+    editais = []
+    pending = {}
+    reused = set()
+    for number, row in enumerate(rows, start=1):
+        try:
+            edital = Edital(creator_id=creator.id, **row_to_values(row, clausulas_data=clausulas_snapshot.data))
+            replacements = build_replacements(edital, clausulas_snapshot.data, creator.username)
+        except Exception as e:
+            errors.append((number, str(e)))
+            continue
+        key = document_key(render_key(template.digest, clausulas_snapshot.digest, replacements))
+        edital.storage_key = key
+        edital.status = STATUS_CONCLUIDO
+        editais.append((number, edital))
+        if key in pending or key in reused:
+            continue
+        if storage.touch(key): # existe; a data renovada protege da coleta até o commit do lote
+            reused.add(key)
+        else:
+            pending[key] = (template_path, replacements, storage_url, key)
+
+    failed = {}
+    if pending:
+        jobs = list(pending.values())
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            for key, error in executor.map(_render_job, jobs, chunksize=chunksize):
+                if error is not None:
+                    failed[key] = error
+
+    for number, edital in editais:
+        error = failed.get(edital.storage_key)
+        if error is not None:
+            errors.append((number, f'erro na renderização: {error}'))
+            edital.storage_key = None
+            edital.status = STATUS_ERRO
+            edital.status_message = error[:500]
+
+    for start in range(0, len(editais), batch_size):
+        db.session.add_all(edital for _, edital in editais[start:start + batch_size])
+        db.session.commit()
+
+    errors.sort()
+    return BatchResult(len(editais), len(pending) - len(failed), len(reused), errors, time.perf_counter() - started)
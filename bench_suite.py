@@ -0,0 +1,472 @@
+"""Benchmarks do caminho de geração de editais, com comparação contra um baseline em JSON.
+
+Monta modelos .docx sintéticos de tamanhos crescentes (parágrafos, tabelas,
+cabeçalho/rodapé e densidade de placeholders) e mede, em cada um:
+
+- replace_placeholder: tempo por placeholder substituído no documento;
+- generate: POST /generate_edital pelo test client do Flask;
+- edit: POST /edit_edital alterando um campo (re-geração incremental);
+- download: GET /download_edital do documento gerado.
+
+E a subida do app ('inicializacao'): `import app` em um processo novo, sem
+python-docx (importado só na primeira renderização). --importtime N mostra
+os N módulos mais lentos de importar (python -X importtime).
+
+Para cada caso são gravados tempo de parede e de CPU (mediana das rodadas)
+e o pico de memória alocada (tracemalloc, em uma rodada separada). Roda
+offline: SQLite, armazenamento e cláusulas em uma pasta temporária, geração
+na própria requisição.
+
+Uso:
+    python bench_suite.py --save                 # grava bench_baseline.json
+    python bench_suite.py                        # compara com o baseline (sai com 1 se regrediu)
+    python bench_suite.py --sizes pequeno,medio --rounds 3 --output resultado.json
+    python bench_suite.py --sizes inicializacao --importtime 15
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(APP_ROOT, 'bench_baseline.json')
+
+# Modelos sintéticos: parágrafos, tabelas (linhas x 3 colunas) e fração dos parágrafos/células com placeholder
+SIZES = {
+    'pequeno': {'paragraphs': 50, 'tables': 2, 'rows': 5, 'density': 0.2},
+    'medio': {'paragraphs': 400, 'tables': 10, 'rows': 10, 'density': 0.5},
+    'grande': {'paragraphs': 2000, 'tables': 40, 'rows': 20, 'density': 1.0},
+}
+
+# Caso da subida do app, medido em processos novos (ver bench_startup)
+STARTUP = 'inicializacao'
+
+# Métricas comparadas com o baseline e a diferença absoluta mínima para contar como regressão
+# (evita acusar ruído em medições de poucos milissegundos)
+METRICS = {'wall_ms': 2.0, 'cpu_ms': 2.0, 'peak_kb': 256.0}
+
+# Valores do formulário usados nos POSTs (os campos de cláusula usam a opção 'sim' das cláusulas sintéticas)
+FORM_DATA = {
+    'numero_pregao': '90001/2026',
+    'objeto_servicos': 'Prestação de serviços de manutenção predial',
+    'compras_gov_numero': '123456',
+    'valor_total_orcamento': 'R$ 1.234.567,89',
+    'data_base_orcamento': '2026-01-15',
+    'data_sessao': '2026-03-10',
+    'hora_sessao': '09:00',
+    'data_disponibilidade': '2026-02-20',
+    'email_contato1': 'licitacao@example.com',
+    'email_contato2': 'compras@example.com',
+    'orcamento_sigiloso': 'nao',
+    'tipo_participacao': 'ampla',
+    'servico_continuo': 'sim',
+    'cad_madeira': 'nao',
+    'documento_tecnico_sim_nao': 'sim',
+    'documento_tecnico_nome': 'Termo de Referência',
+    'numero_licitacao_anexo1': '90001/2026',
+    'objeto_licitacao_anexo1': 'Prestação de serviços de manutenção predial',
+    'incluir_rec_judicial': 'sim',
+    'incluir_me_epp': 'sim',
+}
+
+
+def write_clausulas(path):
+    """clausulas.json sintético com todas as seções e textos exigidos pelo ClausulasStore."""
+    from clausulas_store import REQUIRED_SECTIONS, REQUIRED_TEXTS
+    from forms import OPCOES_CLAUSULAS
+
+    data = {}
+    for section in set(REQUIRED_SECTIONS) | set(OPCOES_CLAUSULAS.values()):
+        data[section] = {option: f'Texto {option} de {section}. ' * 3
+                         for option in ('sim', 'nao', 'maior_desconto', 'menor_preco', 'aberto')}
+    for text_path in REQUIRED_TEXTS:
+        node = data
+        keys = text_path.split('.')
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = f'Texto de {text_path}. ' * 3
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def write_template(path, paragraphs, tables, rows, density):
+    """Modelo .docx sintético; os placeholders são os de replacements.PLACEHOLDERS, em rodízio."""
+    from docx import Document
+    from replacements import PLACEHOLDERS
+
+    placeholders = sorted(PLACEHOLDERS)
+    counter = {'next': 0, 'slots': 0.0}
+
+    def text(label):
+        # Acumula a densidade: com 0.5, um a cada dois textos recebe um placeholder
+        counter['slots'] += density
+        if counter['slots'] < 1:
+            return f'{label} sem substituição.'
+        counter['slots'] -= 1
+        placeholder = placeholders[counter['next'] % len(placeholders)]
+        counter['next'] += 1
+        return f'{label} com {placeholder} no meio do texto.'
+
+    document = Document()
+    section = document.sections[0]
+    section.header.paragraphs[0].text = 'Pregão Eletrônico nº {{ numero_pregao }}'
+    section.footer.paragraphs[0].text = 'Sessão em {{ data_sessao }} às {{ hora_sessao }}'
+    table_every = max(1, paragraphs // max(1, tables))
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            document.add_heading(f'CAPÍTULO {i // 20 + 1}', level=1)
+        document.add_paragraph(text(f'Cláusula {i + 1}'))
+        if tables and (i + 1) % table_every == 0 and len(document.tables) < tables:
+            table = document.add_table(rows=rows, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = text(f'Item {r + 1}.{c + 1}')
+    document.save(path)
+    return counter['next']
+
+
+def measure(function, rounds):
+    """Mediana de parede e CPU em `rounds` chamadas e pico de memória em uma chamada extra."""
+    walls, cpus = [], []
+    for _ in range(rounds):
+        wall, cpu = time.perf_counter(), time.process_time()
+        function()
+        walls.append((time.perf_counter() - wall) * 1000)
+        cpus.append((time.process_time() - cpu) * 1000)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'wall_ms': statistics.median(walls), 'cpu_ms': statistics.median(cpus), 'peak_kb': peak / 1024}
+
+
+class BenchApp:
+    """Aplicação configurada para os benchmarks (SQLite e armazenamento em `workdir`)."""
+
+    def __init__(self, workdir):
+        # Configuração lida pelo app.py na importação
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        os.environ['STORAGE_URL'] = os.path.join(workdir, 'storage')
+        os.environ['PDF_CACHE_FOLDER'] = os.path.join(workdir, 'pdf_cache')
+        os.environ['GENERATION_WORKERS'] = '0'
+        os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+        os.environ['RENDER_ON_DOWNLOAD'] = ''
+        os.environ['FILE_GC_INTERVAL'] = '0'
+
+        from app import app
+        from clausulas_store import clausulas_store
+        from extensions import db
+        from models import User
+
+        self.app = app
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        clausulas_path = os.path.join(workdir, 'clausulas.json')
+        write_clausulas(clausulas_path)
+        self.app.config['CLAUSULAS_FILE'] = clausulas_path
+        clausulas_store.path = clausulas_path
+
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='bench', email='bench@example.com', role='admin')
+            user.set_password('bench123')
+            db.session.add(user)
+            db.session.commit()
+        self.client = self.app.test_client()
+        response = self.client.post('/login', data={'username': 'bench', 'password': 'bench123'})
+        if response.status_code != 302:
+            raise RuntimeError(f'login do benchmark falhou (HTTP {response.status_code})')
+        self.sequence = 0
+
+    def use_template(self, path):
+        self.app.config['MODELO_EDITAL_PATH'] = path
+
+    def form_data(self, **changes):
+        data = dict(FORM_DATA)
+        from forms import OPCOES_CLAUSULAS
+        data.update({field: 'sim' for field in OPCOES_CLAUSULAS})
+        data.update(changes)
+        return data
+
+    def last_edital(self):
+        from models import Edital
+        with self.app.app_context():
+            edital = Edital.query.order_by(Edital.id.desc()).first()
+            return edital.id, edital.status, edital.storage_key
+
+    def edital_state(self, edital_id):
+        from extensions import db
+        from models import Edital
+        with self.app.app_context():
+            edital = db.session.get(Edital, edital_id)
+            return edital.status, edital.storage_key
+
+    def generate(self):
+        # Número do pregão diferente a cada chamada: o documento não pode sair do cache de renderização
+        self.sequence += 1
+        data = self.form_data(form_name=f'Benchmark {self.sequence}', numero_pregao=f'{self.sequence}/2026')
+        response = self.client.post('/generate_edital', data=data)
+        edital_id, status, storage_key = self.last_edital()
+        if response.status_code != 302 or status != 'concluido':
+            raise RuntimeError(f'generate_edital falhou (HTTP {response.status_code}, status {status})')
+        return edital_id, storage_key
+
+    def edit(self, edital_id):
+        self.sequence += 1
+        hora_sessao = f'{self.sequence // 60 % 24:02d}:{self.sequence % 60:02d}'
+        data = self.form_data(form_name=f'Benchmark {edital_id}', hora_sessao=hora_sessao)
+        response = self.client.post(f'/edit_edital/{edital_id}', data=data)
+        if response.status_code != 302:
+            raise RuntimeError(f'edit_edital falhou (HTTP {response.status_code})')
+
+    def download(self, storage_key):
+        response = self.client.get(f'/download_edital/{storage_key}')
+        if response.status_code != 200:
+            raise RuntimeError(f'download_edital falhou (HTTP {response.status_code})')
+        response.get_data()
+        response.close()
+
+
+def bench_replace_placeholder(bench, template_path, rounds):
+    """Tempo de replace_placeholder por placeholder, substituindo todos os do modelo em sequência."""
+    from docx import Document
+    from batch import row_to_values
+    from clausulas_store import clausulas_store
+    from editais import replace_placeholder
+    from models import Edital
+    from replacements import build_replacements
+
+    with open(template_path, 'rb') as f:
+        data = f.read()
+    with bench.app.app_context():
+        edital = Edital(**row_to_values(bench.form_data(form_name='Benchmark')))
+        replacements = build_replacements(edital, clausulas_store.get(), 'bench')
+    documents = []
+
+    def run():
+        document = documents.pop()
+        for placeholder, value in replacements.items():
+            replace_placeholder(document, placeholder, str(value))
+
+    # O documento é aberto antes de cada chamada, fora da medição: só a substituição conta
+    walls, cpus = [], []
+    for _ in range(rounds):
+        documents.append(Document(io.BytesIO(data)))
+        wall, cpu = time.perf_counter(), time.process_time()
+        run()
+        walls.append((time.perf_counter() - wall) * 1000)
+        cpus.append((time.process_time() - cpu) * 1000)
+    documents.append(Document(io.BytesIO(data)))
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    count = len(replacements)
+    return {'wall_ms': statistics.median(walls) / count, 'cpu_ms': statistics.median(cpus) / count,
+            'peak_kb': peak / 1024, 'placeholders': count}
+
+
+# Roda em um processo novo: mede só o `import app` (a criação do app incluída), sem a subida do interpretador
+STARTUP_SCRIPT = '''
+import json, resource, sys, time
+wall, cpu = time.perf_counter(), time.process_time()
+import app
+print(json.dumps({
+    'wall_ms': (time.perf_counter() - wall) * 1000,
+    'cpu_ms': (time.process_time() - cpu) * 1000,
+    'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'docx': 'docx' in sys.modules,
+}))
+'''
+
+
+def startup_env(workdir):
+    # Mesma configuração do BenchApp, sem tocar no banco e nas pastas do projeto
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'startup.db'),
+        'STORAGE_URL': os.path.join(workdir, 'storage'),
+        'PDF_CACHE_FOLDER': os.path.join(workdir, 'pdf_cache'),
+    })
+    return env
+
+
+def bench_startup(rounds, workdir):
+    """Tempo do `import app` em processos novos (mediana) e o RSS máximo do processo.
+
+    O pico aqui é o RSS do processo (ru_maxrss), não o tracemalloc dos outros casos.
+    """
+    env = startup_env(workdir)
+    # Uma execução descartada: compila os .pyc, como acontece no primeiro deploy
+    runs = [json.loads(subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=APP_ROOT, env=env, check=True,
+                                      capture_output=True, text=True).stdout.splitlines()[-1])
+            for _ in range(rounds + 1)][1:]
+    return {
+        'wall_ms': statistics.median(run['wall_ms'] for run in runs),
+        'cpu_ms': statistics.median(run['cpu_ms'] for run in runs),
+        'peak_kb': max(run['peak_kb'] for run in runs),
+        'docx_importado': any(run['docx'] for run in runs),
+    }
+
+
+def import_times(workdir, top):
+    """Os `top` módulos mais lentos do `import app` (tempo próprio e acumulado, em ms), via -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=APP_ROOT,
+                            env=startup_env(workdir), check=True, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.rstrip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def run_suite(sizes, rounds, workdir):
+    results = {}
+    if STARTUP in sizes:
+        results[STARTUP] = {'import_app': bench_startup(rounds, workdir)}
+        sizes = [size for size in sizes if size != STARTUP]
+    if not sizes:
+        return suite_result(results, rounds)
+
+    bench = BenchApp(workdir)
+    for size in sizes:
+        spec = SIZES[size]
+        template_path = os.path.join(workdir, f'modelo_{size}.docx')
+        occurrences = write_template(template_path, **spec)
+        bench.use_template(template_path)
+        bench.generate() # aquecimento: compila o modelo e carrega as cláusulas
+        with bench.app.app_context():
+            replace_results = bench_replace_placeholder(bench, template_path, rounds)
+
+        results[size] = {
+            'template': dict(spec, occurrences=occurrences, size_kb=os.path.getsize(template_path) / 1024),
+            'replace_placeholder': replace_results,
+            'generate': measure(bench.generate, rounds),
+        }
+        edital_id, _ = bench.generate()
+        results[size]['edit'] = measure(lambda: bench.edit(edital_id), rounds)
+        # A edição troca o documento: o download usa a chave atual
+        storage_key = bench.edital_state(edital_id)[1]
+        results[size]['download'] = measure(lambda: bench.download(storage_key), rounds)
+    return suite_result(results, rounds)
+
+
+def suite_result(results, rounds):
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'rounds': rounds,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Lista de regressões: métricas acima do baseline em mais de `tolerance` (fração) e do mínimo absoluto."""
+    regressions = []
+    for size, cases in current['results'].items():
+        for case, metrics in cases.items():
+            reference = baseline.get('results', {}).get(size, {}).get(case)
+            if case == 'template' or not reference:
+                continue
+            for metric, min_delta in METRICS.items():
+                old, new = reference.get(metric), metrics.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > min_delta:
+                    regressions.append((size, case, metric, old, new))
+    return regressions
+
+
+def print_results(current, baseline=None):
+    print(f"{'modelo':<15}{'caso':<21}{'parede (ms)':>13}{'CPU (ms)':>11}{'pico (KB)':>12}{'baseline (ms)':>15}")
+    for size, cases in current['results'].items():
+        for case, metrics in cases.items():
+            if case == 'template':
+                continue
+            if metrics.get('docx_importado'):
+                print(f"Aviso: python-docx foi importado na subida do app ({size}/{case}).")
+            reference = (baseline or {}).get('results', {}).get(size, {}).get(case)
+            old = f"{reference['wall_ms']:>15.2f}" if reference else f"{'-':>15}"
+            print(f"{size:<15}{case:<21}{metrics['wall_ms']:>13.2f}{metrics['cpu_ms']:>11.2f}{metrics['peak_kb']:>12.0f}{old}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks da geração de editais.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Arquivo JSON do baseline.')
+    parser.add_argument('--save', action='store_true', help='Grava o resultado como novo baseline.')
+    parser.add_argument('--output', help='Grava o resultado desta execução neste arquivo JSON.')
+    parser.add_argument('--rounds', type=int, default=5, help='Rodadas por caso (padrão: 5).')
+    parser.add_argument('--sizes', default=','.join(list(SIZES) + [STARTUP]), help='Modelos a medir, separados por vírgula.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Aumento tolerado em relação ao baseline (padrão: 0.25 = 25%%).')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help='Mostra os N módulos mais lentos de importar na subida do app.')
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    available = list(SIZES) + [STARTUP]
+    unknown = [size for size in sizes if size not in available]
+    if unknown:
+        parser.error(f"modelos desconhecidos: {', '.join(unknown)} (disponíveis: {', '.join(available)})")
+
+    workdir = tempfile.mkdtemp(prefix='edital-bench-')
+    try:
+        current = run_suite(sizes, args.rounds, workdir)
+        slowest = import_times(workdir, args.importtime) if args.importtime else []
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(current, baseline)
+    if slowest:
+        print(f"\n{'acumulado (ms)':>15}{'próprio (ms)':>14}  módulo")
+        for cumulative_ms, self_ms, name in slowest:
+            print(f"{cumulative_ms:>15.1f}{self_ms:>14.1f}  {name}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"Sem baseline em {args.baseline}; rode com --save para criar um.")
+        return 0
+
+    if baseline.get('environment', {}).get('platform') != current['environment']['platform']:
+        print("Aviso: o baseline foi gravado em outra plataforma; compare com cuidado.")
+    regressions = compare(current, baseline, args.tolerance)
+    for size, case, metric, old, new in regressions:
+        print(f"REGRESSÃO {size}/{case} {metric}: {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100:.0f}%)",
+              file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} métrica(s) acima da tolerância de {args.tolerance:.0%}.", file=sys.stderr)
+        return 1
+    print("Sem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# Seções do clausulas.json acessadas com .get(opcao) ao montar as substituições
+REQUIRED_SECTIONS = (
+    'criterio_julgamento',
+    'aplicacao_criterio',
+    'modo_disputa',
+    'permitido_cooperativa',
+    'participacao_consorcio',
+    'diferencial_aliquota',
+    'regularidade_fiscal',
+    'qualificacao_tecnica',
+    'atestados_qualificacao_tecnica',
+    'permite_visita_tecnica',
+    'julgamento_pregao',
+    'oferta_julgamento_resumo',
+    'menor_maior_oferta',
+    'garantia_execucao',
+    'subcontratacao',
+    'fiscalizacao_inspecao_contrato',
+    'tipo_instrumento_contratual_contrato',
+    'regime_empreitada_contrato',
+    'prazos_execucao_contrato',
+    'prorrogacao_contrato_contrato',
+    'medicao_servicos_contrato',
+    'consequencias_rescisao_contrato',
+    'suspensao_temporaria_servicos_contrato',
+    'aceitacao_servicos_contrato',
+    'garantia_servicos_contrato',
+)
+
+# Textos acessados diretamente por chave (caminho separado por pontos)
+REQUIRED_TEXTS = (
+    'criterio_julgamento.maior_desconto',
+    'criterio_julgamento.menor_preco',
+    'declaracoes_anexo1.recuperacao_judicial',
+    'declaracoes_anexo1.recuperacao_extrajudicial',
+    'declaracoes_anexo1.micro_empresa_epp',
+    'declaracoes_anexo1.cadmadeira',
+    'qualificacao_economico_financeira.exigir.certidao_negativa',
+    'qualificacao_economico_financeira.exigir.balanco_patrimonial',
+    'qualificacao_economico_financeira.exigir.indice_liquidez',
+    'qualificacao_economico_financeira.exigir.patrimonio_liquido',
+    'qualificacao_economico_financeira.nao_exigir.balanco_patrimonial',
+    'contratacao_escolha.maior_desconto',
+    'contratacao_escolha.menor_preco',
+    'nao_participacao_consorcio',
+    'proposta_maior_desconto',
+    'valor_percentual',
+    'certidao_negativa_administrador',
+    'cad_madeira_detalhe',
+    'orcamento_sigiloso_texto',
+)
+
+# Versão carregada: dados imutáveis, hash do arquivo e mtime usado na verificação
+ClausulasSnapshot = namedtuple('ClausulasSnapshot', ['data', 'digest', 'mtime'])
+
+
+class ClausulasError(ValueError):
+    """O clausulas.json não pôde ser lido ou não tem a estrutura esperada."""
+
+
+def validate_clausulas(data):
+    """Verifica se todas as chaves usadas na geração do edital existem."""
+    if not isinstance(data, dict):
+        raise ClausulasError('o arquivo deve conter um objeto JSON')
+    for path in REQUIRED_SECTIONS:
+        section = _lookup(data, path)
+        if not isinstance(section, dict):
+            raise ClausulasError(f"'{path}' deve ser um objeto")
+        # Os valores entram no documento como texto (alguns com .upper())
+        for key, value in section.items():
+            if not isinstance(value, str):
+                raise ClausulasError(f"'{path}.{key}' deve ser um texto")
+    for path in REQUIRED_TEXTS:
+        if not isinstance(_lookup(data, path), str):
+            raise ClausulasError(f"'{path}' deve ser um texto")
+
+
+def _lookup(data, path):
+    value = data
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            raise ClausulasError(f"chave obrigatória ausente: '{path}'")
+        value = value[key]
+    return value
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ClausulasStore:
+    """Cache do clausulas.json compartilhado pelo processo.
+
+    O arquivo é lido e validado uma vez; a cada acesso apenas o mtime é
+    consultado e, se mudou, o arquivo é recarregado. Se a nova versão for
+    inválida, a última versão válida continua sendo servida.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._snapshot = None
+        self._failed_mtime = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['clausulas_store'] = self
+        self.path = app.config['CLAUSULAS_FILE']
+
+    def snapshot(self):
+        mtime = os.path.getmtime(self.path)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.mtime == mtime:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.mtime == mtime:
+                return snapshot
+            if snapshot is not None and self._failed_mtime == mtime:
+                # Esta versão já falhou na validação; continua com a anterior
+                return snapshot
+            try:
+                self._snapshot = self._load(mtime)
+                self._failed_mtime = None
+            except ClausulasError as e:
+                self._failed_mtime = mtime
+                if snapshot is None:
+                    raise
+                logger.error(f"clausulas.json inválido, mantendo a versão anterior: {e}")
+            return self._snapshot
+
+    def get(self):
+        """Dados das cláusulas (somente leitura)."""
+        return self.snapshot().data
+
+    def _load(self, mtime):
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ClausulasError(f'JSON inválido: {e}') from e
+        validate_clausulas(data)
+        return ClausulasSnapshot(_freeze(data), hashlib.sha256(raw).hexdigest(), mtime)
+
+
+# Cláusulas carregadas uma vez por processo e recarregadas quando o arquivo muda
+clausulas_store = ClausulasStore()
@@ -0,0 +1,255 @@
+import json
+import logging
+import threading
+import zlib
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.types import TypeDecorator, Boolean, Date, LargeBinary, SmallInteger
+
+logger = logging.getLogger(__name__)
+
+
+class SimNao(TypeDecorator):
+    """Campo 'sim'/'nao' dos formulários gravado como booleano."""
+    impl = Boolean
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or value == '':
+            return None
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() == 'sim'
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return 'sim' if value else 'nao'
+
+
+class Enumerado(TypeDecorator):
+    """Valor de uma lista fixa gravado como a posição na lista (SMALLINT).
+
+    A posição é o que fica no banco: valores novos só podem entrar no fim da lista.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, values):
+        super().__init__()
+        self.values = tuple(values)
+
+    def code(self, value):
+        try:
+            return self.values.index(value)
+        except ValueError:
+            raise ValueError(f"valor inválido {value!r} (use {', '.join(self.values)})") from None
+
+    def process_bind_param(self, value, dialect):
+        if value is None or value == '':
+            return None
+        return self.code(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.values[value]
+
+
+class OptionCodes:
+    """Códigos SMALLINT das opções de cláusula (tabela opcao), em cache no processo.
+
+    As opções vêm das chaves do clausulas.json, que o admin pode editar: em vez de
+    uma lista fixa, cada par (campo, valor) ganha um código na primeira vez que é
+    gravado (ver ensure, chamado no before_flush) e o edital guarda só o código.
+    O cache do processo só recebe códigos já confirmados: os criados numa
+    transação ficam na sessão (e na thread que a usa) até o commit (publish);
+    num rollback são descartados (discard).
+    """
+
+    def __init__(self):
+        self.table = None
+        self.get_session = None
+        self._codes = {} # (campo, valor) -> código
+        self._values = {} # código -> valor
+        self._pending = threading.local() # códigos criados na transação em andamento desta thread
+        self._lock = threading.Lock()
+
+    def configure(self, table, get_session):
+        self.table = table
+        self.get_session = get_session
+
+    def clear(self):
+        """Esquece os códigos em cache (ex.: outro banco nos testes)."""
+        with self._lock:
+            self._codes.clear()
+            self._values.clear()
+
+    def _pending_codes(self):
+        return getattr(self._pending, 'codes', None) or {}
+
+    def _load(self, connection):
+        pending = set(self._pending_codes().values())
+        rows = connection.execute(select(self.table.c.id, self.table.c.campo, self.table.c.valor)).all()
+        with self._lock:
+            for code, campo, valor in rows:
+                if code in pending:
+                    continue # ainda não confirmado: só esta transação o enxerga
+                self._codes[(campo, valor)] = code
+                self._values[code] = valor
+
+    def _load_from_session(self):
+        # Na conexão da própria sessão (a que está lendo ou gravando o edital), sem abrir outra no pool
+        self._load(self.get_session().connection())
+
+    def code(self, campo, valor):
+        """Código da opção; -1 (não casa com nenhum edital) se ela nunca foi gravada."""
+        code = self._codes.get((campo, valor))
+        if code is None:
+            code = self._pending_codes().get((campo, valor))
+        if code is None:
+            self._load_from_session()
+            code = self._codes.get((campo, valor), -1)
+        return code
+
+    def value(self, code):
+        valor = self._values.get(code)
+        if valor is None:
+            valor = next((valor for (_, valor), pending in self._pending_codes().items() if pending == code), None)
+        if valor is None:
+            self._load_from_session()
+            valor = self._values.get(code)
+            if valor is None:
+                logger.warning(f"Opção de código {code} não encontrada na tabela opcao")
+        return valor
+
+    def ensure(self, session, pairs):
+        """Cadastra na transação da sessão as opções de `pairs` que ainda não têm código."""
+        pending = session.info.setdefault('opcoes_novas', {})
+        self._pending.codes = pending
+        missing = [pair for pair in pairs if pair not in self._codes and pair not in pending]
+        if not missing:
+            return
+        connection = session.connection()
+        self._load(connection)
+        for campo, valor in missing:
+            if (campo, valor) in self._codes:
+                continue
+            # Sem SAVEPOINT: no SQLite ele abriria a transação e o RELEASE já gravaria a opção
+            result = connection.execute(self._insert_ignore(connection.dialect.name).values(campo=campo, valor=valor))
+            if result.rowcount:
+                pending[(campo, valor)] = connection.execute(
+                    select(self.table.c.id).where(self.table.c.campo == campo, self.table.c.valor == valor)
+                ).scalar_one()
+            else:
+                # Outro processo cadastrou a mesma opção (e confirmou: o conflito só vem depois do commit dele)
+                self._load(connection)
+
+    def _insert_ignore(self, dialect_name):
+        if dialect_name == 'postgresql':
+            return postgresql_insert(self.table).on_conflict_do_nothing()
+        if dialect_name == 'sqlite':
+            return sqlite_insert(self.table).on_conflict_do_nothing()
+        return self.table.insert()
+
+    def publish(self, session):
+        """Depois do commit: os códigos criados na transação passam a valer para todo o processo."""
+        pending = session.info.pop('opcoes_novas', None)
+        if self._pending_codes() is pending:
+            self._pending.codes = None
+        if pending:
+            with self._lock:
+                for (campo, valor), code in pending.items():
+                    self._codes[(campo, valor)] = code
+                    self._values[code] = valor
+
+    def discard(self, session):
+        """Depois do rollback: esquece os códigos criados na transação (podem ser reutilizados)."""
+        pending = session.info.pop('opcoes_novas', None)
+        if self._pending_codes() is pending:
+            self._pending.codes = None
+
+
+option_codes = OptionCodes()
+
+
+class OpcaoClausula(TypeDecorator):
+    """Opção de cláusula (chave do clausulas.json) gravada como o código da tabela opcao."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, campo):
+        super().__init__()
+        self.campo = campo
+
+    def process_bind_param(self, value, dialect):
+        if value is None or value == '':
+            return None
+        return option_codes.code(self.campo, value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else option_codes.value(value)
+
+
+# Dicionário inicial do zlib: os nomes dos campos se repetem em todas as linhas e
+# um JSON de poucas centenas de bytes quase não comprime sem ele. Nunca alterar:
+# os dados já gravados só descomprimem com o mesmo dicionário (para mudar, crie
+# um novo FORMATO_DADOS e mantenha a leitura do antigo).
+DADOS_ZDICT = (b'{"compras_gov_numero":"","data_base_orcamento":"20","data_disponibilidade":"20",'
+               b'"data_sessao":"20","documento_tecnico_nome":"","email_contato1":"","email_contato2":"",'
+               b'"hora_sessao":"","numero_licitacao_anexo1":"","valor_total_orcamento":"R$ "}')
+FORMATO_DADOS = b'\x01'
+
+
+class JSONCompactado(TypeDecorator):
+    """Dicionário gravado como JSON comprimido (zlib com DADOS_ZDICT) num BLOB/BYTEA."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if not value:
+            return None
+        raw = json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=DADOS_ZDICT)
+        return FORMATO_DADOS + compressor.compress(raw) + compressor.flush()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return {}
+        value = bytes(value)
+        if value[:1] != FORMATO_DADOS:
+            raise ValueError(f"Formato de dados desconhecido: {value[:1]!r}")
+        decompressor = zlib.decompressobj(-15, zdict=DADOS_ZDICT)
+        return json.loads(decompressor.decompress(value[1:]) + decompressor.flush())
+
+
+class CampoDados:
+    """Campo do formulário guardado no JSON compactado `dados` do modelo.
+
+    Lido e atribuído como uma coluna comum; datas ficam no JSON como AAAA-MM-DD.
+    Cada atribuição troca o dicionário inteiro, para o SQLAlchemy ver a alteração.
+    """
+
+    def __init__(self, type_, payload='dados'):
+        self.type = type_
+        self.payload = payload
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = (getattr(obj, self.payload) or {}).get(self.name)
+        if value is not None and isinstance(self.type, Date):
+            value = date.fromisoformat(value)
+        return value
+
+    def __set__(self, obj, value):
+        data = dict(getattr(obj, self.payload) or {})
+        if value is None or value == '':
+            data.pop(self.name, None)
+        else:
+            data[self.name] = value.isoformat() if isinstance(value, date) else value
+        setattr(obj, self.payload, data)
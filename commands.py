@@ -0,0 +1,162 @@
+import os
+
+import click # Importar click para comandos CLI
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+
+from models import User
+from extensions import db
+from clausulas_store import clausulas_store
+from batch import read_rows, generate_batch
+import search_index
+from password_hashing import benchmark_costs
+from file_gc import file_reaper
+from worker_memory import workers_memory
+
+
+# Revisão das migrações com o esquema criado pelo db.create_all antes delas
+REVISAO_INICIAL = '0001'
+
+
+def upgrade_database():
+    """Aplica as migrações pendentes (o mesmo que `flask db upgrade`).
+
+    Bancos criados antes das migrações, pelo db.create_all, são marcados
+    com a revisão inicial antes, para não recriar tabelas que já existem.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if 'edital' in tables and 'alembic_version' not in tables:
+        stamp(revision=REVISAO_INICIAL)
+    upgrade()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Cria ou atualiza as tabelas do banco de dados e cria um usuário admin inicial."""
+    upgrade_database()
+    # Cria um usuário admin se não existir
+    if not User.query.filter_by(username='admin').first():
+        admin_user = User(username='admin', email='admin@example.com', role='admin')
+        admin_user.set_password('admin123') # Senha padrão para o admin
+        db.session.add(admin_user)
+        db.session.commit()
+        click.echo("Usuário 'admin' criado com sucesso! Senha: admin123")
+    else:
+        click.echo("Usuário 'admin' já existe.")
+    click.echo("Banco de dados inicializado.")
+
+@click.command('reindex-search')
+@with_appcontext
+def reindex_search_command():
+    """Recria o índice de busca de texto completo dos editais."""
+    with db.engine.begin() as connection:
+        total = search_index.rebuild_search_index(connection)
+    click.echo(f"Índice de busca recriado: {total} editais indexados.")
+
+@click.command('gc-files')
+@click.option('--dry-run', is_flag=True, help='Só lista o que seria removido.')
+@click.option('--quarantine', type=click.Path(file_okay=False), default=None,
+              help='Move os órfãos para esta pasta em vez de apagar.')
+@click.option('--min-age', type=int, default=None, help='Ignora arquivos mais novos que isso, em segundos (padrão: FILE_GC_MIN_AGE).')
+@click.option('--batch-size', type=int, default=None, help='Arquivos comparados com o banco por consulta (padrão: FILE_GC_BATCH).')
+@with_appcontext
+def gc_files_command(dry_run, quarantine, min_age, batch_size):
+    """Remove da pasta de editais gerados os arquivos que nenhum edital referencia."""
+    options = {'dry_run': dry_run}
+    if quarantine:
+        options['quarantine'] = quarantine
+    if min_age is not None:
+        options['min_age'] = min_age
+    if batch_size:
+        options['batch_size'] = batch_size
+    result = file_reaper.collect(**options)
+    action = 'seriam liberados' if dry_run else 'liberados'
+    click.echo(f"Arquivos examinados: {result.scanned} | órfãos: {result.orphans} | "
+               f"{result.bytes} bytes ({result.bytes / (1024 * 1024):.1f} MB) {action} | erros: {result.errors}")
+
+@click.command('bench-bcrypt')
+@click.option('--costs', default='10,11,12,13', show_default=True, help='Custos do bcrypt a medir, separados por vírgula.')
+@click.option('--seconds', type=float, default=2.0, show_default=True, help='Duração da medição de cada custo.')
+@with_appcontext
+def bench_bcrypt_command(costs, seconds):
+    """Mede logins/s por núcleo para cada custo do bcrypt (para escolher o BCRYPT_LOG_ROUNDS)."""
+    try:
+        costs = [int(cost) for cost in costs.split(',')]
+    except ValueError:
+        raise click.BadParameter('use números separados por vírgula, ex.: 10,11,12', param_hint='--costs')
+    cores = os.cpu_count() or 1
+    click.echo(f"{'custo':<7}{'hash (ms)':>11}{'verificação (ms)':>18}{'logins/s/núcleo':>17}{f'logins/s ({cores} núcleos)':>24}")
+    for cost, result in benchmark_costs(costs, seconds=seconds).items():
+        marker = ' <- atual' if cost == current_app.config['BCRYPT_LOG_ROUNDS'] else ''
+        click.echo(f"{cost:<7}{result['hash_ms']:>11.1f}{result['verify_ms']:>18.1f}{result['per_second']:>17.1f}"
+                   f"{result['per_second'] * cores:>24.1f}{marker}")
+
+@click.command('bench-render')
+@click.option('--rounds', type=int, default=20, show_default=True, help='Renderizações por backend.')
+@with_appcontext
+def bench_render_command(rounds):
+    """Compara tempo e pico de memória dos backends de renderização (python-docx x XML direto)."""
+    from xml_render import benchmark_backends
+    results = benchmark_backends(current_app.config['MODELO_EDITAL_PATH'], rounds=rounds)
+    click.echo(f"{'backend':<8}{'compilação (ms)':>18}{'render+save (ms)':>19}{'pico (KB)':>12}{'arquivo (KB)':>15}")
+    for backend, result in results.items():
+        click.echo(f"{backend:<8}{result['compile_ms']:>18.1f}{result['render_ms']:>19.1f}"
+                   f"{result['peak_kb']:>12.0f}{result['size_kb']:>15.0f}")
+
+@click.command('worker-memory')
+@click.argument('master_pid', type=int)
+def worker_memory_command(master_pid):
+    """Memória (RSS, PSS, compartilhada e exclusiva) do master do gunicorn e de cada worker.
+
+    Compare a soma do PSS com GUNICORN_PRELOAD=1 e GUNICORN_PRELOAD=0 para ver
+    quanto o preload economiza (só no Linux).
+    """
+    processes = workers_memory(master_pid)
+    if not processes:
+        raise click.ClickException(f"Processo {master_pid} não encontrado (ou /proc indisponível).")
+    click.echo(f"{'pid':>8}  {'processo':<16}{'RSS (MB)':>10}{'PSS (MB)':>10}{'compart. (MB)':>15}{'exclusiva (MB)':>16}")
+    for memory in processes:
+        role = 'master' if memory.pid == master_pid else memory.name
+        click.echo(f"{memory.pid:>8}  {role:<16}{memory.rss / 1024:>10.1f}{memory.pss / 1024:>10.1f}"
+                   f"{memory.shared / 1024:>15.1f}{memory.private / 1024:>16.1f}")
+    click.echo(f"{'total':>8}  {'':<16}{sum(m.rss for m in processes) / 1024:>10.1f}"
+               f"{sum(m.pss for m in processes) / 1024:>10.1f}")
+
+@click.command('generate-batch')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'username', default='admin', show_default=True, help='Usuário criador dos editais.')
+@click.option('--workers', type=int, default=None, help='Processos de renderização (padrão: número de núcleos).')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Editais inseridos por commit.')
+@with_appcontext
+def generate_batch_command(arquivo, username, workers, batch_size):
+    """Cria editais em lote a partir de um CSV ou JSON (campos do EditalForm) e gera os .docx em paralelo."""
+    creator = User.query.filter_by(username=username).first()
+    if not creator:
+        raise click.ClickException(f"Usuário '{username}' não encontrado.")
+    try:
+        rows = read_rows(arquivo)
+        clausulas_snapshot = clausulas_store.snapshot()
+    except (OSError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"Processando {len(rows)} registros...")
+    result = generate_batch(rows, creator, clausulas_snapshot, current_app.config['MODELO_EDITAL_PATH'],
+                            current_app.config['STORAGE_URL'], workers=workers, batch_size=batch_size)
+
+    click.echo(f"Editais criados: {result.created} | arquivos gerados: {result.rendered} | "
+               f"reaproveitados: {result.reused} | erros: {len(result.errors)}")
+    rate = len(rows) / result.elapsed if result.elapsed else 0
+    click.echo(f"Tempo total: {result.elapsed:.2f}s ({rate:.1f} registros/s)")
+    if result.errors:
+        click.echo("Erros por registro:")
+        for number, message in result.errors:
+            click.echo(f"  registro {number}: {message}")
+
+
+def register_commands(app):
+    for command in (init_db_command, reindex_search_command, gc_files_command, bench_bcrypt_command,
+                    bench_render_command, worker_memory_command, generate_batch_command):
+        app.cli.add_command(command)
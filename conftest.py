@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+from docx import Document
+from jinja2 import FileSystemLoader
+
+from app import create_app
+from clausulas_store import REQUIRED_SECTIONS, REQUIRED_TEXTS
+from column_types import option_codes
+from extensions import db
+from models import User
+
+
+def criar_clausulas(path):
+    """clausulas.json mínimo: as opções de cada seção e os textos exigidos por validate_clausulas."""
+    data = {section: {key: f'{section} {key}' for key in ('sim', 'nao', 'maior_desconto', 'menor_preco', 'aberto')}
+            for section in REQUIRED_SECTIONS}
+    for text_path in REQUIRED_TEXTS:
+        *parents, name = text_path.split('.')
+        node = data
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[name] = f'texto {text_path}'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def criar_modelo(path):
+    """Modelo de edital com placeholders inteiros, divididos entre runs, em tabela e no cabeçalho."""
+    document = Document()
+    document.add_paragraph('Pregão {{ numero_pregao }}: {{ objeto_servicos }}')
+    paragraph = document.add_paragraph('Sessão em ')
+    paragraph.add_run('{{ data_')
+    paragraph.add_run('sessao }} às {{ hora').bold = True
+    paragraph.add_run('_sessao }}.')
+    document.add_paragraph('Disputa: {{ modo_disputa_resumo }}. Responsável: {{ nome }}.')
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = 'Visita técnica'
+    table.cell(0, 1).text = '{{ visita_tecnica }}'
+    document.sections[0].header.paragraphs[0].text = 'Edital {{ numero_pregao }}'
+    document.save(path)
+
+
+@pytest.fixture
+def app(tmp_path):
+    criar_clausulas(tmp_path / 'clausulas.json')
+    criar_modelo(tmp_path / 'modelo.docx')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'editais.db'}",
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'GENERATION_WORKERS': 0,
+        'BCRYPT_LOG_ROUNDS': 4,
+        'USER_CACHE_TTL': 0,
+        'CLAUSULAS_FILE': str(tmp_path / 'clausulas.json'),
+        'MODELO_EDITAL_PATH': str(tmp_path / 'modelo.docx'),
+        'STORAGE_URL': str(tmp_path / 'editais'),
+    })
+    # Cada teste usa um banco novo: os códigos da tabela opcao em cache não valem mais
+    option_codes.clear()
+    # Os templates ficam na raiz do projeto, não em templates/
+    app.jinja_loader = FileSystemLoader(os.path.dirname(os.path.abspath(__file__)))
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
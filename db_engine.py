@@ -0,0 +1,99 @@
+import logging
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+# Pragmas de cada conexão SQLite: WAL deixa os workers lerem enquanto outro grava
+# (só a gravação é serializada) e synchronous=NORMAL é seguro com WAL
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY',
+    'cache_size': -16000, # KB (negativo): 16 MB por conexão
+}
+
+
+def pool_limits(max_connections, workers, threads, pool_size=None):
+    """Tamanho do pool e overflow de cada processo a partir do limite de conexões do banco.
+
+    Cada worker do gunicorn tem seu próprio pool: o total (workers x (pool + overflow))
+    não passa de `max_connections`. O pool fixo cobre as threads do worker e a thread
+    que grava o resultado da geração; o overflow atende picos até o limite do worker.
+    """
+    per_worker = max(2, max_connections // max(1, workers))
+    if pool_size is None:
+        pool_size = min(threads + 1, per_worker)
+    return pool_size, max(0, per_worker - pool_size)
+
+
+class EngineTuning:
+    """Opções do engine do SQLAlchemy por banco, aplicadas antes do db.init_app.
+
+    PostgreSQL: pool dimensionado pelos workers e threads (ver pool_limits),
+    pool_pre_ping (descarta conexões derrubadas pelo servidor), recycle e
+    statement_timeout em cada conexão.
+    SQLite: WAL, busy_timeout e os demais SQLITE_PRAGMAS em cada conexão.
+    Opções já definidas em SQLALCHEMY_ENGINE_OPTIONS têm precedência.
+    """
+
+    def __init__(self, app=None):
+        self.busy_timeout = 5000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DB_MAX_CONNECTIONS', 20)
+        app.config.setdefault('DB_WORKERS', 1)
+        app.config.setdefault('DB_THREADS', 4)
+        app.config.setdefault('DB_POOL_SIZE', None)
+        app.config.setdefault('DB_MAX_OVERFLOW', None)
+        app.config.setdefault('DB_POOL_TIMEOUT', 10)
+        app.config.setdefault('DB_POOL_RECYCLE', 1800)
+        app.config.setdefault('DB_STATEMENT_TIMEOUT', 30000)
+        app.config.setdefault('DB_BUSY_TIMEOUT', 5000)
+        app.extensions['engine_tuning'] = self
+
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() == 'sqlite':
+            self.busy_timeout = app.config['DB_BUSY_TIMEOUT']
+            if not event.contains(Engine, 'connect', self._sqlite_connect):
+                event.listen(Engine, 'connect', self._sqlite_connect)
+            return
+
+        pool_size, max_overflow = pool_limits(app.config['DB_MAX_CONNECTIONS'], app.config['DB_WORKERS'],
+                                              app.config['DB_THREADS'], app.config['DB_POOL_SIZE'])
+        if app.config['DB_MAX_OVERFLOW'] is not None:
+            max_overflow = app.config['DB_MAX_OVERFLOW']
+        for name, value in (('pool_size', pool_size), ('max_overflow', max_overflow),
+                            ('pool_timeout', app.config['DB_POOL_TIMEOUT']),
+                            ('pool_recycle', app.config['DB_POOL_RECYCLE']),
+                            ('pool_pre_ping', True),
+                            # A conexão usada por último volta primeiro: as ociosas expiram pelo recycle
+                            ('pool_use_lifo', True)):
+            options.setdefault(name, value)
+
+        if url.get_backend_name() == 'postgresql' and app.config['DB_STATEMENT_TIMEOUT']:
+            connect_args = options.setdefault('connect_args', {})
+            timeout = f"-c statement_timeout={int(app.config['DB_STATEMENT_TIMEOUT'])}"
+            connect_args['options'] = f"{connect_args['options']} {timeout}" if connect_args.get('options') else timeout
+        logger.info(f"Pool do banco: {options['pool_size']} conexões + {options['max_overflow']} de overflow por processo")
+
+    def _sqlite_connect(self, dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            # Espera o lock de gravação de outro worker em vez de falhar com "database is locked"
+            cursor.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+engine_tuning = EngineTuning()
@@ -0,0 +1,315 @@
+import bisect
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+import zipfile
+from collections import namedtuple
+from contextlib import nullcontext
+
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+logger = logging.getLogger(__name__)
+
+# Placeholders no formato {{ nome_do_campo }}
+PLACEHOLDER_RE = re.compile(r'\{\{.*?\}\}')
+
+# Resultado de uma substituição: placeholders substituídos, sem valor e chaves não encontradas no modelo
+SubstitutionReport = namedtuple('SubstitutionReport', ['replaced', 'missing', 'unused'])
+
+
+def iter_story_parts(document):
+    """Retorna o corpo do documento e cada parte de cabeçalho/rodapé (sem criar novas)."""
+    yield document.part
+    seen = {document.part.partname}
+    for rel in document.part.rels.values():
+        if rel.is_external or rel.reltype not in (RT.HEADER, RT.FOOTER):
+            continue
+        part = rel.target_part
+        if part.partname in seen:
+            continue
+        seen.add(part.partname)
+        yield part
+
+
+def iter_part_paragraphs(part):
+    """Percorre todos os parágrafos (w:p) de uma parte, inclusive dentro de tabelas."""
+    return part.element.iter(qn('w:p'))
+
+
+class CompiledTemplate:
+    """Modelo .docx lido uma única vez, com o índice de onde cada placeholder aparece.
+
+    O índice é organizado por parte (corpo, cabeçalhos e rodapés) e pela posição
+    do parágrafo dentro da parte. Para cada ocorrência guardamos também o
+    intervalo de caracteres no texto do parágrafo e os runs que ele ocupa.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.digest = hashlib.sha256(self.data).hexdigest()
+        # partname -> {indice_paragrafo: [(placeholder, inicio, fim, primeiro_run, ultimo_run)]}
+        self.locations = {}
+        # placeholder -> [(partname, indice_paragrafo)]
+        self.index = {}
+        self._compile()
+
+    def _compile(self):
+        document = Document(io.BytesIO(self.data))
+        for part in iter_story_parts(document):
+            part_locations = index_paragraphs(part.element)
+            if part_locations:
+                self.locations[part.partname] = part_locations
+                _add_to_index(self.index, part.partname, part_locations)
+
+    @property
+    def placeholders(self):
+        return set(self.index)
+
+    def render(self, replacements, timer=None):
+        """Gera um novo Document com os placeholders substituídos.
+
+        Apenas os parágrafos indexados são visitados. Retorna o documento e um
+        SubstitutionReport com os placeholders substituídos, os que ficaram sem
+        valor e as chaves de `replacements` que não existem no modelo. Com
+        `timer` (metrics.StageTimer) mede a abertura do modelo e a substituição.
+        """
+        with stage(timer, 'template_open'):
+            document = Document(io.BytesIO(self.data))
+        replaced = set()
+        missing = set()
+        with stage(timer, 'substitution'):
+            for part in iter_story_parts(document):
+                part_locations = self.locations.get(part.partname)
+                if not part_locations:
+                    continue
+                p_replaced, p_missing = substitute_indexed(part.element, part_locations, replacements)
+                replaced |= p_replaced
+                missing |= p_missing
+        return document, SubstitutionReport(replaced, missing, set(replacements) - replaced)
+
+
+    def patch(self, rendered, replacements, placeholders):
+        """Atualiza um .docx já renderizado a partir deste modelo só onde `placeholders` aparecem.
+
+        A substituição nunca cria nem remove parágrafos ou runs, então o
+        parágrafo N do documento renderizado (e cada run dele) corresponde ao
+        do modelo. Nos parágrafos que contêm algum dos placeholders, o texto
+        dos runs do modelo é substituído de novo com `replacements` (completo)
+        e gravado nos mesmos runs do documento renderizado; o restante do
+        parágrafo, inclusive parágrafos aninhados (caixas de texto), fica como
+        está. As demais partes do pacote são copiadas sem serem lidas pelo
+        python-docx. Retorna (bytes do novo .docx, placeholders sem valor).
+        """
+        targets = {}
+        for placeholder in placeholders:
+            for partname, p_idx in self.index.get(placeholder, ()):
+                targets.setdefault(partname, set()).add(p_idx)
+
+        missing = set()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(rendered)) as old, zipfile.ZipFile(io.BytesIO(self.data)) as original, \
+                zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as out:
+            for info in old.infolist():
+                data = old.read(info.filename)
+                partname = '/' + info.filename
+                if partname in targets:
+                    element = parse_xml(data)
+                    paragraphs = list(element.iter(qn('w:p')))
+                    template_paragraphs = list(parse_xml(original.read(info.filename)).iter(qn('w:p')))
+                    if len(paragraphs) != len(template_paragraphs):
+                        raise ValueError(f"{info.filename} não corresponde ao modelo {self.path}")
+                    for p_idx in sorted(targets[partname]):
+                        runs = Paragraph(paragraphs[p_idx], None).runs
+                        texts = [run.text for run in Paragraph(template_paragraphs[p_idx], None).runs]
+                        if len(runs) != len(texts):
+                            raise ValueError(f"{info.filename}: parágrafo {p_idx} não corresponde ao modelo {self.path}")
+                        bounds = _run_offsets(texts)
+                        _, p_missing, changed = _substitute_texts(texts, bounds, self.locations[partname][p_idx],
+                                                                  replacements)
+                        for i in changed:
+                            runs[i].text = texts[i]
+                        missing |= p_missing
+                    data = serialize_part_xml(element)
+                out.writestr(info, data)
+        return buffer.getvalue(), missing
+
+
+def index_paragraphs(element):
+    """Localiza os placeholders nos parágrafos de uma parte (corpo, cabeçalho ou rodapé).
+
+    Retorna {indice_paragrafo: [(placeholder, inicio, fim, primeiro_run, ultimo_run)]},
+    onde o índice é a posição do w:p na ordem do documento.
+    """
+    part_locations = {}
+    for p_idx, p in enumerate(element.iter(qn('w:p'))):
+        paragraph = Paragraph(p, None)
+        text = paragraph.text
+        if '{{' not in text:
+            continue
+        # Offsets de cada run no texto do parágrafo
+        run_bounds = []
+        offset = 0
+        for run in paragraph.runs:
+            run_bounds.append(offset)
+            offset += len(run.text)
+        occurrences = [
+            (m.group(0), m.start(), m.end(), _run_at(run_bounds, m.start()), _run_at(run_bounds, m.end() - 1))
+            for m in PLACEHOLDER_RE.finditer(text)
+        ]
+        if occurrences:
+            part_locations[p_idx] = occurrences
+    return part_locations
+
+
+def substitute_indexed(element, part_locations, replacements):
+    """Aplica as substituições apenas nos parágrafos indexados de uma parte."""
+    replaced = set()
+    missing = set()
+    paragraphs = list(element.iter(qn('w:p')))
+    # Rastreamento de cada substituição só com o log em DEBUG (uma verificação por parte)
+    trace = logger.isEnabledFor(logging.DEBUG)
+    for p_idx, occurrences in part_locations.items():
+        p_replaced, p_missing = substitute_paragraph(Paragraph(paragraphs[p_idx], None), replacements, occurrences)
+        if trace:
+            for placeholder, _, _, _, _ in occurrences:
+                status = 'substituído' if placeholder in p_replaced else 'sem valor'
+                logger.debug(f"Parágrafo {p_idx}: {placeholder} {status} ({str(replacements.get(placeholder, ''))[:80]!r})")
+        replaced |= p_replaced
+        missing |= p_missing
+    return replaced, missing
+
+
+def stage(timer, name):
+    """Etapa medida por `timer` (metrics.StageTimer), ou um bloco comum sem ele."""
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def _add_to_index(index, partname, part_locations):
+    for p_idx, occurrences in part_locations.items():
+        for placeholder, _, _, _, _ in occurrences:
+            index.setdefault(placeholder, []).append((partname, p_idx))
+
+
+def substitute_paragraph(paragraph, replacements, occurrences=None):
+    """Substitui todos os placeholders de um parágrafo em uma única passada sobre os runs.
+
+    Placeholders quebrados pelo Word em vários runs são unidos no primeiro run
+    (que mantém a formatação); os demais perdem apenas os trechos do
+    placeholder. Só os runs alterados são reescritos. Retorna os conjuntos
+    (substituidos, sem_valor).
+    """
+    runs = paragraph.runs
+    texts = [run.text for run in runs]
+    bounds = _run_offsets(texts)
+    full_text = ''.join(texts)
+    if occurrences is None or any(full_text[start:end] != placeholder for placeholder, start, end, _, _ in occurrences):
+        if '{{' not in full_text:
+            return set(), set()
+        occurrences = [
+            (m.group(0), m.start(), m.end(), _run_at(bounds, m.start()), _run_at(bounds, m.end() - 1))
+            for m in PLACEHOLDER_RE.finditer(full_text)
+        ]
+
+    replaced, missing, changed = _substitute_texts(texts, bounds, occurrences, replacements)
+    for i in changed:
+        runs[i].text = texts[i]
+    return replaced, missing
+
+
+def _run_offsets(texts):
+    """Posição de início de cada run no texto do parágrafo."""
+    bounds = []
+    offset = 0
+    for text in texts:
+        bounds.append(offset)
+        offset += len(text)
+    return bounds
+
+
+def _substitute_texts(texts, bounds, occurrences, replacements):
+    """Substitui as ocorrências na lista de textos dos runs (alterada no lugar).
+
+    Retorna (substituidos, sem_valor, índices dos runs alterados).
+    """
+    replaced = set()
+    missing = set()
+    changed = set()
+    # Da direita para a esquerda, para que os offsets anteriores continuem válidos
+    for placeholder, start, end, first_run, last_run in reversed(occurrences):
+        if placeholder not in replacements:
+            missing.add(placeholder)
+            continue
+        value = str(replacements[placeholder])
+        head = texts[first_run][:start - bounds[first_run]]
+        tail = texts[last_run][end - bounds[last_run]:]
+        if first_run == last_run:
+            texts[first_run] = head + value + tail
+        else:
+            texts[first_run] = head + value
+            for i in range(first_run + 1, last_run):
+                texts[i] = ''
+                changed.add(i)
+            texts[last_run] = tail
+            changed.add(last_run)
+        changed.add(first_run)
+        replaced.add(placeholder)
+    return replaced, missing, changed
+
+
+def substitute_document(document, replacements):
+    """Substitui os placeholders em qualquer Document já aberto (corpo, tabelas, cabeçalhos e rodapés)."""
+    replaced = set()
+    missing = set()
+    for part in iter_story_parts(document):
+        for p in iter_part_paragraphs(part):
+            p_replaced, p_missing = substitute_paragraph(Paragraph(p, None), replacements)
+            replaced |= p_replaced
+            missing |= p_missing
+    return SubstitutionReport(replaced, missing, set(replacements) - replaced)
+
+
+def _run_at(run_bounds, char_offset):
+    """Índice do run que contém o caractere na posição informada."""
+    return max(bisect.bisect_right(run_bounds, char_offset) - 1, 0)
+
+
+# Backend de renderização: 'docx' (python-docx) ou 'xml' (XML direto no zip, ver xml_render.py).
+# Lido do ambiente para valer também nos processos do pool de geração
+RENDER_BACKEND = os.environ.get('RENDER_BACKEND', 'docx')
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_compiled_template(path, backend=None):
+    """Retorna o modelo compilado do cache do processo, recompilando se o arquivo mudou.
+
+    Os dois backends têm a mesma interface: render(replacements) devolve um
+    objeto com save(caminho_ou_stream) e um SubstitutionReport.
+    """
+    backend = backend or RENDER_BACKEND
+    if backend == 'xml':
+        from xml_render import XmlTemplate as template_class
+    elif backend == 'docx':
+        template_class = CompiledTemplate
+    else:
+        raise ValueError(f"Backend de renderização desconhecido: {backend}")
+
+    mtime = os.path.getmtime(path)
+    with _templates_lock:
+        template = _templates.get((path, backend))
+        if template is None or template.mtime != mtime:
+            template = template_class(path)
+            _templates[(path, backend)] = template
+    return template
@@ -0,0 +1,386 @@
+import io
+import logging
+import os
+import time
+from datetime import datetime
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, send_file, flash, abort, jsonify
+from flask_login import login_required, current_user
+from werkzeug.http import is_resource_modified
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, load_only
+
+from forms import EditalForm
+from models import User, Edital, EDITAL_FORM_FIELDS, STATUS_CONCLUIDO, STATUS_ERRO
+from extensions import db
+from clausulas_store import clausulas_store, ClausulasError
+from generation_queue import generation_queue
+from render_cache import render_key, rendered_documents
+from replacements import build_replacements
+from batch import row_to_values
+import search_index
+from file_gc import file_reaper
+from storage import open_storage
+from pdf_convert import pdf_converter, PdfConversionBusy, PdfConversionError
+from metrics import metrics, RenderResult, StageTimer
+
+# python-docx (docx_render, preview) só é importado na primeira renderização:
+# o processo sobe sem ele e as rotas que não geram documentos não pagam o custo
+
+bp = Blueprint('editais', __name__)
+
+# Paginação por cursor (keyset) das listagens de editais.
+# O cursor é a (data_criacao, id) do último edital da página; a próxima página
+# começa logo depois dele, usando o índice e sem OFFSET.
+EDITAIS_POR_PAGINA = 50
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+def get_storage():
+    return open_storage(current_app.config['STORAGE_URL'])
+
+def colunas_listagem(query):
+    # Carrega só as colunas exibidas nas tabelas (o objeto vem do objeto_resumo, já truncado)
+    return query.options(
+        load_only(Edital.id, Edital.form_name, Edital.numero_pregao, Edital.objeto_resumo, Edital.data_criacao,
+                  Edital.creator_id, Edital.storage_key, Edital.job_id, Edital.status, Edital.status_message),
+    )
+
+def listar_editais(query, cursor=None, per_page=EDITAIS_POR_PAGINA):
+    query = colunas_listagem(query).order_by(Edital.data_criacao.desc(), Edital.id.desc())
+
+    if cursor:
+        try:
+            data_str, id_str = cursor.rsplit('_', 1)
+            cursor_data, cursor_id = datetime.fromisoformat(data_str), int(id_str)
+        except ValueError:
+            abort(400)
+        query = query.filter(or_(
+            Edital.data_criacao < cursor_data,
+            and_(Edital.data_criacao == cursor_data, Edital.id < cursor_id),
+        ))
+
+    editals = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(editals) > per_page:
+        editals = editals[:per_page]
+        last = editals[-1]
+        next_cursor = f"{last.data_criacao.isoformat()}_{last.id}"
+    return editals, next_cursor
+
+# Função para substituir um placeholder em um documento DOCX
+# (as rotas usam o modelo compilado, que substitui todos de uma vez)
+def replace_placeholder(document, placeholder, value):
+    from docx_render import substitute_document
+    report = substitute_document(document, {placeholder: value})
+    if current_app.logger.isEnabledFor(logging.DEBUG):
+        current_app.logger.debug(f"Substituição de '{placeholder}' por '{value}': {'feita' if report.replaced else 'não encontrado'}")
+
+def carregar_clausulas():
+    # Cláusulas atuais e o hash delas; sem o arquivo, o formulário abre sem as opções e avisa
+    clausulas_file = current_app.config['CLAUSULAS_FILE']
+    try:
+        with metrics.stage('clause_load'):
+            clausulas_snapshot = clausulas_store.snapshot()
+        return clausulas_snapshot.data, clausulas_snapshot.digest
+    except FileNotFoundError:
+        flash(f'Arquivo de cláusulas não encontrado: {clausulas_file}', 'danger')
+    except ClausulasError as e:
+        flash(f'Erro ao ler o arquivo JSON de cláusulas: {clausulas_file} ({e})', 'danger')
+    return {}, None
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    # Carrega os editais do usuário logado, ordenados pela data de criação, uma página por vez
+    editals, next_cursor = listar_editais(Edital.query.filter_by(creator_id=current_user.id), request.args.get('cursor'))
+    return render_template('dashboard.html', editals=editals, next_cursor=next_cursor,
+                           is_first_page=not request.args.get('cursor'))
+
+@bp.route('/buscar')
+@login_required
+def buscar_editais():
+    # Busca no índice de texto completo (nome, número do pregão, objeto e objeto do anexo 1),
+    # ordenada por relevância. Administradores buscam em todos os editais.
+    termo = request.args.get('q', '').strip()
+    editals = []
+    if termo:
+        creator_id = None if current_user.is_admin() else current_user.id
+        ids = search_index.search(db.session, termo, creator_id=creator_id, limit=EDITAIS_POR_PAGINA)
+        if ids:
+            query = colunas_listagem(Edital.query.filter(Edital.id.in_(ids)))
+            if current_user.is_admin():
+                query = query.options(joinedload(Edital.creator).load_only(User.id, User.username))
+            por_id = {edital.id: edital for edital in query}
+            editals = [por_id[edital_id] for edital_id in ids if edital_id in por_id]
+    return render_template('buscar_editais.html', editals=editals, termo=termo)
+
+@bp.route('/generate_edital', methods=['GET', 'POST'])
+@login_required
+def generate_edital():
+    form = EditalForm() # Instancia o formulário WTForms
+    clausulas_data, clausulas_digest = carregar_clausulas()
+    form.carregar_opcoes(clausulas_data) # Opções dos campos de cláusula vêm do clausulas.json
+    modelo_edital_path = current_app.config['MODELO_EDITAL_PATH']
+
+    if form.validate_on_submit(): # Usa validate_on_submit para WTForms
+        try:
+            # Cria uma nova instância de Edital com os campos do formulário, associada ao usuário logado
+            new_edital = Edital(creator_id=current_user.id,
+                                **{field: getattr(form, field).data for field in EDITAL_FORM_FIELDS})
+
+            db.session.add(new_edital)
+            with metrics.stage('db_commit'):
+                db.session.commit()
+
+            # Lógica para preencher o template .docx
+            current_app.logger.debug(f"Caminho do modelo DOCX: {modelo_edital_path}")
+            if not os.path.exists(modelo_edital_path):
+                raise FileNotFoundError(f"Modelo de edital não encontrado em: {modelo_edital_path}")
+
+            # Mapeamento dos campos do formulário para os placeholders no DOCX
+            replacements = build_replacements(new_edital, clausulas_data, current_user.username)
+
+            # A renderização e o salvamento rodam no pool de geração; a requisição volta imediatamente.
+            # Se um edital idêntico já foi renderizado, o arquivo é reaproveitado (job_id None)
+            job_id = generation_queue.submit(new_edital, replacements, clausulas_digest, username=current_user.username)
+            current_app.logger.debug(f"Edital ID {new_edital.id} enviado para geração (job {job_id})")
+
+            if job_id is None:
+                flash(f'Edital "{new_edital.form_name}" gerado com sucesso!', 'success')
+            else:
+                flash(f'Edital "{new_edital.form_name}" enviado para geração (job {job_id}). Acompanhe a situação no painel.', 'success')
+            return redirect(url_for('editais.dashboard'))
+
+        except FileNotFoundError:
+            flash(f'Arquivo de template não encontrado: {modelo_edital_path}', 'danger')
+            current_app.logger.error(f"Modelo de edital não encontrado: {modelo_edital_path}")
+        except Exception as e:
+            flash(f'Erro ao gerar o edital: {str(e)}', 'danger')
+            # Opcional: logar o erro completo para depuração
+            current_app.logger.error(f"Erro na geração do edital: {e}", exc_info=True)
+
+    return render_template('generate_edital.html', form=form, clausulas=clausulas_data)
+
+# Rota para edição de edital
+@bp.route('/edit_edital/<int:edital_id>', methods=['GET', 'POST'])
+@login_required
+def edit_edital(edital_id):
+    edital = Edital.query.get_or_404(edital_id)
+
+    # Autorização: Apenas o criador OU um admin pode editar
+    if edital.creator_id != current_user.id and not current_user.is_admin():
+        flash('Você não tem permissão para editar este edital.', 'danger')
+        return redirect(url_for('editais.dashboard'))
+
+    form = EditalForm()
+    clausulas_data, clausulas_digest = carregar_clausulas()
+    form.carregar_opcoes(clausulas_data) # Opções dos campos de cláusula vêm do clausulas.json
+    modelo_edital_path = current_app.config['MODELO_EDITAL_PATH']
+
+    if form.validate_on_submit():
+        try:
+            # Valores anteriores: a re-geração só recalcula os placeholders dos campos alterados
+            previous_values = {field: getattr(edital, field) for field in EDITAL_FORM_FIELDS}
+
+            # Atualiza o objeto edital com os dados do formulário
+            for field in EDITAL_FORM_FIELDS:
+                setattr(edital, field, getattr(form, field).data)
+
+            if not os.path.exists(modelo_edital_path):
+                raise FileNotFoundError(f"Modelo de edital não encontrado em: {modelo_edital_path}")
+
+            # Salva as alterações e agenda a re-geração; o arquivo antigo é removido
+            # pela fila quando o novo estiver pronto. Sem mudanças no resultado, nada é renderizado.
+            # O {{ nome }} é sempre o do criador (ver replacements.PLACEHOLDERS), mesmo se um admin edita
+            job_id = generation_queue.submit_edit(edital, previous_values, clausulas_data, clausulas_digest,
+                                                  edital.creator.username)
+
+            if job_id is None:
+                flash('Edital atualizado e arquivo DOCX re-gerado com sucesso!', 'success')
+            else:
+                flash(f'Edital atualizado. O arquivo DOCX está sendo re-gerado (job {job_id}).', 'success')
+            return redirect(url_for('editais.dashboard'))
+
+        except FileNotFoundError:
+            flash(f'Arquivo de template não encontrado: {modelo_edital_path}', 'danger')
+        except Exception as e:
+            flash(f'Erro ao atualizar o edital e re-gerar o arquivo: {str(e)}', 'danger')
+            current_app.logger.error(f"Erro na atualização e re-geração do edital: {e}", exc_info=True)
+
+    elif request.method == 'GET':
+        # Pré-preenche os campos do formulário com os dados do edital existente
+        for field in EDITAL_FORM_FIELDS:
+            getattr(form, field).data = getattr(edital, field)
+
+    return render_template('generate_edital.html', form=form, clausulas=clausulas_data, edital_id=edital_id)
+
+
+@bp.route('/preview_edital', methods=['POST'])
+@login_required
+def preview_edital():
+    # Pré-visualização em HTML enquanto o formulário é preenchido: nada é gravado no banco nem em disco.
+    # Cada página do formulário manda o seu preview_id; só voltam as seções que mudaram desde a chamada anterior
+    from preview import get_preview_template, preview_sessions
+    started = time.perf_counter()
+    row = {field: request.form.get(field) for field in EDITAL_FORM_FIELDS}
+    try:
+        template = get_preview_template(current_app.config['MODELO_EDITAL_PATH'])
+        clausulas_data = clausulas_store.get()
+    except (FileNotFoundError, ClausulasError) as e:
+        return jsonify(erro=str(e)), 503
+    edital = Edital(**row_to_values(row, partial=True, clausulas_data=clausulas_data))
+    replacements = build_replacements(edital, clausulas_data, current_user.username)
+
+    state_key = f"{current_user.id}:{request.form.get('preview_id', '')}"
+    previous = None if request.form.get('completo') else preview_sessions.get(state_key)
+    state, changed = template.render(replacements, previous)
+    preview_sessions.put(state_key, state)
+    if request.args.get('formato') == 'html':
+        return ''.join(state.sections)
+    return jsonify(
+        total=len(state.sections),
+        secoes={index: state.sections[index] for index in changed},
+        ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+@bp.route('/edital_status/<job_id>')
+@login_required
+def edital_status(job_id):
+    # Situação de um job de geração, consultada pelo painel enquanto o arquivo não fica pronto
+    edital = Edital.query.filter_by(job_id=job_id).first_or_404()
+    if edital.creator_id != current_user.id and not current_user.is_admin():
+        abort(403)
+    return jsonify(
+        job_id=job_id,
+        edital_id=edital.id,
+        status=edital.status,
+        storage_key=edital.storage_key if edital.status == STATUS_CONCLUIDO else None,
+        download_url=url_for('editais.download_edital', key=edital.storage_key) if edital.status == STATUS_CONCLUIDO and edital.storage_key else None,
+        erro=edital.status_message if edital.status == STATUS_ERRO else None,
+    )
+
+@bp.route('/download_edital/<key>')
+@login_required
+def download_edital(key):
+    edital = edital_para_download(key)
+    if not edital:
+        return redirect(url_for('editais.dashboard'))
+
+    download_name = f"Edital_{edital.form_name.replace(' ', '_').replace('/', '_')}.docx"
+    storage = get_storage()
+    if storage.exists(key):
+        return storage.send(key, download_name, mimetype=DOCX_MIMETYPE)
+    elif current_app.config['RENDER_ON_DOWNLOAD']:
+        try:
+            return render_edital_download(edital, download_name)
+        except (FileNotFoundError, ClausulasError) as e:
+            flash(f'Não foi possível gerar o edital: {str(e)}', 'danger')
+            return redirect(url_for('editais.dashboard'))
+    else:
+        flash('Arquivo não encontrado no sistema de arquivos.', 'danger')
+        return redirect(url_for('editais.dashboard'))
+
+@bp.route('/download_edital/<key>/pdf')
+@login_required
+def download_edital_pdf(key):
+    edital = edital_para_download(key)
+    if not edital:
+        return redirect(url_for('editais.dashboard'))
+
+    storage = get_storage()
+    try:
+        if storage.exists(key):
+            docx_data = storage.read(key)
+        elif current_app.config['RENDER_ON_DOWNLOAD']:
+            from docx_render import get_compiled_template
+            docx_data = render_edital_bytes(get_compiled_template(current_app.config['MODELO_EDITAL_PATH']),
+                                            build_replacements(edital, clausulas_store.get(), edital.creator.username))
+        else:
+            flash('Arquivo não encontrado no sistema de arquivos.', 'danger')
+            return redirect(url_for('editais.dashboard'))
+        digest, pdf_data = pdf_converter.convert(docx_data)
+    except PdfConversionBusy:
+        flash('Muitas conversões para PDF no momento. Tente novamente em alguns segundos.', 'warning')
+        return redirect(url_for('editais.dashboard'))
+    except (FileNotFoundError, ClausulasError, PdfConversionError) as e:
+        current_app.logger.error(f"Erro ao converter o edital {edital.id} para PDF: {e}")
+        flash(f'Não foi possível gerar o PDF: {str(e)}', 'danger')
+        return redirect(url_for('editais.dashboard'))
+
+    download_name = f"Edital_{edital.form_name.replace(' ', '_').replace('/', '_')}.pdf"
+    return send_file(io.BytesIO(pdf_data), as_attachment=True, download_name=download_name,
+                     mimetype='application/pdf', etag=digest)
+
+def edital_para_download(key):
+    # Permite que o criador OU um admin baixe o edital
+    # Editais idênticos compartilham o mesmo arquivo, então procura um edital do usuário com essa chave
+    query = Edital.query.filter_by(storage_key=key)
+    if not current_user.is_admin():
+        query = query.filter_by(creator_id=current_user.id)
+    edital = query.first()
+    if not edital:
+        if Edital.query.filter_by(storage_key=key).first():
+            flash('Você não tem permissão para baixar este edital.', 'danger')
+        else:
+            flash('Edital não encontrado no banco de dados.', 'danger')
+    return edital
+
+def render_edital_download(edital, download_name):
+    # Modo RENDER_ON_DOWNLOAD: renderiza em memória a partir dos campos salvos.
+    # O ETag é a chave de renderização, então downloads repetidos recebem 304 sem renderizar
+    from docx_render import get_compiled_template
+    with metrics.stage('clause_load'):
+        clausulas_snapshot = clausulas_store.snapshot()
+    template = get_compiled_template(current_app.config['MODELO_EDITAL_PATH'])
+    replacements = build_replacements(edital, clausulas_snapshot.data, edital.creator.username)
+    key = render_key(template.digest, clausulas_snapshot.digest, replacements)
+    last_modified = max(
+        edital.data_atualizacao or edital.data_criacao,
+        datetime.utcfromtimestamp(max(template.mtime, clausulas_snapshot.mtime)),
+    ).replace(microsecond=0)
+
+    if not is_resource_modified(request.environ, etag=key, last_modified=last_modified):
+        response = current_app.response_class(status=304)
+        response.set_etag(key)
+        response.last_modified = last_modified
+        return response
+
+    data = rendered_documents.get(key)
+    if data is None:
+        data = render_edital_bytes(template, replacements)
+        rendered_documents.put(key, data)
+    return send_file(io.BytesIO(data), as_attachment=True, download_name=download_name,
+                     mimetype=DOCX_MIMETYPE, etag=key, last_modified=last_modified)
+
+def render_edital_bytes(template, replacements):
+    timer = StageTimer()
+    document, report = template.render(replacements, timer=timer)
+    buffer = io.BytesIO()
+    with timer.stage('save'):
+        document.save(buffer)
+    data = buffer.getvalue()
+    metrics.observe_render(RenderResult(sorted(report.missing), timer.stages, len(data), 'memoria'))
+    return data
+
+@bp.route('/delete_edital/<int:edital_id>')
+@login_required
+def delete_edital(edital_id):
+    edital = Edital.query.get_or_404(edital_id)
+    # Permite que o criador OU um admin delete
+    if edital.creator_id != current_user.id and not current_user.is_admin():
+        flash('Você não tem permissão para excluir este edital.', 'danger')
+        return redirect(url_for('editais.dashboard'))
+
+    key = edital.storage_key
+    try:
+        db.session.delete(edital)
+        db.session.commit()
+        # O arquivo é removido em segundo plano (e mantido se outro edital idêntico o compartilha)
+        file_reaper.enqueue(key)
+        flash('Edital excluído com sucesso do banco de dados.', 'success')
+    except Exception as e:
+        flash(f'Erro ao excluir edital do banco de dados: {str(e)}', 'danger')
+        db.session.rollback() # Em caso de erro, desfaz a transação
+    return redirect(url_for('editais.dashboard'))
@@ -1,4 +1,7 @@
+import os
+
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_moment import Moment
@@ -6,12 +9,14 @@ from flask_wtf.csrf import CSRFProtect
 
 # Inicializar extensões
 db = SQLAlchemy()
+# Migrações do esquema (flask db upgrade); a pasta fica ao lado do código, não do diretório atual
+migrate = Migrate(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 moment = Moment()
 csrf = CSRFProtect()
 
 # Configurar login manager
-login_manager.login_view = 'login'
+login_manager.login_view = 'auth.login'
 login_manager.login_message = 'Por favor, faça login para acessar esta página.'
 login_manager.login_message_category = 'info'
@@ -0,0 +1,213 @@
+import heapq
+import logging
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from itertools import islice
+
+from extensions import db
+from models import Edital
+from storage import open_storage
+
+logger = logging.getLogger(__name__)
+
+# Resultado de uma coleta: arquivos examinados, órfãos removidos/em quarentena, bytes liberados e erros
+GCResult = namedtuple('GCResult', ['scanned', 'orphans', 'bytes', 'errors'])
+
+
+def _referenced(keys):
+    """Quais destas chaves ainda são a storage_key de algum edital."""
+    return set(db.session.scalars(
+        db.select(Edital.storage_key).where(Edital.storage_key.in_(keys)).distinct()
+    ))
+
+
+def _dispose(storage, key, quarantine=None):
+    """Remove a chave do armazenamento (ou move para a quarentena)."""
+    if quarantine:
+        storage.quarantine(key, quarantine)
+    else:
+        storage.delete(key)
+
+
+def collect_orphans(storage, batch_size=500, min_age=600, quarantine=None, dry_run=False):
+    """Remove do armazenamento os documentos que nenhum edital referencia.
+
+    O armazenamento é listado em streaming e comparado com o banco em lotes
+    de `batch_size` chaves, sem carregar todos os editais. Documentos
+    modificados há menos de `min_age` segundos são ignorados: podem ser de
+    uma geração cujo resultado ainda não foi gravado no banco. Precisa de
+    app context.
+    """
+    scanned = orphans = reclaimed = errors = 0
+    now = time.time()
+    candidates = (obj for obj in storage.iter_objects() if now - obj.mtime >= min_age)
+    while True:
+        batch = list(islice(candidates, batch_size))
+        if not batch:
+            break
+        scanned += len(batch)
+        referenced = _referenced([obj.key for obj in batch])
+        db.session.rollback() # não segura a transação (e o snapshot) durante a remoção dos arquivos
+        for obj in batch:
+            if obj.key in referenced:
+                continue
+            orphans += 1
+            if dry_run:
+                reclaimed += obj.size
+                continue
+            try:
+                _dispose(storage, obj.key, quarantine)
+                reclaimed += obj.size
+            except FileNotFoundError:
+                pass # removido por outro processo
+            except Exception as e:
+                errors += 1
+                logger.error(f"Erro ao remover o documento órfão {obj.key}: {e}")
+    return GCResult(scanned, orphans, reclaimed, errors)
+
+
+class FileReaper:
+    """Remove arquivos gerados em uma thread de segundo plano.
+
+    As rotas apenas enfileiram as chaves dos arquivos que deixaram de ser
+    usados (depois do commit); a thread confirma que nenhum edital ainda os
+    referencia e os remove. Os modificados há menos de FILE_GC_MIN_AGE
+    segundos podem estar sendo reaproveitados por uma geração ainda não
+    gravada: voltam a ser verificados quando completarem essa idade. Com
+    FILE_GC_INTERVAL > 0 a mesma thread roda collect_orphans periodicamente.
+    Arquivos perdidos na fila (processo encerrado) são recolhidos por
+    `flask gc-files`.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = queue.Queue()
+        self._delayed = [] # heap de (instante monotônico, sequência, chave) das chaves recentes
+        self._sequence = 0
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('FILE_GC_INTERVAL', 0)
+        app.config.setdefault('FILE_GC_MIN_AGE', 600)
+        app.config.setdefault('FILE_GC_BATCH', 500)
+        app.config.setdefault('FILE_GC_QUARANTINE', None)
+        app.extensions['file_reaper'] = self
+        self.app = app
+        if app.config['FILE_GC_INTERVAL']:
+            # A coleta periódica começa na primeira requisição de cada worker (não nos comandos flask)
+            app.before_request(self._ensure_thread)
+
+    def enqueue(self, *keys):
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        self._ensure_thread()
+        self._queue.put(keys)
+
+    def _ensure_thread(self):
+        # Uma thread por processo (os workers do gunicorn não herdam threads do fork)
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid() or not self._thread.is_alive():
+                if self._thread_pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._delayed = []
+                self._thread = threading.Thread(target=self._run, name='file-reaper', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        interval = self.app.config['FILE_GC_INTERVAL'] or None
+        next_gc = time.monotonic() + interval if interval else None
+        while True:
+            deadlines = [due for due in (next_gc, self._delayed[0][0] if self._delayed else None) if due]
+            timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            try:
+                keys = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                keys = None
+            # As chaves vencidas só saem do heap depois de verificadas (join não retorna antes)
+            now = time.monotonic()
+            due_keys = [key for due, _, key in self._delayed if due <= now]
+            try:
+                with self.app.app_context():
+                    if keys or due_keys:
+                        self._delay(self._remove_unreferenced((keys or []) + due_keys))
+                    if next_gc and time.monotonic() >= next_gc:
+                        self.collect()
+                        next_gc = time.monotonic() + interval
+            except Exception as e:
+                logger.error(f"Erro na remoção de arquivos em segundo plano: {e}", exc_info=True)
+            finally:
+                if due_keys:
+                    # Verificadas (ou, após um erro, deixadas para `flask gc-files`, como as da fila)
+                    self._drop_due(now)
+                if keys is not None:
+                    self._queue.task_done()
+
+    def _drop_due(self, now):
+        self._delayed = [entry for entry in self._delayed if entry[0] > now]
+        heapq.heapify(self._delayed)
+
+    def _delay(self, young):
+        """Agenda uma nova verificação das chaves recentes, quando completarem FILE_GC_MIN_AGE."""
+        for key, wait in young.items():
+            self._sequence += 1
+            heapq.heappush(self._delayed, (time.monotonic() + wait, self._sequence, key))
+
+    def _remove_unreferenced(self, keys):
+        """Remove as chaves sem edital; devolve as recentes demais com os segundos que faltam."""
+        referenced = _referenced(keys)
+        db.session.rollback()
+        storage = open_storage(self.app.config['STORAGE_URL'])
+        min_age = self.app.config['FILE_GC_MIN_AGE']
+        young = {}
+        for key in set(keys) - referenced:
+            # Mesma regra do collect_orphans: um arquivo modificado há pouco pode ter sido
+            # reaproveitado (touch) por uma geração que ainda não gravou a storage_key no banco
+            mtime = storage.mtime(key)
+            if mtime is None:
+                continue
+            age = time.time() - mtime
+            if age < min_age:
+                logger.debug(f"Documento {key} usado há {age:.0f}s; nova verificação em {min_age - age:.0f}s")
+                young[key] = min_age - age
+                continue
+            try:
+                _dispose(storage, key, self.app.config['FILE_GC_QUARANTINE'])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Erro ao remover o documento {key}: {e}")
+        return young
+
+    def collect(self, **options):
+        """Roda collect_orphans com as opções da configuração (sobrescritas por `options`)."""
+        config = self.app.config
+        options.setdefault('batch_size', config['FILE_GC_BATCH'])
+        options.setdefault('min_age', config['FILE_GC_MIN_AGE'])
+        options.setdefault('quarantine', config['FILE_GC_QUARANTINE'])
+        result = collect_orphans(open_storage(config['STORAGE_URL']), **options)
+        if result.orphans:
+            logger.info(f"Coleta de arquivos: {result.orphans} órfãos, {result.bytes} bytes liberados")
+        return result
+
+    def join(self, timeout=None):
+        """Espera a fila esvaziar, inclusive as chaves adiadas (usado em testes e comandos)."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self._queue.unfinished_tasks or self._delayed:
+            if deadline and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+file_reaper = FileReaper()
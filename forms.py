@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, PasswordField, SelectField, FileField, SubmitField
-from wtforms.validators import DataRequired, Email, Length, EqualTo
+from wtforms import StringField, TextAreaField, PasswordField, SelectField, SubmitField, BooleanField, DateField
+from wtforms.validators import DataRequired, Email, Length, EqualTo, Optional
 
 class LoginForm(FlaskForm):
     username = StringField('Usuário', validators=[DataRequired()])
@@ -15,24 +15,101 @@ class RegisterForm(FlaskForm):
     role = SelectField('Função', choices=[('user', 'Usuário'), ('admin', 'Administrador')], default='user')
     submit = SubmitField('Registrar')
 
+SIM_NAO = [('sim', 'Sim'), ('nao', 'Não')]
+
+# Campos de escolha cujas opções são as chaves de uma seção do clausulas.json (ver EditalForm.carregar_opcoes)
+OPCOES_CLAUSULAS = {
+    'permite_visita_tecnica': 'permite_visita_tecnica',
+    'criterio_julgamento': 'criterio_julgamento',
+    'aplicacao_criterio': 'aplicacao_criterio',
+    'modo_disputa': 'modo_disputa',
+    'participacao_consorcio': 'participacao_consorcio',
+    'diferencial_aliquota': 'diferencial_aliquota',
+    'regularidade_fiscal': 'regularidade_fiscal',
+    'qualificacao_tecnica': 'qualificacao_tecnica',
+    'atestados_qualificacao_tecnica': 'atestados_qualificacao_tecnica',
+    'qualificacao_economico_financeira': 'qualificacao_economico_financeira',
+    'garantia_sim_nao': 'garantia_execucao',
+    'subcontratacao': 'subcontratacao',
+    'permitido_cooperativa': 'permitido_cooperativa',
+    'regime_empreitada': 'regime_empreitada_contrato',
+    'prazos_execucao': 'prazos_execucao_contrato',
+    'tipo_instrumento_contratual': 'tipo_instrumento_contratual_contrato',
+    'prorrogacao_contrato': 'prorrogacao_contrato_contrato',
+    'medicao_servicos': 'medicao_servicos_contrato',
+    'fiscalizacao_inspecao': 'fiscalizacao_inspecao_contrato',
+    'consequencias_rescisao': 'consequencias_rescisao_contrato',
+    'suspensao_temporaria_servicos': 'suspensao_temporaria_servicos_contrato',
+    'aceitacao_servicos': 'aceitacao_servicos_contrato',
+    'garantia_servicos': 'garantia_servicos_contrato',
+}
+
 class EditalForm(FlaskForm):
-    titulo = StringField('Título do Edital', validators=[DataRequired()])
-    numero = StringField('Número do Edital', validators=[DataRequired()])
-    orgao = StringField('Órgão', validators=[DataRequired()])
-    modalidade = SelectField('Modalidade', choices=[
-        ('pregao_eletronico', 'Pregão Eletrônico'),
-        ('concorrencia', 'Concorrência'),
-        ('tomada_precos', 'Tomada de Preços'),
-        ('convite', 'Convite'),
-        ('concurso', 'Concurso'),
-        ('leilao', 'Leilão')
-    ], validators=[DataRequired()])
-    objeto = TextAreaField('Objeto', validators=[DataRequired()])
-    valor_estimado = StringField('Valor Estimado')
-    data_abertura = StringField('Data de Abertura', validators=[DataRequired()])
-    hora_abertura = StringField('Hora de Abertura', validators=[DataRequired()])
-    local_abertura = TextAreaField('Local de Abertura')
-    endereco_retirada = TextAreaField('Endereço para Retirada do Edital')
-    informacoes_adicionais = TextAreaField('Informações Adicionais')
-    arquivo_anexo = FileField('Arquivo Anexo')
+    # Informações básicas (mesmos nomes das colunas do Edital, ver EDITAL_FORM_FIELDS)
+    form_name = StringField('Nome do Formulário', validators=[DataRequired(), Length(max=200)])
+    numero_pregao = StringField('Número do Pregão', validators=[Optional(), Length(max=50)])
+    objeto_servicos = TextAreaField('Objeto dos Serviços')
+    compras_gov_numero = StringField('Número no Compras.gov', validators=[Optional(), Length(max=50)])
+    valor_total_orcamento = StringField('Valor Total do Orçamento', validators=[Optional(), Length(max=50)])
+    data_base_orcamento = DateField('Data-base do Orçamento', validators=[Optional()])
+    data_sessao = DateField('Data da Sessão', validators=[Optional()])
+    hora_sessao = StringField('Hora da Sessão', validators=[Optional(), Length(max=10)])
+    data_disponibilidade = DateField('Data de Disponibilidade do Edital', validators=[Optional()])
+    email_contato1 = StringField('E-mail de Contato 1', validators=[Optional(), Length(max=120)])
+    email_contato2 = StringField('E-mail de Contato 2', validators=[Optional(), Length(max=120)])
+    orcamento_sigiloso = SelectField('Orçamento Sigiloso', choices=SIM_NAO, default='nao')
+
+    # Cláusulas do edital
+    permite_visita_tecnica = SelectField('Visita Técnica')
+    criterio_julgamento = SelectField('Critério de Julgamento')
+    aplicacao_criterio = SelectField('Aplicação do Critério')
+    modo_disputa = SelectField('Modo de Disputa')
+    tipo_participacao = SelectField('Tipo de Participação', choices=[
+        ('ampla', 'Ampla participação'),
+        ('exclusiva', 'Exclusiva para ME/EPP/cooperativas'),
+        ('micro', 'Microempresas'),
+    ])
+    participacao_consorcio = SelectField('Participação de Consórcio')
+    diferencial_aliquota = SelectField('Diferencial de Alíquota')
+    regularidade_fiscal = SelectField('Regularidade Fiscal')
+    qualificacao_tecnica = SelectField('Qualificação Técnica')
+    atestados_qualificacao_tecnica = SelectField('Atestados de Qualificação Técnica')
+    qualificacao_economico_financeira = SelectField('Qualificação Econômico-Financeira')
+    servico_continuo = SelectField('Serviço Contínuo', choices=SIM_NAO, default='nao')
+    garantia_sim_nao = SelectField('Garantia de Execução')
+    subcontratacao = SelectField('Subcontratação')
+    permitido_cooperativa = SelectField('Permitida Participação de Cooperativas')
+    cad_madeira = SelectField('CADMADEIRA', choices=SIM_NAO, default='nao')
+    documento_tecnico_sim_nao = SelectField('Possui Documento Técnico', choices=SIM_NAO, default='nao')
+    documento_tecnico_nome = StringField('Nome do Documento Técnico', validators=[Optional(), Length(max=200)])
+
+    # Anexo 1
+    numero_licitacao_anexo1 = StringField('Número da Licitação', validators=[Optional(), Length(max=50)])
+    objeto_licitacao_anexo1 = TextAreaField('Objeto da Licitação')
+    incluir_rec_judicial = BooleanField('Incluir declaração de recuperação judicial')
+    incluir_rec_extrajudicial = BooleanField('Incluir declaração de recuperação extrajudicial')
+    incluir_me_epp = BooleanField('Incluir declaração de ME/EPP')
+    incluir_cadmadeira = BooleanField('Incluir declaração do CADMADEIRA')
+
+    # Cláusulas contratuais específicas
+    regime_empreitada = SelectField('Regime de Empreitada')
+    prazos_execucao = SelectField('Prazos de Execução')
+    tipo_instrumento_contratual = SelectField('Tipo de Instrumento Contratual')
+    prorrogacao_contrato = SelectField('Prorrogação do Contrato')
+    medicao_servicos = SelectField('Medição dos Serviços')
+    fiscalizacao_inspecao = SelectField('Fiscalização e Inspeção')
+    consequencias_rescisao = SelectField('Consequências da Rescisão')
+    suspensao_temporaria_servicos = SelectField('Suspensão Temporária dos Serviços')
+    aceitacao_servicos = SelectField('Aceitação dos Serviços')
+    garantia_servicos = SelectField('Garantia dos Serviços')
+
     submit = SubmitField('Gerar Edital')
+
+    def carregar_opcoes(self, clausulas_data):
+        """Preenche as opções dos campos de cláusula com as chaves do clausulas.json.
+
+        Chamar antes de validar: o SelectField só aceita as opções carregadas aqui.
+        """
+        for field_name, section in OPCOES_CLAUSULAS.items():
+            options = clausulas_data.get(section) or {}
+            getattr(self, field_name).choices = [('', '---')] + [(key, key.replace('_', ' ').capitalize()) for key in options]
@@ -0,0 +1,272 @@
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from extensions import db
+from models import Edital, STATUS_PENDENTE, STATUS_CONCLUIDO, STATUS_ERRO
+from render_cache import render_key
+from file_gc import file_reaper
+from storage import document_key, open_storage
+from replacements import build_replacements, placeholders_afetados
+from metrics import metrics, RenderResult, StageTimer
+
+logger = logging.getLogger(__name__)
+
+# docx_render (python-docx + lxml) é importado dentro das funções: o processo só carrega a
+# pilha DOCX quando renderiza algo, não na importação do app (inicialização mais rápida)
+
+# Entradas de uma geração, guardadas pela chave do arquivo para as edições seguintes (ver submit_edit)
+RenderInputs = namedtuple('RenderInputs', ['template_digest', 'clausulas_digest', 'username', 'replacements'])
+RENDER_INPUTS_SIZE = 1024
+
+
+def render_edital_file(template_path, replacements, storage_url, key):
+    """Executado em um processo do pool: renderiza o modelo e grava o .docx no armazenamento.
+
+    Cada processo mantém seu próprio cache do modelo compilado e sua conexão
+    com o armazenamento. Retorna um RenderResult com os placeholders do
+    modelo que ficaram sem valor, a duração de cada etapa e o tamanho do arquivo.
+    """
+    from docx_render import get_compiled_template
+
+    timer = StageTimer()
+    with timer.stage('template_open'):
+        template = get_compiled_template(template_path)
+    document, report = template.render(replacements, timer=timer)
+    sizes = []
+
+    def save(f):
+        document.save(f)
+        sizes.append(f.tell())
+
+    # Gravação atômica: jobs idênticos podem gerar a mesma chave ao mesmo tempo
+    with timer.stage('save'):
+        open_storage(storage_url).write(key, save)
+    return RenderResult(sorted(report.missing), timer.stages, sizes[0] if sizes else None, 'completo')
+
+
+def patch_edital_file(template_path, replacements, placeholders, storage_url, old_key, key):
+    """Executado em um processo do pool: atualiza o .docx anterior do edital só nos
+    parágrafos dos placeholders alterados e grava o resultado em `key`.
+
+    Se o arquivo anterior não existe mais (ou não corresponde ao modelo), renderiza tudo.
+    """
+    from docx_render import get_compiled_template
+
+    storage = open_storage(storage_url)
+    timer = StageTimer()
+    try:
+        with timer.stage('template_open'):
+            template = get_compiled_template(template_path, backend='docx')
+            rendered = storage.read(old_key)
+        with timer.stage('substitution'):
+            data, missing = template.patch(rendered, replacements, placeholders)
+    except (FileNotFoundError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logger.warning(f"Não foi possível atualizar {old_key}, renderizando o documento inteiro: {e}")
+        return render_edital_file(template_path, replacements, storage_url, key)
+    with timer.stage('save'):
+        storage.write(key, lambda f: f.write(data))
+    return RenderResult(sorted(missing), timer.stages, len(data), 'parcial')
+
+
+def _init_worker(log_level):
+    # Processos do pool (spawn) não herdam a configuração de log do worker web
+    logging.basicConfig(level=log_level)
+
+
+class GenerationQueue:
+    """Fila de geração dos arquivos .docx em um pool de processos local.
+
+    A rota grava o edital com status 'pendente' e volta imediatamente; quando
+    o processo termina, o edital recebe a storage_key e o status
+    'concluido' (ou 'erro'). Com GENERATION_WORKERS = 0 a geração roda na
+    própria requisição (útil em desenvolvimento).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._inputs = OrderedDict()
+        self._inputs_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('GENERATION_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('RENDER_ON_DOWNLOAD', False)
+        app.extensions['generation_queue'] = self
+        self.app = app
+
+    def _get_executor(self):
+        # O pool é criado sob demanda em cada worker do gunicorn (nunca herdado via fork)
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.app.config['GENERATION_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(logging.getLogger().getEffectiveLevel(),),
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def submit(self, edital, replacements, clausulas_digest, username=None, changed=None):
+        """Agenda a geração do .docx do edital e retorna o id do job.
+
+        A chave do arquivo é o hash das entradas (modelo, cláusulas e
+        substituições). Se essa chave já existe, o arquivo é reaproveitado sem
+        renderizar e o retorno é None. Com RENDER_ON_DOWNLOAD nada é
+        renderizado aqui: o documento é gerado em memória no download.
+        Com `changed` (placeholders alterados, ver submit_edit) o job parte do
+        arquivo atual do edital em vez de renderizar o modelo inteiro.
+        """
+        from docx_render import get_compiled_template
+
+        template_path = self.app.config['MODELO_EDITAL_PATH']
+        storage_url = self.app.config['STORAGE_URL']
+        storage = open_storage(storage_url)
+        template_digest = get_compiled_template(template_path).digest
+        key = document_key(render_key(template_digest, clausulas_digest, replacements))
+        old_key = edital.storage_key
+        if username is not None:
+            self._remember(key, RenderInputs(template_digest, clausulas_digest, username, dict(replacements)))
+
+        # touch renova a data de modificação antes de confirmar que o arquivo existe:
+        # a coleta de órfãos e o file_reaper não removem arquivos recém-usados (FILE_GC_MIN_AGE)
+        if self.app.config['RENDER_ON_DOWNLOAD'] or storage.touch(key):
+            edital.job_id = None
+            edital.status = STATUS_CONCLUIDO
+            edital.status_message = None
+            edital.storage_key = key
+            with metrics.stage('db_commit'):
+                db.session.commit()
+            metrics.jobs.labels('cache').inc()
+            self._release(old_key, key)
+            return None
+
+        job_id = uuid.uuid4().hex
+        edital.job_id = job_id
+        edital.status = STATUS_PENDENTE
+        edital.status_message = None
+        with metrics.stage('db_commit'):
+            db.session.commit()
+
+        if changed and old_key:
+            target, args = patch_edital_file, (template_path, dict(replacements), sorted(changed), storage_url, old_key, key)
+        else:
+            target, args = render_edital_file, (template_path, dict(replacements), storage_url, key)
+        job = (edital.id, job_id, key, old_key)
+
+        if not self.app.config['GENERATION_WORKERS']:
+            try:
+                result = target(*args)
+            except Exception as e:
+                self._finish(job, error=e)
+            else:
+                self._finish(job, result=result)
+            return job_id
+
+        future = self._get_executor().submit(target, *args)
+        future.add_done_callback(lambda f: self._on_done(job, f))
+        return job_id
+
+    def submit_edit(self, edital, previous_values, clausulas_data, clausulas_digest, username):
+        """Reagenda a geração depois de uma edição, recalculando só o que mudou.
+
+        `previous_values` são os campos do edital antes da edição. Se as
+        entradas da geração atual do edital estão em memória (mesmo modelo e
+        mesmas cláusulas), só os placeholders que dependem dos campos alterados
+        são recalculados: sem diferença nos valores nada é renderizado (retorno
+        None); com diferença, o job atualiza apenas esses parágrafos do .docx
+        atual. Sem essas entradas (outro worker, processo reiniciado, modelo ou
+        cláusulas alterados) a geração é completa.
+        """
+        from docx_render import get_compiled_template
+
+        previous = self._recall(edital.storage_key) if edital.status == STATUS_CONCLUIDO else None
+        template_digest = get_compiled_template(self.app.config['MODELO_EDITAL_PATH']).digest
+        if previous is None or previous.template_digest != template_digest or previous.clausulas_digest != clausulas_digest:
+            replacements = build_replacements(edital, clausulas_data, username)
+            return self.submit(edital, replacements, clausulas_digest, username=username)
+
+        changed_fields = {field for field, value in previous_values.items() if getattr(edital, field) != value}
+        if username != previous.username:
+            changed_fields.add('username')
+        affected = placeholders_afetados(changed_fields)
+        replacements = dict(previous.replacements)
+        replacements.update(build_replacements(edital, clausulas_data, username, affected))
+        changed = {placeholder for placeholder in affected if replacements[placeholder] != previous.replacements.get(placeholder)}
+        if not changed:
+            # Nenhum valor do documento mudou: o arquivo atual continua valendo
+            db.session.commit()
+            return None
+        return self.submit(edital, replacements, clausulas_digest, username=username, changed=changed)
+
+    def _remember(self, key, inputs):
+        with self._inputs_lock:
+            self._inputs[key] = inputs
+            self._inputs.move_to_end(key)
+            while len(self._inputs) > RENDER_INPUTS_SIZE:
+                self._inputs.popitem(last=False)
+
+    def _recall(self, key):
+        if not key:
+            return None
+        with self._inputs_lock:
+            return self._inputs.get(key)
+
+    def _on_done(self, job, future):
+        error = future.exception()
+        try:
+            if error is not None:
+                self._finish(job, error=error)
+            else:
+                self._finish(job, result=future.result())
+        except Exception as e:
+            logger.error(f"Erro ao registrar o resultado do job {job[1]}: {e}", exc_info=True)
+
+    def _finish(self, job, result=None, error=None):
+        edital_id, job_id, key, old_key = job
+        if error is not None:
+            metrics.jobs.labels('erro').inc()
+        else:
+            metrics.observe_render(result)
+        with self.app.app_context():
+            edital = db.session.get(Edital, edital_id)
+            if edital is None or edital.job_id != job_id:
+                # Edital excluído ou com um job mais recente: o arquivo fica no cache de renderização
+                return
+            if error is not None:
+                logger.error(f"Erro na geração do edital {edital_id} (job {job_id}): {error}")
+                edital.status = STATUS_ERRO
+                edital.status_message = str(error)[:500]
+            else:
+                if result.missing:
+                    logger.warning(f"Placeholders do modelo sem valor: {result.missing}")
+                edital.status = STATUS_CONCLUIDO
+                edital.storage_key = key
+            with metrics.stage('db_commit'):
+                db.session.commit()
+            if error is None:
+                self._release(old_key, key)
+
+    def _release(self, old_key, new_key):
+        """Agenda a remoção do arquivo anterior do edital (mantido se outro edital o compartilha)."""
+        if old_key and old_key != new_key:
+            file_reaper.enqueue(old_key)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+generation_queue = GenerationQueue()
@@ -0,0 +1,101 @@
+# Configuração do gunicorn em produção (lida automaticamente: gunicorn app:app).
+#
+# O app é importado uma vez no master (preload) e os caches do processo (modelo
+# compilado, cláusulas, templates Jinja) são carregados antes do fork, então os
+# workers os compartilham por copy-on-write. Para medir a memória por worker:
+#     flask --app app worker-memory <pid do master>
+# com GUNICORN_PRELOAD=1 (padrão) e GUNICORN_PRELOAD=0.
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Um worker por núcleo: a renderização pesada roda no pool de geração de cada worker.
+# Threads (gthread) para as esperas de E/S: banco, S3, conversão para PDF, bcrypt
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, cpus)))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Cada worker tem seu próprio pool de geração: divide os núcleos entre eles em vez
+# de criar cpus x workers processos de renderização
+os.environ.setdefault('GENERATION_WORKERS', str(max(1, cpus // workers)))
+# O pool de conexões do banco de cada worker é dimensionado a partir destes (ver db_engine.py)
+os.environ.setdefault('WEB_CONCURRENCY', str(workers))
+os.environ.setdefault('GUNICORN_THREADS', str(threads))
+
+# Métricas do Prometheus em modo multiprocesso: cada worker grava as suas em arquivos
+# desta pasta e o /metrics soma as de todos (ver metrics.py). Precisa estar no
+# ambiente antes do import do prometheus_client, que acontece no preload do app
+metrics_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(metrics_dir, f"edital_metrics_{os.environ.get('PORT', '8000')}"))
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'sim')
+
+# Reinicia cada worker depois de N requisições (com variação, para não reiniciarem juntos):
+# contém vazamentos de memória de bibliotecas nativas (lxml, LibreOffice via UNO)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Conversões para PDF podem levar até PDF_TIMEOUT segundos
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Arquivo de heartbeat dos workers em memória (um disco lento não derruba workers ociosos)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+def on_starting(server):
+    # Arquivos de uma execução anterior somariam valores antigos aos contadores
+    for path in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+        os.remove(path)
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from app import warm_caches
+    warm_caches()
+    # Move os objetos já criados para uma geração que o coletor de lixo não percorre:
+    # sem isso, a coleta nos workers toca (e copia) as páginas compartilhadas
+    gc.freeze()
+    server.log.info("Caches aquecidos antes do fork dos workers")
+
+
+def post_worker_init(worker):
+    # Sem preload cada worker importa o app sozinho: aquece antes da primeira requisição
+    if not preload_app:
+        from app import warm_caches
+        warm_caches()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # Conexões abertas no master não podem ser usadas pelos workers
+    from app import app
+    from extensions import db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    from generation_queue import generation_queue
+    generation_queue.shutdown()
+
+
+def child_exit(server, worker):
+    # Os gauges por worker (liveall) do worker encerrado deixam de ser exportados
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,182 @@
+import hmac
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from flask import Response, abort, current_app, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Limites dos histogramas: segundos (latência e etapas) e bytes (tamanho dos .docx)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+
+# Intervalo mínimo (s) entre atualizações dos gauges de add_stats feitas ao fim das requisições
+STATS_REFRESH_SECONDS = 10
+
+# Resultado de um job de geração: placeholders sem valor, duração de cada etapa (s),
+# tamanho do .docx (bytes) e modo: 'completo' ou 'parcial' (generation_queue) ou 'memoria'
+# (renderização no download, RENDER_ON_DOWNLOAD)
+RenderResult = namedtuple('RenderResult', ['missing', 'stages', 'size', 'mode'])
+
+
+def multiprocess_dir():
+    """Pasta do modo multiprocesso do prometheus_client (definida no gunicorn.conf.py), ou None."""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+
+class StageTimer:
+    """Duração de cada etapa de uma geração, acumulada em um dicionário.
+
+    Roda também nos processos do pool de geração, que não enxergam as
+    métricas do worker web: as durações voltam no RenderResult e são
+    registradas por Metrics.observe_render.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+
+class Metrics:
+    """Métricas expostas em /metrics no formato de texto do Prometheus (prometheus_client).
+
+    - latência das requisições por rota, método e status;
+    - tempo de SQL de cada requisição por rota (ver query_guard.py);
+    - duração das etapas da geração (cláusulas, abertura do modelo,
+      substituição, gravação, commit no banco);
+    - tempo de renderização e tamanho dos .docx gerados;
+    - valores de outros componentes registrados com add_stats
+      (conversão para PDF, cache de usuários...), como gauges.
+
+    Com PROMETHEUS_MULTIPROC_DIR (o gunicorn.conf.py define) cada worker grava
+    suas métricas em arquivos dessa pasta e o /metrics de qualquer worker soma
+    contadores e histogramas de todos; os gauges de add_stats saem um por
+    worker vivo, com o rótulo pid. Sem a variável (servidor de desenvolvimento,
+    um processo) os valores ficam na memória do processo.
+    METRICS_TOKEN, se definido, é exigido no cabeçalho Authorization (Bearer).
+    """
+
+    def __init__(self, app=None):
+        # Registro próprio: o /metrics não inclui as métricas padrão do processo Python
+        self.registry = CollectorRegistry()
+        self.request_seconds = Histogram(
+            'edital_http_request_duration_seconds', 'Tempo de resposta das requisições.',
+            ('endpoint', 'method', 'status'), buckets=SECONDS_BUCKETS, registry=self.registry)
+        self.stage_seconds = Histogram(
+            'edital_generation_stage_seconds', 'Duração de cada etapa da geração de editais.', ('stage',),
+            buckets=SECONDS_BUCKETS, registry=self.registry)
+        self.render_seconds = Histogram(
+            'edital_render_duration_seconds', 'Tempo total de renderização de um .docx.', ('mode',),
+            buckets=SECONDS_BUCKETS, registry=self.registry)
+        self.docx_bytes = Histogram(
+            'edital_docx_size_bytes', 'Tamanho dos .docx gerados.', ('mode',),
+            buckets=BYTES_BUCKETS, registry=self.registry)
+        self.sql_seconds = Histogram(
+            'edital_sql_request_seconds', 'Tempo total de SQL por requisição.', ('endpoint',),
+            buckets=SECONDS_BUCKETS, registry=self.registry)
+        self.jobs = Counter('edital_generation_jobs', 'Jobs de geração por resultado (completo, parcial, memoria, cache, erro).',
+                            ('result',), registry=self.registry)
+        self._stats = []
+        self._gauges = {}
+        self._stats_refreshed = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    def add_stats(self, prefix, stats):
+        """Expõe como gauges os valores numéricos de `stats()` (ex.: pdf_converter.stats)."""
+        # Um create_app() por processo normalmente; se houver outro, substitui em vez de repetir os gauges
+        self._stats = [(name, fn) for name, fn in self._stats if name != prefix] + [(prefix, stats)]
+
+    def refresh_stats(self):
+        """Copia os valores atuais de add_stats para os gauges deste processo."""
+        self._stats_refreshed = time.monotonic()
+        for prefix, stats in self._stats:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._gauge(f'{prefix}_{key}').set(value)
+
+    def _gauge(self, name):
+        gauge = self._gauges.get(name)
+        if gauge is None:
+            with self._lock:
+                gauge = self._gauges.get(name)
+                if gauge is None:
+                    # liveall: um valor por worker vivo (rótulo pid); os de workers encerrados somem
+                    gauge = self._gauges[name] = Gauge(name, name.replace('_', ' '), registry=self.registry,
+                                                       multiprocess_mode='liveall')
+        return gauge
+
+    @contextmanager
+    def stage(self, name):
+        """Mede uma etapa da geração executada no próprio worker web."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.labels(name).observe(time.perf_counter() - started)
+
+    def observe_render(self, result):
+        """Registra as etapas, o tempo e o tamanho de um job concluído (ver RenderResult)."""
+        for name, seconds in result.stages.items():
+            self.stage_seconds.labels(name).observe(seconds)
+        self.render_seconds.labels(result.mode).observe(sum(result.stages.values()))
+        if result.size is not None:
+            self.docx_bytes.labels(result.mode).observe(result.size)
+        self.jobs.labels(result.mode).inc()
+
+    @staticmethod
+    def _start_request():
+        g.metrics_started = time.perf_counter()
+
+    def _end_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'nao_encontrado'
+            self.request_seconds.labels(endpoint, request.method, response.status_code).observe(
+                time.perf_counter() - started)
+        # No modo multiprocesso o /metrics é atendido por um worker só: os demais
+        # publicam seus gauges de tempos em tempos, ao fim das requisições
+        if self._stats and time.monotonic() - self._stats_refreshed >= STATS_REFRESH_SECONDS:
+            self.refresh_stats()
+        return response
+
+    def _metrics_view(self):
+        token = current_app.config['METRICS_TOKEN']
+        if token:
+            provided = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(provided.encode(), f'Bearer {token}'.encode()):
+                abort(401)
+        return Response(self.expose(), content_type=CONTENT_TYPE_LATEST)
+
+    def expose(self):
+        self.refresh_stats()
+        if multiprocess_dir():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, multiprocess_dir())
+        else:
+            registry = self.registry
+        return generate_latest(registry)
+
+
+metrics = Metrics()
@@ -0,0 +1,97 @@
+"""esquema inicial (o criado pelo db.create_all antes das migrações)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+Bancos criados antes das migrações já têm estas tabelas e só são marcados com
+esta revisão (ver commands.upgrade_database). O índice de busca não entra aqui:
+search_index.ensure_search_index o cria e preenche no primeiro uso.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('username', sa.String(80), nullable=False, unique=True),
+        sa.Column('email', sa.String(120), nullable=False, unique=True),
+        sa.Column('password', sa.String(200), nullable=False),
+        sa.Column('role', sa.String(20)),
+        sa.Column('created_at', sa.DateTime),
+        sa.Column('version', sa.Integer, nullable=False, server_default='1'),
+    )
+    op.create_table(
+        'edital',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('form_name', sa.String(200), nullable=False),
+        sa.Column('numero_pregao', sa.String(50)),
+        sa.Column('objeto_servicos', sa.Text),
+        sa.Column('compras_gov_numero', sa.String(50)),
+        sa.Column('valor_total_orcamento', sa.String(50)),
+        sa.Column('data_base_orcamento', sa.Date),
+        sa.Column('data_sessao', sa.Date),
+        sa.Column('hora_sessao', sa.String(10)),
+        sa.Column('data_disponibilidade', sa.Date),
+        sa.Column('email_contato1', sa.String(120)),
+        sa.Column('email_contato2', sa.String(120)),
+        sa.Column('orcamento_sigiloso', sa.String(10)),
+        sa.Column('permite_visita_tecnica', sa.String(50)),
+        sa.Column('criterio_julgamento', sa.String(50)),
+        sa.Column('aplicacao_criterio', sa.String(50)),
+        sa.Column('modo_disputa', sa.String(50)),
+        sa.Column('tipo_participacao', sa.String(50)),
+        sa.Column('participacao_consorcio', sa.String(50)),
+        sa.Column('diferencial_aliquota', sa.String(50)),
+        sa.Column('regularidade_fiscal', sa.String(50)),
+        sa.Column('qualificacao_tecnica', sa.String(50)),
+        sa.Column('atestados_qualificacao_tecnica', sa.String(50)),
+        sa.Column('qualificacao_economico_financeira', sa.String(50)),
+        sa.Column('servico_continuo', sa.String(10)),
+        sa.Column('garantia_sim_nao', sa.String(10)),
+        sa.Column('subcontratacao', sa.String(50)),
+        sa.Column('permitido_cooperativa', sa.String(10)),
+        sa.Column('cad_madeira', sa.String(10)),
+        sa.Column('documento_tecnico_sim_nao', sa.String(10)),
+        sa.Column('documento_tecnico_nome', sa.String(200)),
+        sa.Column('numero_licitacao_anexo1', sa.String(50)),
+        sa.Column('objeto_licitacao_anexo1', sa.Text),
+        sa.Column('incluir_rec_judicial', sa.Boolean),
+        sa.Column('incluir_rec_extrajudicial', sa.Boolean),
+        sa.Column('incluir_me_epp', sa.Boolean),
+        sa.Column('incluir_cadmadeira', sa.Boolean),
+        sa.Column('regime_empreitada', sa.String(50)),
+        sa.Column('prazos_execucao', sa.String(50)),
+        sa.Column('tipo_instrumento_contratual', sa.String(50)),
+        sa.Column('prorrogacao_contrato', sa.String(50)),
+        sa.Column('medicao_servicos', sa.String(50)),
+        sa.Column('fiscalizacao_inspecao', sa.String(50)),
+        sa.Column('consequencias_rescisao', sa.String(50)),
+        sa.Column('suspensao_temporaria_servicos', sa.String(50)),
+        sa.Column('aceitacao_servicos', sa.String(50)),
+        sa.Column('garantia_servicos', sa.String(50)),
+        sa.Column('generated_filename', sa.String(255)),
+        sa.Column('job_id', sa.String(32)),
+        sa.Column('status', sa.String(20), server_default='concluido'),
+        sa.Column('status_message', sa.String(500)),
+        sa.Column('data_criacao', sa.DateTime, nullable=False),
+        sa.Column('data_atualizacao', sa.DateTime),
+        sa.Column('creator_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    )
+    op.create_index('ix_edital_job_id', 'edital', ['job_id'])
+    op.create_index('ix_edital_creator_data_criacao', 'edital', ['creator_id', 'data_criacao', 'id'])
+    op.create_index('ix_edital_data_criacao', 'edital', ['data_criacao', 'id'])
+
+
+def downgrade():
+    op.drop_table('edital')
+    op.drop_table('user')
@@ -0,0 +1,303 @@
+"""edital compacto: opções como códigos, sim/não como booleano e campos pouco consultados num JSON comprimido
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:00:00
+
+- opções de cláusula (chaves do clausulas.json) viram códigos SMALLINT da nova tabela opcao;
+- campos sim/não viram BOOLEAN, status e tipo_participacao viram SMALLINT (posição na lista);
+- os campos só lidos na geração do documento vão para `dados` (JSON comprimido com zlib);
+- objeto_resumo guarda o início do objeto para as listagens, que não leem mais o texto longo;
+- generated_filename passa a se chamar storage_key, como o atributo do modelo.
+
+Sim/não, tipo_participacao e status são comparados sem espaços nem maiúsculas
+('Ampla ' vira 'ampla'); um valor fora das listas interrompe a migração antes de
+qualquer alteração, com o id do edital, o campo e o valor, para ser corrigido à mão.
+
+A tabela é recriada e as linhas copiadas em lotes, com os mesmos ids. No PostgreSQL
+o índice de busca (edital_busca) é apagado e recriado no primeiro uso
+(search_index.ensure_search_index); no SQLite o edital_fts continua valendo.
+Esta migração não importa os modelos: formatos e listas abaixo são os desta revisão.
+"""
+import json
+import logging
+import zlib
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+LOTE = 500
+RESUMO_OBJETO_CHARS = 150
+
+STATUS = ('concluido', 'pendente', 'erro')
+TIPOS_PARTICIPACAO = ('ampla', 'exclusiva', 'micro')
+SIM_NAO = ('orcamento_sigiloso', 'servico_continuo', 'cad_madeira', 'documento_tecnico_sim_nao')
+BOOLEANOS = ('incluir_rec_judicial', 'incluir_rec_extrajudicial', 'incluir_me_epp', 'incluir_cadmadeira')
+OPCOES = (
+    'permite_visita_tecnica', 'criterio_julgamento', 'aplicacao_criterio', 'modo_disputa',
+    'participacao_consorcio', 'diferencial_aliquota', 'regularidade_fiscal', 'qualificacao_tecnica',
+    'atestados_qualificacao_tecnica', 'qualificacao_economico_financeira', 'garantia_sim_nao',
+    'subcontratacao', 'permitido_cooperativa',
+    'regime_empreitada', 'prazos_execucao', 'tipo_instrumento_contratual', 'prorrogacao_contrato',
+    'medicao_servicos', 'fiscalizacao_inspecao', 'consequencias_rescisao',
+    'suspensao_temporaria_servicos', 'aceitacao_servicos', 'garantia_servicos',
+)
+# Campos do JSON `dados` e seu tipo na tabela antiga
+DADOS = {
+    'compras_gov_numero': sa.String(50),
+    'valor_total_orcamento': sa.String(50),
+    'data_base_orcamento': sa.Date(),
+    'data_sessao': sa.Date(),
+    'hora_sessao': sa.String(10),
+    'data_disponibilidade': sa.Date(),
+    'email_contato1': sa.String(120),
+    'email_contato2': sa.String(120),
+    'documento_tecnico_nome': sa.String(200),
+    'numero_licitacao_anexo1': sa.String(50),
+}
+# Copiadas sem conversão
+COMUNS = ('id', 'form_name', 'numero_pregao', 'objeto_servicos', 'objeto_licitacao_anexo1', *BOOLEANOS,
+          'job_id', 'status_message', 'data_criacao', 'data_atualizacao', 'creator_id')
+
+# Mesmo formato de column_types.JSONCompactado
+DADOS_ZDICT = (b'{"compras_gov_numero":"","data_base_orcamento":"20","data_disponibilidade":"20",'
+               b'"data_sessao":"20","documento_tecnico_nome":"","email_contato1":"","email_contato2":"",'
+               b'"hora_sessao":"","numero_licitacao_anexo1":"","valor_total_orcamento":"R$ "}')
+FORMATO_DADOS = b'\x01'
+
+
+def compactar(dados):
+    if not dados:
+        return None
+    raw = json.dumps(dados, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=DADOS_ZDICT)
+    return FORMATO_DADOS + compressor.compress(raw) + compressor.flush()
+
+
+def descompactar(valor):
+    if valor is None:
+        return {}
+    valor = bytes(valor)
+    decompressor = zlib.decompressobj(-15, zdict=DADOS_ZDICT)
+    return json.loads(decompressor.decompress(valor[1:]) + decompressor.flush())
+
+
+class ValorInvalido(ValueError):
+    pass
+
+
+def normalizar(valor):
+    return (valor or '').strip().lower()
+
+
+def sim_nao(valor):
+    valor = normalizar(valor)
+    if not valor:
+        return None
+    if valor in ('sim', 's'):
+        return True
+    if valor in ('nao', 'não', 'n'):
+        return False
+    raise ValorInvalido(valor)
+
+
+def posicao(valores, valor):
+    valor = normalizar(valor)
+    if not valor:
+        return None
+    if valor not in valores:
+        raise ValorInvalido(valor)
+    return valores.index(valor)
+
+
+def verificar(bind, antiga):
+    """Confere sim/não, tipo_participacao e status de todas as linhas antes de alterar o banco."""
+    conversoes = {campo: sim_nao for campo in SIM_NAO}
+    conversoes['tipo_participacao'] = lambda valor: posicao(TIPOS_PARTICIPACAO, valor)
+    conversoes['status'] = lambda valor: posicao(STATUS, valor)
+    colunas = [antiga.c.id, *(antiga.c[campo] for campo in conversoes)]
+    invalidos = []
+    ultimo = 0
+    while True:
+        linhas = bind.execute(
+            sa.select(*colunas).where(antiga.c.id > ultimo).order_by(antiga.c.id).limit(LOTE)
+        ).mappings().all()
+        if not linhas:
+            break
+        for linha in linhas:
+            for campo, converter in conversoes.items():
+                try:
+                    converter(linha[campo])
+                except ValorInvalido:
+                    invalidos.append((linha['id'], campo, linha[campo]))
+                    logger.error(f"edital {linha['id']}: {campo} = {linha[campo]!r} não é um valor conhecido")
+        ultimo = linhas[-1]['id']
+    if invalidos:
+        raise RuntimeError(
+            f"{len(invalidos)} valor(es) desconhecido(s) na tabela edital; corrija-os e rode a migração de novo: "
+            + ', '.join(f'edital {id_} {campo}={valor!r}' for id_, campo, valor in invalidos[:20])
+            + (' ...' if len(invalidos) > 20 else '')
+        )
+
+
+def criar_tabela_compacta(nome):
+    return op.create_table(
+        nome,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('form_name', sa.String(200), nullable=False),
+        sa.Column('numero_pregao', sa.String(50)),
+        sa.Column('objeto_servicos', sa.Text),
+        sa.Column('objeto_resumo', sa.String(RESUMO_OBJETO_CHARS)),
+        sa.Column('dados', sa.LargeBinary),
+        *(sa.Column(campo, sa.SmallInteger, sa.ForeignKey('opcao.id')) for campo in OPCOES),
+        sa.Column('tipo_participacao', sa.SmallInteger),
+        *(sa.Column(campo, sa.Boolean) for campo in SIM_NAO),
+        sa.Column('objeto_licitacao_anexo1', sa.Text),
+        *(sa.Column(campo, sa.Boolean) for campo in BOOLEANOS),
+        sa.Column('storage_key', sa.String(255)),
+        sa.Column('job_id', sa.String(32)),
+        sa.Column('status', sa.SmallInteger, server_default='0'),
+        sa.Column('status_message', sa.String(500)),
+        sa.Column('data_criacao', sa.DateTime, nullable=False),
+        sa.Column('data_atualizacao', sa.DateTime),
+        sa.Column('creator_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    )
+
+
+def criar_tabela_larga(nome):
+    return op.create_table(
+        nome,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('form_name', sa.String(200), nullable=False),
+        sa.Column('numero_pregao', sa.String(50)),
+        sa.Column('objeto_servicos', sa.Text),
+        *(sa.Column(campo, tipo) for campo, tipo in DADOS.items()),
+        *(sa.Column(campo, sa.String(10)) for campo in SIM_NAO),
+        *(sa.Column(campo, sa.String(50)) for campo in OPCOES),
+        sa.Column('tipo_participacao', sa.String(50)),
+        sa.Column('objeto_licitacao_anexo1', sa.Text),
+        *(sa.Column(campo, sa.Boolean) for campo in BOOLEANOS),
+        sa.Column('generated_filename', sa.String(255)),
+        sa.Column('job_id', sa.String(32)),
+        sa.Column('status', sa.String(20), server_default='concluido'),
+        sa.Column('status_message', sa.String(500)),
+        sa.Column('data_criacao', sa.DateTime, nullable=False),
+        sa.Column('data_atualizacao', sa.DateTime),
+        sa.Column('creator_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    )
+
+
+def copiar(bind, origem, destino, converter):
+    """Copia as linhas em lotes pelo id (sem manter um cursor aberto durante os INSERTs)."""
+    ultimo = 0
+    while True:
+        linhas = bind.execute(
+            sa.select(origem).where(origem.c.id > ultimo).order_by(origem.c.id).limit(LOTE)
+        ).mappings().all()
+        if not linhas:
+            break
+        bind.execute(destino.insert(), [converter(linha) for linha in linhas])
+        ultimo = linhas[-1]['id']
+
+
+def trocar_tabela(bind, nova):
+    """Põe a tabela `nova` no lugar de edital, com os índices e a sequência do id."""
+    if bind.dialect.name == 'postgresql':
+        # O índice de busca referencia edital (ON DELETE CASCADE); é recriado no primeiro uso
+        op.execute('DROP TABLE IF EXISTS edital_busca')
+    op.drop_table('edital')
+    op.rename_table(nova, 'edital')
+    op.create_index('ix_edital_job_id', 'edital', ['job_id'])
+    op.create_index('ix_edital_creator_data_criacao', 'edital', ['creator_id', 'data_criacao', 'id'])
+    op.create_index('ix_edital_data_criacao', 'edital', ['data_criacao', 'id'])
+    if bind.dialect.name == 'postgresql':
+        op.execute("SELECT setval(pg_get_serial_sequence('edital', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM edital")
+
+
+def upgrade():
+    bind = op.get_bind()
+    antiga = sa.Table('edital', sa.MetaData(), autoload_with=bind)
+    verificar(bind, antiga)
+    opcao = op.create_table(
+        'opcao',
+        # No SQLite só INTEGER PRIMARY KEY é gerado automaticamente (rowid)
+        sa.Column('id', sa.SmallInteger().with_variant(sa.Integer, 'sqlite'), primary_key=True),
+        sa.Column('campo', sa.String(50), nullable=False),
+        sa.Column('valor', sa.String(50), nullable=False),
+        sa.UniqueConstraint('campo', 'valor', name='uq_opcao_campo_valor'),
+    )
+    nova = criar_tabela_compacta('edital_novo')
+    codigos = {}
+
+    def codigo(campo, valor):
+        valor = (valor or '').strip()
+        if not valor:
+            return None
+        if (campo, valor) not in codigos:
+            result = bind.execute(opcao.insert().values(campo=campo, valor=valor))
+            codigos[(campo, valor)] = result.inserted_primary_key[0]
+        return codigos[(campo, valor)]
+
+    def converter(linha):
+        valores = {campo: linha[campo] for campo in COMUNS}
+        dados = {}
+        for campo in DADOS:
+            valor = linha[campo]
+            if hasattr(valor, 'isoformat'):
+                valor = valor.isoformat()
+            if valor not in (None, ''):
+                dados[campo] = valor
+        valores['dados'] = compactar(dados)
+        valores['objeto_resumo'] = (linha['objeto_servicos'] or '')[:RESUMO_OBJETO_CHARS] or None
+        for campo in OPCOES:
+            valores[campo] = codigo(campo, linha[campo])
+        for campo in SIM_NAO:
+            valores[campo] = sim_nao(linha[campo])
+        valores['tipo_participacao'] = posicao(TIPOS_PARTICIPACAO, linha['tipo_participacao'])
+        valores['status'] = posicao(STATUS, linha['status'])
+        valores['storage_key'] = linha['generated_filename']
+        return valores
+
+    copiar(bind, antiga, nova, converter)
+    trocar_tabela(bind, 'edital_novo')
+
+
+def downgrade():
+    bind = op.get_bind()
+    larga = criar_tabela_larga('edital_antigo')
+    compacta = sa.Table('edital', sa.MetaData(), autoload_with=bind)
+    opcao = sa.Table('opcao', sa.MetaData(), autoload_with=bind)
+    valores_opcao = dict(bind.execute(sa.select(opcao.c.id, opcao.c.valor)).all())
+
+    def converter(linha):
+        valores = {campo: linha[campo] for campo in COMUNS}
+        dados = descompactar(linha['dados'])
+        for campo, tipo in DADOS.items():
+            valor = dados.get(campo)
+            if valor is not None and isinstance(tipo, sa.Date):
+                valor = date.fromisoformat(valor)
+            valores[campo] = valor
+        for campo in OPCOES:
+            valores[campo] = valores_opcao.get(linha[campo])
+        for campo in SIM_NAO:
+            valores[campo] = None if linha[campo] is None else ('sim' if linha[campo] else 'nao')
+        tipo = linha['tipo_participacao']
+        valores['tipo_participacao'] = None if tipo is None else TIPOS_PARTICIPACAO[tipo]
+        status = linha['status']
+        valores['status'] = None if status is None else STATUS[status]
+        valores['generated_filename'] = linha['storage_key']
+        return valores
+
+    copiar(bind, compacta, larga, converter)
+    trocar_tabela(bind, 'edital_antigo')
+    op.drop_table('opcao')
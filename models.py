@@ -1,8 +1,11 @@
-from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, deferred, validates
 
-db = SQLAlchemy()
+from extensions import db
+from column_types import SimNao, Enumerado, OpcaoClausula, JSONCompactado, CampoDados, option_codes
+from password_hashing import password_hasher
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,26 +14,191 @@ class User(UserMixin, db.Model):
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), default='user')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
+    # Incrementada pelo SQLAlchemy a cada UPDATE da linha (troca de senha ou de perfil)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
+
+    # passive_deletes: ao excluir o usuário os editais não são carregados um a um (a rota os remove em lote antes)
+    editais = db.relationship('Edital', backref='creator', lazy=True, passive_deletes=True)
+
+    # O bcrypt roda no pool limitado do password_hasher (pode levantar PasswordHashingBusy)
+    def set_password(self, password):
+        self.password = password_hasher.hash(password)
+
+    def check_password(self, password):
+        return password_hasher.verify(self.password, password)
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def get_id(self):
+        # Vai para a sessão do Flask-Login: sessões abertas antes de uma alteração do usuário deixam de valer
+        return f'{self.id}:{self.version}'
+
     def __repr__(self):
         return f'<User {self.username}>'
 
+# Situação da geração do arquivo .docx (na ordem dos códigos gravados, ver Enumerado)
+STATUS_CONCLUIDO = 'concluido'
+STATUS_PENDENTE = 'pendente'
+STATUS_ERRO = 'erro'
+STATUS_GERACAO = (STATUS_CONCLUIDO, STATUS_PENDENTE, STATUS_ERRO)
+
+TIPOS_PARTICIPACAO = ('ampla', 'exclusiva', 'micro')
+
+# Tamanho do objeto_resumo exibido nas listagens
+RESUMO_OBJETO_CHARS = 150
+
+
+class Opcao(db.Model):
+    """Opções de cláusula já usadas em editais; o edital guarda só o código (ver column_types.OptionCodes)."""
+    __table_args__ = (db.UniqueConstraint('campo', 'valor', name='uq_opcao_campo_valor'),)
+
+    # No SQLite só INTEGER PRIMARY KEY é gerado automaticamente (rowid)
+    id = db.Column(db.SmallInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    campo = db.Column(db.String(50), nullable=False)
+    valor = db.Column(db.String(50), nullable=False)
+
+option_codes.configure(Opcao.__table__, lambda: db.session)
+
+
+def opcao_column(campo):
+    return db.Column(OpcaoClausula(campo), db.ForeignKey('opcao.id'))
+
+
 class Edital(db.Model):
+    __table_args__ = (
+        # Painel do usuário (por criador) e listagem do admin, ambos ordenados pela data de criação
+        db.Index('ix_edital_creator_data_criacao', 'creator_id', 'data_criacao', 'id'),
+        db.Index('ix_edital_data_criacao', 'data_criacao', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    titulo = db.Column(db.String(200), nullable=False)
-    numero = db.Column(db.String(50), nullable=False)
-    orgao = db.Column(db.String(200), nullable=False)
-    modalidade = db.Column(db.String(50), nullable=False)
-    objeto = db.Column(db.Text, nullable=False)
-    valor_estimado = db.Column(db.String(50))
-    data_abertura = db.Column(db.String(20), nullable=False)
-    hora_abertura = db.Column(db.String(10), nullable=False)
-    local_abertura = db.Column(db.Text)
-    endereco_retirada = db.Column(db.Text)
-    informacoes_adicionais = db.Column(db.Text)
-    arquivo_anexo = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    
+    form_name = db.Column(db.String(200), nullable=False)
+    numero_pregao = db.Column(db.String(50))
+    # Textos longos só são carregados quando acessados (as listagens usam objeto_resumo)
+    objeto_servicos = deferred(db.Column(db.Text), group='textos')
+    objeto_resumo = db.Column(db.String(RESUMO_OBJETO_CHARS))
+    orcamento_sigiloso = db.Column(SimNao)
+
+    # Campos só lidos na geração do documento: ficam juntos num JSON comprimido
+    dados = db.Column(JSONCompactado)
+    compras_gov_numero = CampoDados(db.String(50))
+    valor_total_orcamento = CampoDados(db.String(50))
+    data_base_orcamento = CampoDados(db.Date())
+    data_sessao = CampoDados(db.Date())
+    hora_sessao = CampoDados(db.String(10))
+    data_disponibilidade = CampoDados(db.Date())
+    email_contato1 = CampoDados(db.String(120))
+    email_contato2 = CampoDados(db.String(120))
+    documento_tecnico_nome = CampoDados(db.String(200))
+    numero_licitacao_anexo1 = CampoDados(db.String(50))
+
+    # Opções que selecionam cláusulas do clausulas.json
+    permite_visita_tecnica = opcao_column('permite_visita_tecnica')
+    criterio_julgamento = opcao_column('criterio_julgamento')
+    aplicacao_criterio = opcao_column('aplicacao_criterio')
+    modo_disputa = opcao_column('modo_disputa')
+    tipo_participacao = db.Column(Enumerado(TIPOS_PARTICIPACAO))
+    participacao_consorcio = opcao_column('participacao_consorcio')
+    diferencial_aliquota = opcao_column('diferencial_aliquota')
+    regularidade_fiscal = opcao_column('regularidade_fiscal')
+    qualificacao_tecnica = opcao_column('qualificacao_tecnica')
+    atestados_qualificacao_tecnica = opcao_column('atestados_qualificacao_tecnica')
+    qualificacao_economico_financeira = opcao_column('qualificacao_economico_financeira')
+    servico_continuo = db.Column(SimNao)
+    garantia_sim_nao = opcao_column('garantia_sim_nao')
+    subcontratacao = opcao_column('subcontratacao')
+    permitido_cooperativa = opcao_column('permitido_cooperativa')
+    cad_madeira = db.Column(SimNao)
+    documento_tecnico_sim_nao = db.Column(SimNao)
+
+    # Anexo 1
+    objeto_licitacao_anexo1 = deferred(db.Column(db.Text), group='textos')
+    incluir_rec_judicial = db.Column(db.Boolean, default=False)
+    incluir_rec_extrajudicial = db.Column(db.Boolean, default=False)
+    incluir_me_epp = db.Column(db.Boolean, default=False)
+    incluir_cadmadeira = db.Column(db.Boolean, default=False)
+
+    # Cláusulas específicas do contrato
+    regime_empreitada = opcao_column('regime_empreitada')
+    prazos_execucao = opcao_column('prazos_execucao')
+    tipo_instrumento_contratual = opcao_column('tipo_instrumento_contratual')
+    prorrogacao_contrato = opcao_column('prorrogacao_contrato')
+    medicao_servicos = opcao_column('medicao_servicos')
+    fiscalizacao_inspecao = opcao_column('fiscalizacao_inspecao')
+    consequencias_rescisao = opcao_column('consequencias_rescisao')
+    suspensao_temporaria_servicos = opcao_column('suspensao_temporaria_servicos')
+    aceitacao_servicos = opcao_column('aceitacao_servicos')
+    garantia_servicos = opcao_column('garantia_servicos')
+
+    # Chave do .docx no armazenamento (ver storage.py)
+    storage_key = db.Column(db.String(255))
+    # Geração em segundo plano (ver generation_queue.py)
+    job_id = db.Column(db.String(32), index=True)
+    status = db.Column(Enumerado(STATUS_GERACAO), default=STATUS_CONCLUIDO, server_default='0')
+    status_message = db.Column(db.String(500))
+
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    @validates('objeto_servicos')
+    def _atualiza_resumo(self, key, value):
+        self.objeto_resumo = value[:RESUMO_OBJETO_CHARS] if value else None
+        return value
+
     def __repr__(self):
-        return f'<Edital {self.numero}>'
+        return f'<Edital {self.numero_pregao}>'
+
+# Campos do Edital com o código de uma opção de cláusula (tabela opcao)
+EDITAL_OPCAO_FIELDS = tuple(column.key for column in Edital.__table__.columns
+                            if isinstance(column.type, OpcaoClausula))
+
+
+def edital_field_type(field):
+    """Tipo SQLAlchemy de um campo do Edital, seja coluna ou campo do JSON `dados`."""
+    attribute = getattr(Edital, field)
+    return attribute.type if isinstance(attribute, CampoDados) else Edital.__table__.columns[field].type
+
+
+@event.listens_for(Session, 'before_flush')
+def _cadastra_opcoes(session, flush_context, instances):
+    # Opções novas ganham código antes do INSERT/UPDATE dos editais que as usam
+    pairs = set()
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Edital):
+            for field in EDITAL_OPCAO_FIELDS:
+                value = obj.__dict__.get(field)
+                if value:
+                    pairs.add((field, value))
+    if pairs:
+        option_codes.ensure(session, pairs)
+
+
+@event.listens_for(Session, 'after_commit')
+def _confirma_opcoes(session):
+    option_codes.publish(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descarta_opcoes(session):
+    option_codes.discard(session)
+
+# Campos do Edital preenchidos a partir dos campos do EditalForm (mesmos nomes)
+EDITAL_FORM_FIELDS = (
+    'form_name', 'numero_pregao', 'objeto_servicos', 'compras_gov_numero', 'valor_total_orcamento',
+    'data_base_orcamento', 'data_sessao', 'hora_sessao', 'data_disponibilidade',
+    'email_contato1', 'email_contato2', 'orcamento_sigiloso',
+    'permite_visita_tecnica', 'criterio_julgamento', 'aplicacao_criterio', 'modo_disputa',
+    'tipo_participacao', 'participacao_consorcio', 'diferencial_aliquota', 'regularidade_fiscal',
+    'qualificacao_tecnica', 'atestados_qualificacao_tecnica', 'qualificacao_economico_financeira',
+    'servico_continuo', 'garantia_sim_nao', 'subcontratacao', 'permitido_cooperativa', 'cad_madeira',
+    'documento_tecnico_sim_nao', 'documento_tecnico_nome',
+    'numero_licitacao_anexo1', 'objeto_licitacao_anexo1',
+    'incluir_rec_judicial', 'incluir_rec_extrajudicial', 'incluir_me_epp', 'incluir_cadmadeira',
+    'regime_empreitada', 'prazos_execucao', 'tipo_instrumento_contratual', 'prorrogacao_contrato',
+    'medicao_servicos', 'fiscalizacao_inspecao', 'consequencias_rescisao',
+    'suspensao_temporaria_servicos', 'aceitacao_servicos', 'garantia_servicos',
+)
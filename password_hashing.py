@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from extensions import bcrypt
+
+
+class PasswordHashingBusy(Exception):
+    """Fila de hashing cheia (ou tempo esgotado): a requisição deve ser recusada e repetida depois."""
+
+
+def hash_cost(pw_hash):
+    """Custo (log2 das rodadas) de um hash bcrypt '$2b$12$...'; None se não for bcrypt."""
+    parts = pw_hash.split('$') if pw_hash else []
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """Hashing e verificação de senhas (bcrypt) em um pool de threads limitado.
+
+    O bcrypt libera o GIL, então até PASSWORD_HASH_WORKERS hashes rodam em
+    paralelo; outras PASSWORD_HASH_QUEUE chamadas podem esperar na fila e as
+    demais recebem PasswordHashingBusy na hora, em vez de ocuparem o worker
+    durante um pico de logins. O custo vem de BCRYPT_LOG_ROUNDS.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.timeout = 10
+        self._executor = None
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('PASSWORD_HASH_QUEUE', 4 * app.config['PASSWORD_HASH_WORKERS'])
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        self.rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + app.config['PASSWORD_HASH_QUEUE'])
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy('fila de verificação de senhas cheia')
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHashingBusy('tempo esgotado na verificação da senha')
+
+    def hash(self, password):
+        return self._run(_generate, password, self.rounds)
+
+    def verify(self, pw_hash, password):
+        return self._run(bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """O hash foi criado com um custo diferente do configurado."""
+        cost = hash_cost(pw_hash)
+        return cost is not None and cost != self.rounds
+
+
+def _generate(password, rounds):
+    return bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+
+
+def benchmark_costs(costs, seconds=2.0):
+    """Verificações de senha por segundo em um núcleo, para cada custo do bcrypt.
+
+    Retorna {custo: {'hash_ms': ..., 'verify_ms': ..., 'per_second': ...}}.
+    """
+    results = {}
+    for cost in costs:
+        started = time.perf_counter()
+        pw_hash = _generate('senha-de-teste', cost)
+        hash_time = time.perf_counter() - started
+
+        checks = 0
+        started = time.perf_counter()
+        while True:
+            bcrypt.check_password_hash(pw_hash, 'senha-de-teste')
+            checks += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds:
+                break
+        results[cost] = {
+            'hash_ms': hash_time * 1000,
+            'verify_ms': elapsed / checks * 1000,
+            'per_second': checks / elapsed,
+        }
+    return results
+
+
+password_hasher = PasswordHasher()
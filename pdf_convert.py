@@ -0,0 +1,368 @@
+import atexit
+import hashlib
+import logging
+import os
+import pathlib
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import LocalStorage
+
+logger = logging.getLogger(__name__)
+
+_uno = None
+_uno_checked = False
+
+
+class PdfConversionBusy(Exception):
+    """Fila de conversão cheia (ou espera longa demais): a requisição deve ser repetida depois."""
+
+
+class PdfConversionError(Exception):
+    """O LibreOffice falhou ou passou do tempo limite ao converter o documento."""
+
+
+def _load_uno():
+    # O módulo uno vem com o LibreOffice (pacote python3-uno), não pelo pip
+    global _uno, _uno_checked
+    if not _uno_checked:
+        try:
+            import uno
+            _uno = uno
+        except ImportError:
+            _uno = None
+        _uno_checked = True
+    return _uno
+
+
+def _properties(uno, **values):
+    result = []
+    for name, value in values.items():
+        prop = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+        prop.Name = name
+        prop.Value = value
+        result.append(prop)
+    return tuple(result)
+
+
+class _Soffice:
+    """Um LibreOffice headless com perfil próprio, usado por uma conversão de cada vez.
+
+    Com o módulo uno disponível o processo fica aberto entre as conversões e
+    recebe os documentos por um pipe UNO, sem pagar a inicialização do
+    soffice a cada PDF. Sem ele, cada conversão roda `soffice --convert-to`
+    reaproveitando o perfil já criado (a primeira execução é a mais lenta).
+    Se uma conversão passar do tempo limite o processo é morto e recriado na
+    próxima.
+    """
+
+    def __init__(self, soffice, workdir):
+        self.soffice = soffice
+        self.workdir = workdir
+        self.pipe = f"edital_pdf_{os.getpid()}_{os.path.basename(workdir)}"
+        self.process = None
+        self.desktop = None
+        self._timed_out = threading.Event()
+        os.makedirs(os.path.join(workdir, 'job'), exist_ok=True)
+
+    def _profile_arg(self):
+        return f"-env:UserInstallation={pathlib.Path(self.workdir, 'perfil').as_uri()}"
+
+    def _start(self, args):
+        return subprocess.Popen([self.soffice, self._profile_arg(), '--headless', '--invisible', '--nologo',
+                                 '--norestore', '--nodefault', *args],
+                                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                start_new_session=True)
+
+    def convert(self, docx_path, timeout):
+        """Converte `docx_path` e devolve o caminho do PDF gerado na mesma pasta."""
+        pdf_path = os.path.splitext(docx_path)[0] + '.pdf'
+        uno = _load_uno()
+        try:
+            if uno is None:
+                self._convert_cli(docx_path, timeout)
+            else:
+                self._convert_uno(uno, docx_path, pdf_path, timeout)
+        except PdfConversionError:
+            raise
+        except Exception as e:
+            self.kill() # processo em estado desconhecido: recomeça na próxima conversão
+            if self._timed_out.is_set():
+                raise PdfConversionError(f"tempo esgotado ({timeout}s) na conversão para PDF") from e
+            raise PdfConversionError(f"erro do LibreOffice na conversão para PDF: {e}") from e
+        if not os.path.exists(pdf_path):
+            raise PdfConversionError('o LibreOffice não gerou o PDF')
+        return pdf_path
+
+    def _convert_uno(self, uno, docx_path, pdf_path, timeout):
+        self._timed_out.clear()
+        timer = threading.Timer(timeout, self._timeout)
+        timer.daemon = True
+        timer.start()
+        try:
+            desktop = self._connect(uno, time.monotonic() + timeout)
+            document = desktop.loadComponentFromURL(uno.systemPathToFileUrl(docx_path), '_blank', 0,
+                                                    _properties(uno, Hidden=True, ReadOnly=True))
+            try:
+                document.storeToURL(uno.systemPathToFileUrl(pdf_path), _properties(uno, FilterName='writer_pdf_Export'))
+            finally:
+                document.close(True)
+        finally:
+            timer.cancel()
+
+    def _connect(self, uno, deadline):
+        if self.process is None or self.process.poll() is not None:
+            self.desktop = None
+            self.process = self._start([f"--accept=pipe,name={self.pipe};urp;StarOffice.ComponentContext"])
+        if self.desktop is None:
+            local = uno.getComponentContext()
+            resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+            while True:
+                try:
+                    context = resolver.resolve(f"uno:pipe,name={self.pipe};urp;StarOffice.ComponentContext")
+                    break
+                except Exception:
+                    # Ainda inicializando (ou morto pelo tempo limite)
+                    if time.monotonic() >= deadline or self.process is None or self.process.poll() is not None:
+                        raise
+                    time.sleep(0.1)
+            self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+        return self.desktop
+
+    def _convert_cli(self, docx_path, timeout):
+        self._timed_out.clear()
+        try:
+            process = self._start(['--convert-to', 'pdf', '--outdir', os.path.dirname(docx_path), docx_path])
+        except OSError as e:
+            raise PdfConversionError(f"não foi possível executar {self.soffice}: {e}") from e
+        self.process = process
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._timeout()
+            raise PdfConversionError(f"tempo esgotado ({timeout}s) na conversão para PDF")
+        finally:
+            self.process = None
+        if returncode != 0:
+            raise PdfConversionError(f"o LibreOffice terminou com código {returncode}")
+
+    def _timeout(self):
+        self._timed_out.set()
+        self.kill()
+
+    def kill(self):
+        process, self.process, self.desktop = self.process, None, None
+        if process is not None and process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL) # o soffice abre outros processos no mesmo grupo
+            except ProcessLookupError:
+                pass
+            process.wait()
+
+
+class PdfConverter:
+    """Conversão DOCX -> PDF em um pool de LibreOffice headless persistentes.
+
+    PDF_CONVERTERS processos convertem em paralelo; outras PDF_QUEUE
+    conversões podem esperar na fila e as demais recebem PdfConversionBusy
+    na hora. Cada conversão tem até PDF_TIMEOUT segundos. Os PDFs ficam em
+    cache em PDF_CACHE_FOLDER pelo hash do conteúdo do .docx (os mais
+    antigos saem quando o cache passa de PDF_CACHE_MAX_BYTES), então
+    downloads repetidos não convertem de novo.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.timeout = 60
+        self._pid = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._idle = None
+        self._converters = []
+        self._workdir = None
+        self._cache = None
+        self._cache_bytes = None
+        self._reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PDF_CONVERTERS', 2)
+        app.config.setdefault('PDF_QUEUE', 8)
+        app.config.setdefault('PDF_TIMEOUT', 60)
+        app.config.setdefault('SOFFICE_PATH', 'soffice')
+        app.config.setdefault('PDF_CACHE_FOLDER', os.path.join(tempfile.gettempdir(), 'edital-app-pdf-cache'))
+        app.config.setdefault('PDF_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        app.extensions['pdf_converter'] = self
+        self.app = app
+        self.timeout = app.config['PDF_TIMEOUT']
+        self._cache = LocalStorage(app.config['PDF_CACHE_FOLDER'])
+
+    def _reset_stats(self):
+        self.conversions = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.rejected = 0
+        self.waiting = 0
+        self.running = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _ensure_pool(self):
+        # Um pool por processo (os workers do gunicorn não herdam threads nem os soffice do fork)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            config = self.app.config
+            count = config['PDF_CONVERTERS']
+            self._workdir = tempfile.mkdtemp(prefix=f"edital-app-soffice-{os.getpid()}-")
+            self._converters = [_Soffice(config['SOFFICE_PATH'], os.path.join(self._workdir, str(index)))
+                                for index in range(count)]
+            self._idle = queue.Queue()
+            for converter in self._converters:
+                self._idle.put(converter)
+            self._executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix='pdf')
+            self._slots = threading.BoundedSemaphore(count + config['PDF_QUEUE'])
+            if self._pid is not None:
+                self._reset_stats() # contadores herdados do processo pai
+            self._pid = os.getpid()
+            atexit.register(self.shutdown)
+
+    def convert(self, docx_data):
+        """(hash do .docx, bytes do PDF), usando o cache quando possível."""
+        digest = hashlib.sha256(docx_data).hexdigest()
+        key = f"{digest}.pdf"
+        try:
+            data = self._cache.read(key)
+        except FileNotFoundError:
+            pass
+        else:
+            self._cache.touch(key) # o cache descarta primeiro os menos usados
+            with self._lock:
+                self.cache_hits += 1
+            return digest, data
+
+        self._ensure_pool()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PdfConversionBusy('fila de conversão para PDF cheia')
+        with self._lock:
+            self.waiting += 1
+        try:
+            future = self._executor.submit(self._convert, docx_data, key, time.monotonic())
+        except BaseException:
+            with self._lock:
+                self.waiting -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return digest, future.result()
+
+    def _convert(self, docx_data, key, submitted):
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+        converter = self._idle.get()
+        started = time.monotonic()
+        try:
+            if started - submitted > self.timeout:
+                # Esperou na fila mais que o tempo de uma conversão: o usuário provavelmente desistiu
+                raise PdfConversionBusy('tempo esgotado na fila de conversão para PDF')
+            docx_path = os.path.join(converter.workdir, 'job', 'edital.docx')
+            with open(docx_path, 'wb') as f:
+                f.write(docx_data)
+            try:
+                pdf_path = converter.convert(docx_path, self.timeout)
+                with open(pdf_path, 'rb') as f:
+                    data = f.read()
+            finally:
+                for path in (docx_path, os.path.splitext(docx_path)[0] + '.pdf'):
+                    if os.path.exists(path):
+                        os.remove(path)
+        except PdfConversionError:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            self._idle.put(converter)
+            with self._lock:
+                self.running -= 1
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.conversions += 1
+            self.total_seconds += elapsed
+            self.last_seconds = elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+        logger.info(f"PDF convertido em {elapsed * 1000:.0f} ms (espera na fila: {(started - submitted) * 1000:.0f} ms)")
+        self._store(key, data)
+        return data
+
+    def _store(self, key, data):
+        try:
+            self._cache.write(key, lambda f: f.write(data))
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o PDF no cache: {e}")
+            return
+        with self._lock:
+            if self._cache_bytes is not None:
+                self._cache_bytes += len(data)
+            over = self._cache_bytes is None or self._cache_bytes > self.app.config['PDF_CACHE_MAX_BYTES']
+        if over:
+            self._prune()
+
+    def _prune(self):
+        # Remove os PDFs menos usados até o cache ficar em 90% do limite
+        limit = self.app.config['PDF_CACHE_MAX_BYTES']
+        objects = sorted(self._cache.iter_objects(), key=lambda obj: obj.mtime)
+        total = sum(obj.size for obj in objects)
+        if total > limit:
+            for obj in objects:
+                if total <= limit * 0.9:
+                    break
+                try:
+                    self._cache.delete(obj.key)
+                except FileNotFoundError:
+                    pass
+                total -= obj.size
+        with self._lock:
+            self._cache_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'conversions': self.conversions,
+                'failures': self.failures,
+                'cache_hits': self.cache_hits,
+                'rejected': self.rejected,
+                'queue_depth': self.waiting,
+                'running': self.running,
+                'avg_ms': self.total_seconds / self.conversions * 1000 if self.conversions else 0.0,
+                'last_ms': self.last_seconds * 1000,
+                'max_ms': self.max_seconds * 1000,
+            }
+
+    def shutdown(self):
+        """Encerra os LibreOffice deste processo."""
+        if self._pid != os.getpid():
+            return
+        for converter in self._converters:
+            converter.kill()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        shutil.rmtree(self._workdir, ignore_errors=True)
+        self._pid = None
+
+
+pdf_converter = PdfConverter()
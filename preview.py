@@ -0,0 +1,187 @@
+import hashlib
+import html
+import io
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+from docx_render import PLACEHOLDER_RE
+
+# Parágrafos com estes estilos abrem uma nova seção da pré-visualização
+HEADING_STYLES = ('Heading', 'Título', 'Title')
+# Blocos por seção quando o modelo não usa estilos de título
+BLOCKS_PER_SECTION = 25
+
+# Seção do modelo: blocos compilados (ver _compile_text) e placeholders usados nela
+Section = namedtuple('Section', ['blocks', 'placeholders'])
+
+# Última pré-visualização de um formulário: valores dos placeholders e HTML de cada seção
+PreviewState = namedtuple('PreviewState', ['template_digest', 'values', 'sections'])
+
+
+def _compile_text(text, prefix='', suffix=''):
+    """Divide o texto em trechos fixos (já em HTML) e placeholders, alternadamente."""
+    pieces = PLACEHOLDER_RE.split(text)
+    placeholders = PLACEHOLDER_RE.findall(text)
+    block = [prefix + _to_html(pieces[0])]
+    for placeholder, piece in zip(placeholders, pieces[1:]):
+        block.append(placeholder)
+        block.append(_to_html(piece))
+    block[-1] += suffix
+    return block
+
+
+def _to_html(text):
+    return html.escape(text).replace('\n', '<br>')
+
+
+def _heading_level(name):
+    if not name or not name.startswith(HEADING_STYLES):
+        return None
+    digits = ''.join(ch for ch in name if ch.isdigit())
+    return min(int(digits) if digits else 1, 4)
+
+
+class PreviewTemplate:
+    """Corpo do modelo .docx compilado para pré-visualização em HTML.
+
+    O corpo é dividido em seções (pelos títulos do modelo) e cada bloco vira
+    uma lista alternada de trechos fixos e placeholders, então renderizar uma
+    seção é só juntar strings. Cabeçalhos, rodapés e a formatação dos runs
+    ficam de fora: o objetivo é conferir o texto das cláusulas.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.sections = []
+        self._compile(Document(io.BytesIO(data)))
+        self.placeholders = set().union(*(section.placeholders for section in self.sections))
+
+    def _compile(self, document):
+        body = document._body
+        # Nome de cada estilo pelo id (paragraph.style procura o estilo a cada chamada)
+        style_names = {style.style_id: style.name for style in document.styles}
+        paragraph_styles = {}
+        for p in body._element.iterchildren(qn('w:p')):
+            paragraph_styles[p] = style_names.get(p.style) if p.style else None
+        # Sem estilos de título no modelo, as seções têm um número fixo de blocos
+        has_headings = any(_heading_level(name) is not None for name in paragraph_styles.values())
+        blocks = []
+        for child in body._element.iterchildren():
+            if child.tag == qn('w:p'):
+                paragraph = Paragraph(child, body)
+                if not paragraph.text.strip():
+                    continue
+                level = _heading_level(paragraph_styles[child])
+                if level is not None and blocks:
+                    self._add_section(blocks)
+                    blocks = []
+                tag = f"h{level + 2}" if level else 'p'
+                blocks.append(_compile_text(paragraph.text, f"<{tag}>", f"</{tag}>"))
+            elif child.tag == qn('w:tbl'):
+                blocks.append(self._compile_table(Table(child, body)))
+            if not has_headings and len(blocks) >= BLOCKS_PER_SECTION:
+                self._add_section(blocks)
+                blocks = []
+        if blocks:
+            self._add_section(blocks)
+
+    def _compile_table(self, table):
+        # Um bloco sempre termina com um trecho fixo, então as tags são anexadas ao último item
+        block = ['<table class="table table-sm table-bordered">']
+        for row in table.rows:
+            block[-1] += '<tr>'
+            for cell in row.cells:
+                cell_block = _compile_text('\n'.join(p.text for p in cell.paragraphs), '<td>', '</td>')
+                block[-1] += cell_block[0]
+                block.extend(cell_block[1:])
+            block[-1] += '</tr>'
+        block[-1] += '</table>'
+        return block
+
+    def _add_section(self, blocks):
+        placeholders = {piece for block in blocks for piece in block[1::2]}
+        self.sections.append(Section(blocks, placeholders))
+
+    def render_section(self, index, values):
+        parts = []
+        for block in self.sections[index].blocks:
+            for i, piece in enumerate(block):
+                if i % 2 == 0:
+                    parts.append(piece)
+                else:
+                    value = values.get(piece)
+                    parts.append(_to_html(value) if value is not None else html.escape(piece))
+        return ''.join(parts)
+
+    def render(self, replacements, previous=None):
+        """Renderiza as seções, reaproveitando as da pré-visualização anterior.
+
+        Só as seções com algum placeholder cujo valor mudou (comparando os
+        valores já resolvidos com as cláusulas) são montadas de novo. Retorna
+        o novo PreviewState e os índices das seções renderizadas.
+        """
+        values = {placeholder: str(replacements[placeholder])
+                  for placeholder in self.placeholders if placeholder in replacements}
+        if previous is None or previous.template_digest != self.digest:
+            changed = range(len(self.sections))
+            sections = [None] * len(self.sections)
+        else:
+            changed_placeholders = {p for p in self.placeholders if values.get(p) != previous.values.get(p)}
+            changed = [i for i, section in enumerate(self.sections) if section.placeholders & changed_placeholders]
+            sections = list(previous.sections)
+        for index in changed:
+            sections[index] = self.render_section(index, values)
+        return PreviewState(self.digest, values, sections), list(changed)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_preview_template(path):
+    """PreviewTemplate do cache do processo, recompilado se o arquivo mudou."""
+    mtime = os.path.getmtime(path)
+    with _templates_lock:
+        template = _templates.get(path)
+        if template is None or template.mtime != mtime:
+            template = _templates[path] = PreviewTemplate(path)
+        return template
+
+
+class PreviewSessions:
+    """Última pré-visualização de cada formulário aberto (LRU com TTL, por processo)."""
+
+    def __init__(self, max_items=256, ttl=1800):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, state):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, state)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+preview_sessions = PreviewSessions()
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryCounter:
+    """Comandos SQL executados dentro de um bloco count_queries()."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_query_count = g.get('sql_query_count', 0) + 1
+    for counter in getattr(_local, 'counters', ()):
+        counter.count += 1
+        counter.statements.append(statement)
+    # Um comando por vez em cada conexão; se ele falhar, o próximo sobrescreve o início
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    route = None
+    if has_request_context():
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+        route = f"{request.endpoint} ({request.method} {request.path})"
+    if elapsed >= query_guard.slow_query_seconds:
+        statement = ' '.join(statement.split())
+        logger.warning(f"Consulta lenta ({elapsed * 1000:.0f} ms) em {route or 'fora de requisição'}: "
+                       f"{statement[:500]}")
+
+
+@contextmanager
+def count_queries():
+    """Conta os comandos SQL executados nesta thread dentro do bloco.
+
+        with count_queries() as counter:
+            client.get('/admin/editals')
+        assert counter.count <= 3
+    """
+    counter = QueryCounter()
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Falha (AssertionError) se o bloco executar mais de `limit` comandos SQL."""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        listing = '\n'.join(counter.statements)
+        raise AssertionError(f"{counter.count} comandos SQL executados (limite {limit}):\n{listing}")
+
+
+class QueryGuard:
+    """Conta e cronometra os comandos SQL de cada requisição.
+
+    - consultas acima de SQL_SLOW_QUERY_MS vão para o log com a rota que as
+      executou (ou "fora de requisição": comandos flask, threads de fundo);
+    - o tempo total de SQL de cada requisição vai para o /metrics, por rota,
+      e para o log em nível DEBUG;
+    - com SQL_QUERY_GUARD ligado, toda resposta recebe os cabeçalhos
+      X-SQL-Queries e X-SQL-Time (ms) e as rotas que executam mais de
+      SQL_QUERY_LIMIT comandos são registradas no log (sinal típico de
+      consultas N+1 em templates).
+    """
+
+    def __init__(self, app=None):
+        self.slow_query_seconds = float('inf')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_QUERY_GUARD', app.debug)
+        app.config.setdefault('SQL_QUERY_LIMIT', 20)
+        app.config.setdefault('SQL_SLOW_QUERY_MS', 500)
+        # 0 desliga o log de consultas lentas
+        self.slow_query_seconds = app.config['SQL_SLOW_QUERY_MS'] / 1000 or float('inf')
+        if not event.contains(Engine, 'before_cursor_execute', _on_execute):
+            event.listen(Engine, 'before_cursor_execute', _on_execute)
+        if not event.contains(Engine, 'after_cursor_execute', _after_execute):
+            event.listen(Engine, 'after_cursor_execute', _after_execute)
+        app.after_request(self._check_request)
+        app.extensions['query_guard'] = self
+
+    @staticmethod
+    def _check_request(response):
+        count = g.get('sql_query_count', 0)
+        seconds = g.get('sql_seconds', 0.0)
+        if count:
+            metrics.sql_seconds.labels(request.endpoint or 'nao_encontrado').observe(seconds)
+            logger.debug(f"Rota {request.endpoint}: {count} comandos SQL em {seconds * 1000:.1f} ms")
+        if not current_app.config['SQL_QUERY_GUARD']:
+            return response
+        limit = current_app.config['SQL_QUERY_LIMIT']
+        response.headers['X-SQL-Queries'] = str(count)
+        response.headers['X-SQL-Time'] = f'{seconds * 1000:.1f}'
+        if count > limit:
+            logger.warning(f"Rota {request.endpoint} ({request.path}) executou {count} comandos SQL (limite {limit})")
+        return response
+
+
+query_guard = QueryGuard()
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def render_key(template_digest, clausulas_digest, replacements):
+    """Hash das entradas que determinam o .docx: modelo, cláusulas e substituições já resolvidas."""
+    payload = json.dumps(
+        [template_digest, clausulas_digest, sorted((key, str(value)) for key, value in replacements.items())],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RenderLRU:
+    """Documentos renderizados recentemente (bytes), indexados pela chave de renderização.
+
+    Limitado por número de itens e por total de bytes; usado no modo RENDER_ON_DOWNLOAD.
+    """
+
+    def __init__(self, max_items=32, max_bytes=64 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            while len(self._items) > self.max_items or self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+
+# Documentos renderizados no modo RENDER_ON_DOWNLOAD (tamanho ajustado por RENDER_CACHE_SIZE)
+rendered_documents = RenderLRU()
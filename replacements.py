@@ -0,0 +1,114 @@
+# Montagem do dicionário de substituições do modelo de edital, compartilhada
+# pelas rotas de geração/edição e pelo comando `flask generate-batch`
+
+
+def processar_tipo_participacao(tipo_participacao):
+    if tipo_participacao == 'ampla':
+        return '''1( X ) LICITAÇÃO DE AMPLA PARTICIPAÇÃO.
+O item 2.1 alínea "b" das Condições Específicas do Edital não é aplicável.
+
+2(   ) LICITAÇÃO DE PARTICIPAÇÃO EXCLUSIVA DE MICROEMPRESAS, EMPRESAS DE PEQUENO PORTE OU COOPERATIVAS QUE PREENCHAM AS CONDIÇÕES ESTABELECIDAS NO ARTIGO 34 DA LEI FEDERAL Nº 11.488, DE 15/06/2007.'''
+    
+    elif tipo_participacao == 'exclusiva':
+        return '''1(   ) LICITAÇÃO DE AMPLA PARTICIPAÇÃO.
+O item 2.1 alínea "b" das Condições Específicas do Edital não é aplicável.
+
+2( X ) LICITAÇÃO DE PARTICIPAÇÃO EXCLUSIVA DE MICROEMPRESAS, EMPRESAS DE PEQUENO PORTE OU COOPERATIVAS QUE PREENCHAM AS CONDIÇÕES ESTABELECIDAS NO ARTIGO 34 DA LEI FEDERAL Nº 11.488, DE 15/06/2007.'''
+    
+    return ''
+
+
+# Placeholder do modelo -> (campos do Edital dos quais o valor depende, função que calcula o valor).
+# 'username' é o nome do criador do edital (não é coluna do Edital), em todos os caminhos: geração,
+# edição e renderização no download (RENDER_ON_DOWNLOAD), para o documento e o ETag não dependerem
+# de quem o gerou. Ao editar um edital, só os placeholders que dependem dos campos alterados
+# precisam ser recalculados (ver placeholders_afetados).
+PLACEHOLDERS = {
+    '{{ numero_pregao }}': (('numero_pregao',), lambda edital, clausulas_data, username: edital.numero_pregao),
+    '{{ objeto_servicos }}': (('objeto_servicos',), lambda edital, clausulas_data, username: edital.objeto_servicos),
+    '{{ compras_gov_numero }}': (('compras_gov_numero',), lambda edital, clausulas_data, username: str(edital.compras_gov_numero) if edital.compras_gov_numero else ''),
+    '{{ valor_total_contratacao }}': (('valor_total_orcamento',), lambda edital, clausulas_data, username: str(edital.valor_total_orcamento) if edital.valor_total_orcamento else ''),
+    '{{ critério_julgamento_resumo }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['criterio_julgamento'].get(edital.criterio_julgamento, '').upper()),
+    '{{ item_grupo_global_resumo }}': (('aplicacao_criterio',), lambda edital, clausulas_data, username: clausulas_data['aplicacao_criterio'].get(edital.aplicacao_criterio, '').upper()),
+    '{{ modo_disputa_resumo }}': (('modo_disputa',), lambda edital, clausulas_data, username: clausulas_data['modo_disputa'].get(edital.modo_disputa, '').upper()),
+    '{{ data_sessao }}': (('data_sessao',), lambda edital, clausulas_data, username: edital.data_sessao.strftime('%d/%m/%Y') if edital.data_sessao else ''),
+    '{{ hora_sessao }}': (('hora_sessao',), lambda edital, clausulas_data, username: edital.hora_sessao if edital.hora_sessao else ''),
+    '{{ clausula_participacao }}': (('tipo_participacao',), lambda edital, clausulas_data, username: processar_tipo_participacao(edital.tipo_participacao)),
+    '{{ data_disponibilidade }}': (('data_disponibilidade',), lambda edital, clausulas_data, username: edital.data_disponibilidade.strftime('%d/%m/%Y') if edital.data_disponibilidade else ''),
+    '{{ documento_tecnico }}': (('documento_tecnico_nome', 'documento_tecnico_sim_nao'), lambda edital, clausulas_data, username: edital.documento_tecnico_nome if edital.documento_tecnico_sim_nao == 'sim' and edital.documento_tecnico_nome else '(QUANDO COUBER)'),
+    '{{ licitação_ampla }}': (('tipo_participacao',), lambda edital, clausulas_data, username: 'X' if edital.tipo_participacao == 'ampla' else ''),
+    '{{ licitação_micro }}': (('tipo_participacao',), lambda edital, clausulas_data, username: 'X' if edital.tipo_participacao == 'micro' else ''),
+    '{{ numero_licitacao_anexo1 }}': (('numero_licitacao_anexo1',), lambda edital, clausulas_data, username: str(edital.numero_licitacao_anexo1) if edital.numero_licitacao_anexo1 else ''),
+    '{{ objeto_licitacao_anexo1 }}': (('objeto_licitacao_anexo1',), lambda edital, clausulas_data, username: edital.objeto_licitacao_anexo1),
+    '{{ declaração_rec_judicial }}': (('incluir_rec_judicial',), lambda edital, clausulas_data, username: clausulas_data['declaracoes_anexo1']['recuperacao_judicial'] if edital.incluir_rec_judicial else ''),
+    '{{ declaração_rec_extrajudicial }}': (('incluir_rec_extrajudicial',), lambda edital, clausulas_data, username: clausulas_data['declaracoes_anexo1']['recuperacao_extrajudicial'] if edital.incluir_rec_extrajudicial else ''),
+    '{{ declaração_me_epp }}': (('incluir_me_epp',), lambda edital, clausulas_data, username: clausulas_data['declaracoes_anexo1']['micro_empresa_epp'] if edital.incluir_me_epp else ''),
+    '{{ declaração_cadmadeira }}': (('incluir_cadmadeira',), lambda edital, clausulas_data, username: clausulas_data['declaracoes_anexo1']['cadmadeira'] if edital.incluir_cadmadeira else ''),
+    '{{ maior_desconto }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['criterio_julgamento']['maior_desconto'] if edital.criterio_julgamento == 'maior_desconto' else ''),
+    '{{ menor_preço }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['criterio_julgamento']['menor_preco'] if edital.criterio_julgamento == 'menor_preco' else ''),
+    '{{ participação_cooperativas }}': (('permitido_cooperativa',), lambda edital, clausulas_data, username: clausulas_data['permitido_cooperativa'].get(edital.permitido_cooperativa, '')),
+    '{{ participação_consorcio }}': (('participacao_consorcio',), lambda edital, clausulas_data, username: clausulas_data['participacao_consorcio'].get(edital.participacao_consorcio, '')),
+    '{{ não_participação_consorcio }}': (('participacao_consorcio',), lambda edital, clausulas_data, username: clausulas_data['nao_participacao_consorcio'] if edital.participacao_consorcio == 'nao' else ''),
+    '{{ proposta_maior_desconto }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['proposta_maior_desconto'] if edital.criterio_julgamento == 'maior_desconto' else ''),
+    '{{ com_material }}': (('diferencial_aliquota',), lambda edital, clausulas_data, username: clausulas_data['diferencial_aliquota'].get(edital.diferencial_aliquota, '')),
+    '{{ prova_regularidade_fical }}': (('regularidade_fiscal',), lambda edital, clausulas_data, username: clausulas_data['regularidade_fiscal'].get(edital.regularidade_fiscal, '')),
+    '{{ qualificação_tecnica }}': (('qualificacao_tecnica',), lambda edital, clausulas_data, username: clausulas_data['qualificacao_tecnica'].get(edital.qualificacao_tecnica, '')),
+    '{{ exigência_prazo }}': (('atestados_qualificacao_tecnica',), lambda edital, clausulas_data, username: clausulas_data['atestados_qualificacao_tecnica'].get(edital.atestados_qualificacao_tecnica, '')),
+    '{{ visita_tecnica }}': (('permite_visita_tecnica',), lambda edital, clausulas_data, username: clausulas_data['permite_visita_tecnica'].get(edital.permite_visita_tecnica, '')),
+    '{{ certidão_negativa }}': (('qualificacao_economico_financeira',), lambda edital, clausulas_data, username: clausulas_data['qualificacao_economico_financeira']['exigir']['certidao_negativa'] if edital.qualificacao_economico_financeira == 'exigir' else ''),
+    '{{ balanço_patrimonial }}': (('qualificacao_economico_financeira',), lambda edital, clausulas_data, username: clausulas_data['qualificacao_economico_financeira']['exigir']['balanco_patrimonial'] if edital.qualificacao_economico_financeira == 'exigir' else clausulas_data['qualificacao_economico_financeira']['nao_exigir']['balanco_patrimonial']),
+    '{{ índice_liquidez }}': (('qualificacao_economico_financeira',), lambda edital, clausulas_data, username: clausulas_data['qualificacao_economico_financeira']['exigir']['indice_liquidez'] if edital.qualificacao_economico_financeira == 'exigir' else ''),
+    '{{ patrimônio_liquido }}': (('qualificacao_economico_financeira',), lambda edital, clausulas_data, username: clausulas_data['qualificacao_economico_financeira']['exigir']['patrimonio_liquido'] if edital.qualificacao_economico_financeira == 'exigir' else ''),
+    '{{ valor_percentual }}': ((), lambda edital, clausulas_data, username: clausulas_data['valor_percentual']),
+    '{{ aberto_fechado_ambos }}': (('modo_disputa',), lambda edital, clausulas_data, username: clausulas_data['modo_disputa'].get(edital.modo_disputa, '').upper()),
+    '{{ maior_menor_pregao }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['julgamento_pregao'].get(edital.criterio_julgamento, '')),
+    '{{ oferta_julgamento_resumo }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['oferta_julgamento_resumo'].get(edital.criterio_julgamento, '')),
+    '{{ menor_maior_oferta }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['menor_maior_oferta'].get(edital.criterio_julgamento, '')),
+    '{{ maior_desconto_escolha }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['contratacao_escolha']['maior_desconto'] if edital.criterio_julgamento == 'maior_desconto' else ''),
+    '{{ menor-preço_escolha }}': (('criterio_julgamento',), lambda edital, clausulas_data, username: clausulas_data['contratacao_escolha']['menor_preco'] if edital.criterio_julgamento == 'menor_preco' else ''),
+    '{{ garantia_execução }}': (('garantia_sim_nao',), lambda edital, clausulas_data, username: clausulas_data['garantia_execucao'].get(edital.garantia_sim_nao, '')),
+    '{{ sub_contratação }}': (('subcontratacao',), lambda edital, clausulas_data, username: clausulas_data['subcontratacao'].get(edital.subcontratacao, '')),
+    '{{ cooperativa_gestor }}': (('permitido_cooperativa',), lambda edital, clausulas_data, username: clausulas_data['permitido_cooperativa'].get(edital.permitido_cooperativa, '') if edital.permitido_cooperativa == 'sim' else ''),
+    '{{ certidão_negativa_administrador }}': (('qualificacao_economico_financeira',), lambda edital, clausulas_data, username: clausulas_data['certidao_negativa_administrador'] if edital.qualificacao_economico_financeira == 'exigir' else ''),
+    '{{ madeira }}': (('cad_madeira',), lambda edital, clausulas_data, username: clausulas_data['cad_madeira_detalhe'] if edital.cad_madeira == 'sim' else ''),
+    '{{ fiscalização_inspecao }}': (('fiscalizacao_inspecao',), lambda edital, clausulas_data, username: clausulas_data['fiscalizacao_inspecao_contrato'].get(edital.fiscalizacao_inspecao, '')),
+    '{{ orçamento_sigiloso }}': (('orcamento_sigiloso',), lambda edital, clausulas_data, username: clausulas_data['orcamento_sigiloso_texto'] if edital.orcamento_sigiloso == 'sim' else ''),
+    '{{ edital_condicionais.isento_icms_completa }}': ((), lambda edital, clausulas_data, username: ''),
+    '{{ email_contato1 }}': (('email_contato1',), lambda edital, clausulas_data, username: edital.email_contato1 if edital.email_contato1 else 'email1@exemplo.com'),
+    '{{ email_contato2 }}': (('email_contato2',), lambda edital, clausulas_data, username: edital.email_contato2 if edital.email_contato2 else 'email2@exemplo.com'),
+    '{{ nome }}': (('username',), lambda edital, clausulas_data, username: username),
+    '{{ cargo }}': ((), lambda edital, clausulas_data, username: 'Gerente de Projetos'),
+    '{{ instrumento_contratual }}': (('tipo_instrumento_contratual',), lambda edital, clausulas_data, username: clausulas_data['tipo_instrumento_contratual_contrato'].get(edital.tipo_instrumento_contratual, '')),
+    '{{ regime_empreitada }}': (('regime_empreitada',), lambda edital, clausulas_data, username: clausulas_data['regime_empreitada_contrato'].get(edital.regime_empreitada, '')),
+    '{{ prazos_execucao }}': (('prazos_execucao',), lambda edital, clausulas_data, username: clausulas_data['prazos_execucao_contrato'].get(edital.prazos_execucao, '')),
+    '{{ tipo_instrumento_contratual }}': (('tipo_instrumento_contratual',), lambda edital, clausulas_data, username: clausulas_data['tipo_instrumento_contratual_contrato'].get(edital.tipo_instrumento_contratual, '')),
+    '{{ prorrogacao_contrato }}': (('prorrogacao_contrato',), lambda edital, clausulas_data, username: clausulas_data['prorrogacao_contrato_contrato'].get(edital.prorrogacao_contrato, '')),
+    '{{ medicao_servicos }}': (('medicao_servicos',), lambda edital, clausulas_data, username: clausulas_data['medicao_servicos_contrato'].get(edital.medicao_servicos, '')),
+    '{{ fiscalizacao_inspecao }}': (('fiscalizacao_inspecao',), lambda edital, clausulas_data, username: clausulas_data['fiscalizacao_inspecao_contrato'].get(edital.fiscalizacao_inspecao, '')),
+    '{{ consequencias_rescisao }}': (('consequencias_rescisao',), lambda edital, clausulas_data, username: clausulas_data['consequencias_rescisao_contrato'].get(edital.consequencias_rescisao, '')),
+    '{{ suspensao_temporaria_servicos }}': (('suspensao_temporaria_servicos',), lambda edital, clausulas_data, username: clausulas_data['suspensao_temporaria_servicos_contrato'].get(edital.suspensao_temporaria_servicos, '')),
+    '{{ aceitacao_servicos }}': (('aceitacao_servicos',), lambda edital, clausulas_data, username: clausulas_data['aceitacao_servicos_contrato'].get(edital.aceitacao_servicos, '')),
+    '{{ garantia_servicos }}': (('garantia_servicos',), lambda edital, clausulas_data, username: clausulas_data['garantia_servicos_contrato'].get(edital.garantia_servicos, '')),
+    '{{ nome_usuario }}': (('username',), lambda edital, clausulas_data, username: username),
+    '{{ cargo_usuario }}': ((), lambda edital, clausulas_data, username: 'Analista'),
+}
+
+# Campo -> placeholders que dependem dele
+FIELD_PLACEHOLDERS = {}
+for _placeholder, (_fields, _) in PLACEHOLDERS.items():
+    for _field in _fields:
+        FIELD_PLACEHOLDERS.setdefault(_field, set()).add(_placeholder)
+
+
+def build_replacements(edital, clausulas_data, username, placeholders=None):
+    """Mapeia os campos do edital (e as cláusulas escolhidas) para os placeholders do DOCX.
+
+    Com `placeholders`, calcula só esses (os demais não entram no dicionário).
+    """
+    names = PLACEHOLDERS if placeholders is None else placeholders
+    return {name: PLACEHOLDERS[name][1](edital, clausulas_data, username) for name in names}
+
+
+def placeholders_afetados(fields):
+    """Placeholders cujo valor pode mudar quando estes campos (ou 'username') mudam."""
+    return set().union(*(FIELD_PLACEHOLDERS.get(field, ()) for field in fields))
@@ -0,0 +1,260 @@
+import logging
+import re
+import sqlite3
+import unicodedata
+
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Edital
+
+logger = logging.getLogger(__name__)
+
+# Campos de texto livre indexados, na ordem das colunas do índice
+SEARCH_FIELDS = ('form_name', 'numero_pregao', 'objeto_servicos', 'objeto_licitacao_anexo1')
+
+# SQLite: tabela virtual FTS5 (rowid = edital.id) com o texto já normalizado pela fts_normalize
+FTS_TABLE = 'edital_fts'
+# Pesos do bm25 por coluna: nome e número do pregão valem mais que os textos longos
+FTS_WEIGHTS = (10.0, 10.0, 2.0, 1.0)
+
+# PostgreSQL: tsvector com o dicionário 'portuguese' (stemming) em uma tabela ligada ao edital, com índice GIN
+PG_TABLE = 'edital_busca'
+PG_WEIGHTS = ('A', 'A', 'B', 'C')
+# translate() remove os acentos no próprio banco, sem depender da extensão unaccent
+PG_ACCENTS = 'áàâãäéèêëíìîïóòôõöúùûüçñ'
+PG_PLAIN = 'aaaaaeeeeiiiiooooouuuucn'
+
+# Plurais do português (texto já sem acentos), verificados nesta ordem
+PLURAL_SUFFIXES = (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'), ('res', 'r'), ('ns', 'm'))
+
+# Palavras frequentes demais para distinguir editais (sem acentos), ignoradas no índice e na busca
+STOPWORDS = frozenset('''
+    a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelas pelo pelos por que se sem um uma
+'''.split())
+
+# Acima deste número de editais encontrados, a busca não ordena por relevância
+SEARCH_RANK_MAX_MATCHES = 20000
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+# Bancos em que o índice já foi verificado/criado neste processo
+_ready = set()
+
+
+def fold(value):
+    """Minúsculas e sem acentos ('Licitação' -> 'licitacao')."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def stem(word):
+    """Stemmer leve para o português: remove o plural e a vogal temática final.
+
+    Não é um stemmer completo (como o RSLP), mas junta as variações comuns
+    ('licitação', 'licitações'; 'serviço', 'serviços'; 'contratado', 'contratada').
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 1:
+            word = word[:-len(suffix)] + replacement
+            break
+    else:
+        if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+            word = word[:-1]
+    if len(word) > 4 and word[-1] in 'aeo':
+        word = word[:-1]
+    return word
+
+
+def tokenize(value):
+    return [stem(token) for token in _TOKEN_RE.findall(fold(value)) if token not in STOPWORDS]
+
+
+def fts_normalize(value):
+    """Texto gravado no índice FTS5 (registrada como função SQL no SQLite)."""
+    return ' '.join(tokenize(value))
+
+
+@event.listens_for(Engine, 'connect')
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('fts_normalize', 1, fts_normalize, deterministic=True)
+
+
+def _is_postgres(connection):
+    return connection.dialect.name == 'postgresql'
+
+
+def _pg_document_sql():
+    parts = [
+        f"setweight(to_tsvector('portuguese', translate(lower(coalesce({field}, '')), '{PG_ACCENTS}', '{PG_PLAIN}')), '{weight}')"
+        for field, weight in zip(SEARCH_FIELDS, PG_WEIGHTS)
+    ]
+    return ' || '.join(parts)
+
+
+def create_search_index(connection):
+    if _is_postgres(connection):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+            f"edital_id INTEGER PRIMARY KEY REFERENCES edital (id) ON DELETE CASCADE, "
+            f"documento TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{PG_TABLE}_documento ON {PG_TABLE} USING GIN (documento)"))
+    else:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{', '.join(SEARCH_FIELDS)}, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+
+
+def drop_search_index(connection):
+    connection.execute(text(f"DROP TABLE IF EXISTS {PG_TABLE if _is_postgres(connection) else FTS_TABLE}"))
+    _ready.discard(str(connection.engine.url))
+
+
+def ensure_search_index(connection):
+    """Cria e preenche o índice na primeira vez que o banco é usado sem ele (bancos anteriores à busca)."""
+    key = str(connection.engine.url)
+    if key in _ready:
+        return
+    table = PG_TABLE if _is_postgres(connection) else FTS_TABLE
+    if not inspect(connection).has_table(table):
+        logger.info(f"Criando o índice de busca '{table}'")
+        create_search_index(connection)
+        rebuild_search_index(connection)
+    _ready.add(key)
+
+
+def _index_ids(connection, ids=None):
+    """Reescreve a entrada no índice dos editais `ids` (todos, se None) a partir da tabela edital."""
+    where = ' WHERE id IN :ids' if ids is not None else ''
+    params = {'ids': list(ids)} if ids is not None else {}
+    if _is_postgres(connection):
+        statement = text(
+            f"INSERT INTO {PG_TABLE} (edital_id, documento) SELECT id, {_pg_document_sql()} FROM edital{where} "
+            f"ON CONFLICT (edital_id) DO UPDATE SET documento = EXCLUDED.documento"
+        )
+    else:
+        _unindex_ids(connection, ids)
+        columns = ', '.join(f'fts_normalize({field})' for field in SEARCH_FIELDS)
+        statement = text(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) SELECT id, {columns} FROM edital{where}"
+        )
+    if ids is not None:
+        statement = statement.bindparams(bindparam('ids', expanding=True))
+    connection.execute(statement, params)
+
+
+def _unindex_ids(connection, ids=None):
+    if _is_postgres(connection):
+        statement = text(f"DELETE FROM {PG_TABLE}" + (' WHERE edital_id IN :ids' if ids is not None else ''))
+    else:
+        statement = text(f"DELETE FROM {FTS_TABLE}" + (' WHERE rowid IN :ids' if ids is not None else ''))
+    if ids is not None:
+        statement = statement.bindparams(bindparam('ids', expanding=True))
+    connection.execute(statement, {'ids': list(ids)} if ids is not None else {})
+
+
+def rebuild_search_index(connection):
+    """Recria todas as entradas do índice. Retorna o número de editais indexados."""
+    create_search_index(connection)
+    _unindex_ids(connection)
+    _index_ids(connection)
+    return connection.execute(text('SELECT count(*) FROM edital')).scalar()
+
+
+def unindex_creator(session, creator_id):
+    """Remove do índice os editais de um usuário (para exclusões em lote, que não passam pelo flush)."""
+    connection = session.connection()
+    ensure_search_index(connection)
+    table, key = (PG_TABLE, 'edital_id') if _is_postgres(connection) else (FTS_TABLE, 'rowid')
+    connection.execute(
+        text(f"DELETE FROM {table} WHERE {key} IN (SELECT id FROM edital WHERE creator_id = :creator_id)"),
+        {'creator_id': creator_id},
+    )
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    # Mantém o índice na mesma transação das alterações dos editais
+    changed = set()
+    removed = set()
+    for obj in session.new:
+        if isinstance(obj, Edital):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Edital):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in SEARCH_FIELDS):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Edital):
+            removed.add(obj.id)
+    if not changed and not removed:
+        return
+    connection = session.connection()
+    ensure_search_index(connection)
+    if removed:
+        _unindex_ids(connection, removed)
+    if changed:
+        _index_ids(connection, changed)
+
+
+def search(session, query_text, creator_id=None, limit=50):
+    """Ids dos editais que contêm todos os termos da busca, do mais relevante para o menos.
+
+    O último termo é buscado como prefixo (o usuário pode estar digitando).
+    Com creator_id, só os editais daquele usuário. Ordenar por relevância
+    custa proporcionalmente ao número de editais encontrados; acima de
+    SEARCH_RANK_MAX_MATCHES (termos presentes em quase todos os editais)
+    os resultados vêm dos mais recentes para os mais antigos.
+    """
+    connection = session.connection()
+    ensure_search_index(connection)
+    params = {'limit': limit}
+    creator_filter = ''
+    if creator_id is not None:
+        creator_filter = ' AND edital.creator_id = :creator_id'
+        params['creator_id'] = creator_id
+
+    if _is_postgres(connection):
+        terms = [term for term in _TOKEN_RE.findall(fold(query_text)) if term not in STOPWORDS]
+        if not terms:
+            return []
+        params['query'] = ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+        table, key = PG_TABLE, f'{PG_TABLE}.edital_id'
+        match = f"{PG_TABLE}.documento @@ to_tsquery('portuguese', :query)"
+        rank = f"ts_rank_cd({PG_TABLE}.documento, to_tsquery('portuguese', :query)) DESC"
+    else:
+        terms = tokenize(query_text)
+        if not terms:
+            return []
+        params['query'] = ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+        table, key = FTS_TABLE, f'{FTS_TABLE}.rowid'
+        match = f"{FTS_TABLE} MATCH :query"
+        rank = f"bm25({FTS_TABLE}, {', '.join(str(weight) for weight in FTS_WEIGHTS)})"
+
+    matches = connection.execute(text(f"SELECT count(*) FROM {table} WHERE {match}"), params).scalar()
+    if not matches:
+        return []
+    # Ordenar pela chave do próprio índice deixa o FTS5 entregar os ids já em ordem decrescente
+    order = f"{rank}, {key} DESC" if matches <= SEARCH_RANK_MAX_MATCHES else f"{key} DESC"
+    statement = text(
+        f"SELECT edital.id FROM {table} JOIN edital ON edital.id = {key} "
+        f"WHERE {match}{creator_filter} ORDER BY {order} LIMIT :limit"
+    )
+    return connection.execute(statement, params).scalars().all()
+
+
+@event.listens_for(Edital.__table__, 'after_create')
+def _create_with_table(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(Edital.__table__, 'before_drop')
+def _drop_with_table(target, connection, **kw):
+    drop_search_index(connection)
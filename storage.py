@@ -0,0 +1,246 @@
+import os
+import re
+import tempfile
+import threading
+from collections import namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+from flask import send_file
+
+# Chaves novas: hash de renderização + extensão. Chaves fora desse formato são nomes de
+# arquivos anteriores ao particionamento e ficam na raiz do armazenamento.
+KEY_RE = re.compile(r'^[0-9a-f]{64}\.[a-z]+$')
+
+# Item listado pelo armazenamento (usado na coleta de órfãos)
+StoredObject = namedtuple('StoredObject', ['key', 'size', 'mtime'])
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def document_key(render_key, extension='docx'):
+    """Chave de armazenamento do documento gerado a partir da chave de renderização."""
+    return f"{render_key}.{extension}"
+
+
+def _check_key(key):
+    if not key or '/' in key or '\\' in key or key.startswith('.'):
+        raise ValueError(f"chave de armazenamento inválida: {key!r}")
+
+
+def open_storage(url):
+    """Armazenamento configurado por STORAGE_URL (uma instância por processo).
+
+    - caminho local (ex.: /srv/edital-app/generated_editals): LocalStorage
+    - s3://bucket/prefixo?endpoint=http://localhost:9000: S3Storage (o
+      endpoint é opcional; use-o para MinIO ou outro serviço compatível)
+    """
+    with _storages_lock:
+        storage = _storages.get(url)
+        if storage is None:
+            storage = _storages[url] = _create_storage(url)
+        return storage
+
+
+def _create_storage(url):
+    if url.startswith('s3://'):
+        parsed = urlsplit(url)
+        prefix = parsed.path.strip('/')
+        endpoint_url = parse_qs(parsed.query).get('endpoint', [None])[0]
+        return S3Storage(parsed.netloc, prefix + '/' if prefix else '', endpoint_url=endpoint_url)
+    return LocalStorage(url)
+
+
+class LocalStorage:
+    """Documentos em disco, particionados pelo prefixo do hash (ab/cd/abcd....docx).
+
+    A gravação é atômica: o conteúdo vai para um arquivo temporário na mesma
+    pasta, renomeado no final (gerações simultâneas da mesma chave não se
+    atrapalham e ninguém lê um arquivo pela metade).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        _check_key(key)
+        if KEY_RE.match(key):
+            return os.path.join(self.root, key[:2], key[2:4], key)
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def touch(self, key):
+        """Renova a data de modificação; False se o documento não existe."""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def mtime(self, key):
+        try:
+            return os.path.getmtime(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def write(self, key, save):
+        """Grava a chave com `save(arquivo_binario)` (ex.: document.save)."""
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                save(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, key):
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    def open(self, key):
+        """Arquivo binário para leitura em blocos (FileNotFoundError se não existir)."""
+        return open(self.path(key), 'rb')
+
+    def send(self, key, download_name, mimetype=None):
+        return send_file(self.path(key), as_attachment=True, download_name=download_name, mimetype=mimetype)
+
+    def delete(self, key):
+        os.remove(self.path(key))
+
+    def quarantine(self, key, destination):
+        """Move a chave para a pasta `destination` em vez de apagar."""
+        os.makedirs(destination, exist_ok=True)
+        os.replace(self.path(key), os.path.join(destination, key))
+
+    def iter_objects(self):
+        """Percorre todos os documentos em streaming (temporários em gravação são ignorados)."""
+        yield from self._scan(self.root, depth=0)
+
+    def _scan(self, directory, depth):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth < 2 and len(entry.name) == 2:
+                            yield from self._scan(entry.path, depth + 1)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        yield StoredObject(entry.name, stat.st_size, stat.st_mtime)
+                except FileNotFoundError:
+                    continue # removido durante a leitura
+
+
+class S3Storage:
+    """Documentos em um bucket S3 (ou compatível, como o MinIO), particionados por 'ab/'.
+
+    Um PUT no S3 só torna o objeto visível depois de completo, então a
+    gravação também é atômica. Precisa do pacote boto3; as credenciais vêm
+    da configuração padrão do boto3 (AWS_ACCESS_KEY_ID etc.).
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError('O armazenamento S3 precisa do pacote boto3 (pip install boto3).') from e
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+        self._client_error = ClientError
+
+    def name(self, key):
+        _check_key(key)
+        shard = f"{key[:2]}/" if KEY_RE.match(key) else ''
+        return f"{self.prefix}{shard}{key}"
+
+    @staticmethod
+    def _not_found(error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.name(key))
+        except self._client_error as e:
+            if self._not_found(e):
+                return False
+            raise
+        return True
+
+    def touch(self, key):
+        # Cópia do objeto sobre ele mesmo: renova o LastModified usado pela coleta de órfãos
+        name = self.name(key)
+        try:
+            self.client.copy_object(Bucket=self.bucket, Key=name, CopySource={'Bucket': self.bucket, 'Key': name},
+                                    MetadataDirective='REPLACE')
+        except self._client_error as e:
+            if self._not_found(e):
+                return False
+            raise # sem permissão, limite de requisições...: não é motivo para renderizar de novo
+        return True
+
+    def mtime(self, key):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.name(key))
+        except self._client_error as e:
+            if self._not_found(e):
+                return None
+            raise
+        return response['LastModified'].timestamp()
+
+    def write(self, key, save):
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+            save(buffer)
+            buffer.seek(0)
+            self.client.upload_fileobj(buffer, self.bucket, self.name(key))
+
+    def read(self, key):
+        with self.open(key) as body:
+            return body.read()
+
+    def open(self, key):
+        """Corpo do objeto para leitura em blocos (FileNotFoundError se não existir)."""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.name(key))['Body']
+        except self._client_error as e:
+            raise FileNotFoundError(key) from e
+
+    def send(self, key, download_name, mimetype=None):
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self.name(key))
+        except self._client_error as e:
+            raise FileNotFoundError(key) from e
+        response = send_file(obj['Body'], as_attachment=True, download_name=download_name, mimetype=mimetype,
+                             last_modified=obj.get('LastModified'))
+        response.content_length = obj.get('ContentLength')
+        return response
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.name(key))
+
+    def quarantine(self, key, destination):
+        """Copia a chave para o prefixo `destination` e apaga o original."""
+        name = self.name(key)
+        self.client.copy_object(Bucket=self.bucket, Key=f"{destination.strip('/')}/{key}",
+                                CopySource={'Bucket': self.bucket, 'Key': name})
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def iter_objects(self):
+        """Percorre os documentos do prefixo; outros objetos (ex.: quarentena) são ignorados."""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', ()):
+                key = item['Key'][len(self.prefix):].rsplit('/', 1)[-1]
+                # Só o que name(key) produz: chaves antigas na raiz ou hashes na pasta do próprio prefixo
+                if key and not key.startswith('.') and '\\' not in key and self.name(key) == item['Key']:
+                    yield StoredObject(key, item['Size'], item['LastModified'].timestamp())
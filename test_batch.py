@@ -0,0 +1,31 @@
+import pytest
+
+from batch import generate_batch, row_to_values
+from clausulas_store import clausulas_store
+from extensions import db
+from models import Edital, Opcao, User
+
+
+def test_row_to_values_confere_opcoes_com_o_clausulas(app):
+    with app.app_context():
+        assert row_to_values({'form_name': 'Edital', 'modo_disputa': 'aberto'})['modo_disputa'] == 'aberto'
+        with pytest.raises(ValueError, match='modo_disputa'):
+            row_to_values({'form_name': 'Edital', 'modo_disputa': 'X' * 80})
+        # Pré-visualização: a opção inválida só fica vazia
+        assert row_to_values({'modo_disputa': 'X' * 80}, partial=True)['modo_disputa'] is None
+
+
+def test_generate_batch_nao_cadastra_opcao_invalida(app):
+    rows = [
+        {'form_name': 'Edital 1', 'numero_pregao': '1/2026', 'modo_disputa': 'aberto'},
+        {'form_name': 'Edital 2', 'numero_pregao': '2/2026', 'modo_disputa': 'X' * 80},
+    ]
+    with app.app_context():
+        creator = db.session.scalar(db.select(User).filter_by(username='admin'))
+        result = generate_batch(rows, creator, clausulas_store.snapshot(), app.config['MODELO_EDITAL_PATH'],
+                                app.config['STORAGE_URL'], workers=1)
+
+        assert result.created == 1
+        assert [number for number, _ in result.errors] == [2]
+        assert db.session.scalars(db.select(Edital.form_name)).all() == ['Edital 1']
+        assert db.session.scalars(db.select(Opcao.valor)).all() == ['aberto']
@@ -0,0 +1,64 @@
+import io
+import zipfile
+
+import pytest
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from docx_render import CompiledTemplate
+
+# Caixa de texto (VML) dentro de um run: os parágrafos dela ficam aninhados no parágrafo externo
+CAIXA_DE_TEXTO = (
+    f'<w:r {nsdecls("w")} xmlns:v="urn:schemas-microsoft-com:vml"><w:pict><v:shape><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t xml:space="preserve">Sessão às {{ hora_sessao }}</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></v:shape></w:pict></w:r>'
+)
+
+VALORES = {'{{ numero_pregao }}': '12/2026', '{{ objeto_servicos }}': 'Limpeza', '{{ hora_sessao }}': '10:00'}
+
+
+@pytest.fixture
+def modelo(tmp_path):
+    document = Document()
+    paragraph = document.add_paragraph('Pregão ')
+    paragraph.add_run('{{ numero_')
+    paragraph.add_run('pregao }}').bold = True
+    paragraph.add_run(' - ')
+    paragraph._p.append(parse_xml(CAIXA_DE_TEXTO))
+    document.add_paragraph('Objeto: {{ objeto_servicos }} ({{ numero_pregao }})')
+    document.sections[0].header.paragraphs[0].text = 'Edital {{ numero_pregao }}'
+    path = tmp_path / 'modelo.docx'
+    document.save(path)
+    return CompiledTemplate(str(path))
+
+
+def salvar(document):
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def partes_xml(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        return {name: package.read(name) for name in package.namelist() if name.startswith('word/') and name.endswith('.xml')}
+
+
+def test_render_substitui_corpo_caixa_de_texto_e_cabecalho(modelo):
+    document, report = modelo.render(VALORES)
+
+    xml = b''.join(partes_xml(salvar(document)).values()).decode('utf-8')
+    assert '{{' not in xml
+    assert 'Sessão às 10:00' in xml and 'Edital 12/2026' in xml
+    assert report.missing == set() and report.unused == set()
+
+
+def test_patch_igual_a_render_completo(modelo):
+    anterior, _ = modelo.render(VALORES)
+    editados = dict(VALORES, **{'{{ numero_pregao }}': '13/2026'})
+
+    data, missing = modelo.patch(salvar(anterior), editados, ['{{ numero_pregao }}'])
+    completo, _ = modelo.render(editados)
+
+    assert missing == set()
+    assert partes_xml(data) == partes_xml(salvar(completo))
@@ -0,0 +1,71 @@
+import os
+import time
+
+import pytest
+
+from extensions import db
+from file_gc import collect_orphans, file_reaper
+from models import User, Edital
+from storage import document_key, open_storage
+
+
+@pytest.fixture
+def storage(app):
+    app.config['FILE_GC_MIN_AGE'] = 1
+    return open_storage(app.config['STORAGE_URL'])
+
+
+def gravar(storage, nome, idade=0):
+    key = document_key(nome * 64)
+    storage.write(key, lambda f: f.write(b'docx'))
+    if idade:
+        mtime = time.time() - idade
+        os.utime(storage.path(key), (mtime, mtime))
+    return key
+
+
+def criar_edital(app, key):
+    with app.app_context():
+        user = db.session.scalar(db.select(User).filter_by(username='admin'))
+        db.session.add(Edital(form_name='Edital', creator_id=user.id, storage_key=key))
+        db.session.commit()
+
+
+def test_reaper_remove_orfao_antigo(app, storage):
+    key = gravar(storage, 'a', idade=60)
+    file_reaper.enqueue(key)
+    assert file_reaper.join(timeout=5)
+    assert not storage.exists(key)
+
+
+def test_reaper_remove_orfao_recente_depois_de_min_age(app, storage):
+    # Chave de um edital editado/excluído logo depois da geração: não pode ficar para sempre
+    key = gravar(storage, 'b')
+    file_reaper.enqueue(key)
+    time.sleep(0.2)
+    assert storage.exists(key)
+    assert file_reaper.join(timeout=5)
+    assert not storage.exists(key)
+
+
+def test_reaper_mantem_chave_referenciada_antes_do_prazo(app, storage):
+    # Reaproveitada por uma geração que gravou a storage_key enquanto a chave esperava
+    key = gravar(storage, 'c')
+    file_reaper.enqueue(key)
+    criar_edital(app, key)
+    assert file_reaper.join(timeout=5)
+    assert storage.exists(key)
+
+
+def test_collect_orphans(app, storage):
+    referenciada = gravar(storage, 'd', idade=3600)
+    orfa = gravar(storage, 'e', idade=3600)
+    recente = gravar(storage, 'f')
+    criar_edital(app, referenciada)
+
+    with app.app_context():
+        result = collect_orphans(storage, batch_size=2, min_age=600)
+
+    assert (result.scanned, result.orphans, result.bytes, result.errors) == (2, 1, 4, 0)
+    assert storage.exists(referenciada) and storage.exists(recente)
+    assert not storage.exists(orfa)
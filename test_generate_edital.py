@@ -0,0 +1,76 @@
+import io
+
+from docx import Document
+
+from extensions import db
+from forms import OPCOES_CLAUSULAS
+from models import Edital, Opcao, User
+from storage import open_storage
+
+
+def login(client):
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 302
+
+
+def texto_docx(data):
+    return '\n'.join(paragraph.text for paragraph in Document(io.BytesIO(data)).paragraphs)
+
+
+def formulario(**campos):
+    # Como o navegador: todos os campos de cláusula vão no POST, os não escolhidos em branco
+    data = dict.fromkeys(OPCOES_CLAUSULAS, '')
+    data.update({'form_name': 'Edital de limpeza', 'numero_pregao': '12/2026', 'tipo_participacao': 'ampla',
+            'modo_disputa': 'aberto', 'orcamento_sigiloso': 'nao', 'servico_continuo': 'sim',
+            'cad_madeira': 'nao', 'documento_tecnico_sim_nao': 'nao'})
+    data.update(campos)
+    return data
+
+
+def test_gera_edital_com_opcao_do_clausulas(app):
+    client = app.test_client()
+    login(client)
+    response = client.post('/generate_edital', data=formulario())
+    assert response.status_code == 302
+    with app.app_context():
+        edital = db.session.scalar(db.select(Edital))
+        assert edital.modo_disputa == 'aberto'
+
+
+def test_rejeita_opcao_fora_do_clausulas(app):
+    client = app.test_client()
+    login(client)
+    response = client.post('/generate_edital', data=formulario(modo_disputa='X' * 80))
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(Edital)) == 0
+        assert db.session.scalar(db.select(db.func.count()).select_from(Opcao)) == 0
+
+
+def test_edicao_pelo_admin_mantem_o_nome_do_criador(app):
+    with app.app_context():
+        maria = User(username='maria', email='maria@example.com')
+        maria.set_password('senha123')
+        db.session.add(maria)
+        db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'username': 'maria', 'password': 'senha123'})
+    assert client.post('/generate_edital', data=formulario()).status_code == 302
+    with app.app_context():
+        edital_id = db.session.scalar(db.select(Edital.id))
+
+    admin = app.test_client()
+    login(admin)
+    assert admin.post(f'/edit_edital/{edital_id}', data=formulario(numero_pregao='13/2026')).status_code == 302
+    with app.app_context():
+        key = db.session.get(Edital, edital_id).storage_key
+    storage = open_storage(app.config['STORAGE_URL'])
+    assert 'Responsável: maria' in texto_docx(storage.read(key))
+
+    # Renderizado no download: mesmo documento, e o ETag é a chave gravada
+    storage.delete(key)
+    app.config['RENDER_ON_DOWNLOAD'] = True
+    response = admin.get(f'/download_edital/{key}')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'"{key.removesuffix(".docx")}"'
+    assert 'Responsável: maria' in texto_docx(response.data)
@@ -0,0 +1,99 @@
+from datetime import date, datetime
+
+import pytest
+import sqlalchemy as sa
+from flask_migrate import downgrade, upgrade
+
+from extensions import db
+from models import Edital
+
+
+@pytest.fixture
+def banco_antigo(app):
+    """Banco no esquema da revisão 0001 (colunas de texto), como os criados antes do 0002."""
+    with app.app_context():
+        db.drop_all()
+        with db.engine.begin() as connection:
+            for table in sa.inspect(connection).get_table_names():
+                connection.execute(sa.text(f'DROP TABLE IF EXISTS "{table}"'))
+        upgrade(revision='0001')
+        with db.engine.begin() as connection:
+            connection.execute(sa.text(
+                "INSERT INTO user (id, username, email, password, role, version) "
+                "VALUES (1, 'admin', 'admin@example.com', '-', 'admin', 1)"))
+        yield app
+
+
+def inserir(app, **campos):
+    valores = {'form_name': 'Edital', 'data_criacao': datetime(2026, 1, 1), 'creator_id': 1, 'status': 'concluido'}
+    valores.update(campos)
+    with app.app_context(), db.engine.begin() as connection:
+        edital = sa.Table('edital', sa.MetaData(), autoload_with=connection)
+        return connection.execute(edital.insert().values(**valores)).inserted_primary_key[0]
+
+
+def linhas(app, *colunas):
+    with app.app_context(), db.engine.connect() as connection:
+        edital = sa.Table('edital', sa.MetaData(), autoload_with=connection)
+        return [tuple(row) for row in connection.execute(
+            sa.select(*(edital.c[coluna] for coluna in colunas)).order_by(edital.c.id))]
+
+
+def revisao(app):
+    with app.app_context(), db.engine.connect() as connection:
+        return connection.execute(sa.text('SELECT version_num FROM alembic_version')).scalar()
+
+
+COLUNAS = ('id', 'tipo_participacao', 'orcamento_sigiloso', 'cad_madeira', 'status', 'modo_disputa',
+           'data_sessao', 'hora_sessao')
+
+
+def test_ida_e_volta_normaliza_sem_perder_valores(banco_antigo):
+    app = banco_antigo
+    inserir(app, tipo_participacao=' Ampla', orcamento_sigiloso='SIM', cad_madeira='n', status='Pendente ',
+            modo_disputa=' aberto ', data_sessao=date(2026, 3, 10), hora_sessao='10:00',
+            generated_filename='a' * 64 + '.docx', objeto_servicos='Limpeza')
+    inserir(app, tipo_participacao='micro', orcamento_sigiloso='', cad_madeira=None, status=None)
+
+    with app.app_context():
+        upgrade(revision='0002')
+        primeiro, segundo = db.session.scalars(db.select(Edital).order_by(Edital.id)).all()
+        assert (primeiro.tipo_participacao, primeiro.orcamento_sigiloso, primeiro.cad_madeira) == ('ampla', 'sim', 'nao')
+        assert (primeiro.status, primeiro.modo_disputa) == ('pendente', 'aberto')
+        assert (primeiro.data_sessao, primeiro.hora_sessao) == (date(2026, 3, 10), '10:00')
+        assert (primeiro.storage_key, primeiro.objeto_resumo) == ('a' * 64 + '.docx', 'Limpeza')
+        assert (segundo.tipo_participacao, segundo.orcamento_sigiloso, segundo.status) == ('micro', None, None)
+        db.session.rollback()
+
+        downgrade(revision='0001')
+    esperado = [
+        (1, 'ampla', 'sim', 'nao', 'pendente', 'aberto', date(2026, 3, 10), '10:00'),
+        (2, 'micro', None, None, None, None, None, None),
+    ]
+    assert linhas(app, *COLUNAS) == esperado
+    assert linhas(app, 'generated_filename')[0] == ('a' * 64 + '.docx',)
+
+    # Segunda ida: o mesmo resultado da primeira
+    with app.app_context():
+        upgrade(revision='0002')
+        downgrade(revision='0001')
+    assert linhas(app, *COLUNAS) == esperado
+
+
+def test_valor_desconhecido_interrompe_antes_de_alterar(banco_antigo, capfd):
+    app = banco_antigo
+    inserir(app, status='concluido', tipo_participacao='ampla')
+    rascunho = inserir(app, status='rascunho')
+    talvez = inserir(app, cad_madeira='talvez')
+
+    with app.app_context(), pytest.raises(SystemExit):
+        upgrade(revision='0002')
+
+    # O env.py aplica o logging do alembic.ini, que escreve direto no stderr
+    erro = capfd.readouterr().err
+    assert f"edital {rascunho} status='rascunho'" in erro
+    assert f"edital {talvez} cad_madeira='talvez'" in erro
+    assert revisao(app) == '0001'
+    assert linhas(app, 'id', 'status', 'cad_madeira') == [(1, 'concluido', None), (2, 'rascunho', None), (3, 'concluido', 'talvez')]
+    with app.app_context():
+        assert 'opcao' not in sa.inspect(db.engine).get_table_names()
@@ -0,0 +1,52 @@
+from sqlalchemy import event
+
+from column_types import option_codes
+from extensions import db
+from models import Edital, Opcao, User
+
+
+def criar_edital(modo_disputa):
+    user = db.session.scalar(db.select(User).filter_by(username='admin'))
+    edital = Edital(form_name='Edital', creator_id=user.id, modo_disputa=modo_disputa)
+    db.session.add(edital)
+    db.session.flush()
+    return edital.id
+
+
+def test_codigo_novo_so_vale_para_o_processo_depois_do_commit(app):
+    with app.app_context():
+        criar_edital('aberto')
+        assert ('modo_disputa', 'aberto') not in option_codes._codes
+        db.session.commit()
+        assert ('modo_disputa', 'aberto') in option_codes._codes
+
+
+def test_rollback_descarta_codigo_reutilizado(app):
+    with app.app_context():
+        criar_edital('aberto')
+        db.session.rollback()
+        # O SQLite reaproveita o rowid da opção desfeita para a próxima
+        edital_id = criar_edital('sim')
+        db.session.commit()
+        db.session.expunge_all()
+        assert db.session.get(Edital, edital_id).modo_disputa == 'sim'
+        assert ('modo_disputa', 'aberto') not in option_codes._codes
+        assert db.session.scalar(db.select(Opcao.valor)) == 'sim'
+
+
+
+def test_leitura_usa_a_conexao_da_sessao(app):
+    with app.app_context():
+        edital_id = criar_edital('aberto')
+        db.session.commit()
+        option_codes.clear() # como se o código tivesse sido criado por outro processo
+        db.session.expunge_all()
+
+        checkouts = []
+        listener = lambda *args: checkouts.append(args)
+        event.listen(db.engine, 'checkout', listener)
+        try:
+            assert db.session.get(Edital, edital_id).modo_disputa == 'aberto'
+        finally:
+            event.remove(db.engine, 'checkout', listener)
+        assert len(checkouts) == 1
@@ -0,0 +1,54 @@
+import pytest
+
+from extensions import db
+from models import User, Edital
+from query_guard import assert_max_queries
+
+# Comandos SQL por página de listagem, com qualquer número de editais e criadores:
+# usuário logado, página de editais (criador no mesmo SELECT) e, no admin, a lista de usuários do filtro
+LIMITE_LISTAGEM_ADMIN = 3
+LIMITE_DASHBOARD = 2
+
+
+def criar_editais(app, total, criadores):
+    with app.app_context():
+        users = [User(username=f'usuario{i}', email=f'usuario{i}@example.com', password='-') for i in range(criadores)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all(Edital(form_name=f'Edital {i}', numero_pregao=f'{i}/2026', objeto_servicos='Serviços de limpeza',
+                                  creator_id=users[i % criadores].id) for i in range(total))
+        db.session.commit()
+        return users[0].id
+
+
+def login(client, username, password):
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302
+
+
+@pytest.mark.parametrize('total', [3, 120])
+def test_listagem_admin_sem_consulta_por_edital(app, total):
+    criar_editais(app, total, criadores=10)
+    client = app.test_client()
+    login(client, 'admin', 'admin123')
+
+    with assert_max_queries(LIMITE_LISTAGEM_ADMIN):
+        response = client.get('/admin/editals')
+    assert response.status_code == 200
+    assert b'usuario1' in response.data
+
+
+@pytest.mark.parametrize('total', [3, 120])
+def test_dashboard_sem_consulta_por_edital(app, total):
+    user_id = criar_editais(app, total, criadores=1)
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.set_password('senha123')
+        db.session.commit()
+    client = app.test_client()
+    login(client, 'usuario0', 'senha123')
+
+    with assert_max_queries(LIMITE_DASHBOARD):
+        response = client.get('/dashboard')
+    assert response.status_code == 200
+    assert f'Edital {total - 1}'.encode() in response.data
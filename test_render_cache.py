@@ -0,0 +1,88 @@
+from extensions import db
+from metrics import metrics
+from models import Edital
+from render_cache import RenderLRU, render_key, rendered_documents
+from storage import open_storage
+from test_generate_edital import formulario, login
+
+
+def jobs(result):
+    return metrics.registry.get_sample_value('edital_generation_jobs_total', {'result': result}) or 0
+
+
+def chaves(app):
+    with app.app_context():
+        return db.session.scalars(db.select(Edital.storage_key).order_by(Edital.id)).all()
+
+
+def test_render_key():
+    replacements = {'{{ a }}': 'x', '{{ b }}': 1}
+    key = render_key('modelo', 'clausulas', replacements)
+    assert key == render_key('modelo', 'clausulas', {'{{ b }}': '1', '{{ a }}': 'x'})
+    assert key != render_key('outro modelo', 'clausulas', replacements)
+    assert key != render_key('modelo', 'outras clausulas', replacements)
+    assert key != render_key('modelo', 'clausulas', {'{{ a }}': 'y', '{{ b }}': 1})
+
+
+def test_editais_identicos_compartilham_o_arquivo(app):
+    client = app.test_client()
+    login(client)
+    antes = jobs('cache')
+    assert client.post('/generate_edital', data=formulario()).status_code == 302
+    assert client.post('/generate_edital', data=formulario(form_name='Cópia')).status_code == 302
+    assert client.post('/generate_edital', data=formulario(numero_pregao='13/2026')).status_code == 302
+
+    primeira, copia, outra = chaves(app)
+    assert primeira == copia != outra
+    assert jobs('cache') == antes + 1
+    storage = open_storage(app.config['STORAGE_URL'])
+    assert sorted(obj.key for obj in storage.iter_objects()) == sorted({primeira, outra})
+
+
+def test_salvar_sem_alteracoes_nao_renderiza(app):
+    client = app.test_client()
+    login(client)
+    client.post('/generate_edital', data=formulario())
+    with app.app_context():
+        edital_id = db.session.scalar(db.select(Edital.id))
+    renderizados = jobs('completo') + jobs('parcial')
+
+    assert client.post(f'/edit_edital/{edital_id}', data=formulario()).status_code == 302
+    # Nome do formulário não entra no documento: mesmo arquivo, sem renderizar
+    assert client.post(f'/edit_edital/{edital_id}', data=formulario(form_name='Outro nome')).status_code == 302
+
+    assert jobs('completo') + jobs('parcial') == renderizados
+    assert len(set(chaves(app))) == 1
+
+
+def test_render_on_download_usa_o_cache(app):
+    app.config['RENDER_ON_DOWNLOAD'] = True
+    client = app.test_client()
+    login(client)
+    client.post('/generate_edital', data=formulario())
+    key, = chaves(app)
+    assert not open_storage(app.config['STORAGE_URL']).exists(key)
+
+    memoria = jobs('memoria')
+    primeira = client.get(f'/download_edital/{key}')
+    segunda = client.get(f'/download_edital/{key}')
+    assert primeira.status_code == segunda.status_code == 200
+    assert primeira.data == segunda.data
+    assert jobs('memoria') == memoria + 1 # a segunda veio do rendered_documents
+    assert rendered_documents.get(key.removesuffix('.docx')) == primeira.data
+
+    etag = primeira.headers['ETag']
+    assert client.get(f'/download_edital/{key}', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_render_lru_limites():
+    cache = RenderLRU(max_items=2, max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    assert cache.get('a') == b'1234' # 'a' passa a ser o mais recente
+    cache.put('c', b'1234')
+    assert cache.get('b') is None and cache.get('a') and cache.get('c')
+    cache.put('d', b'12345678')
+    assert cache.get('a') is None and cache.get('c') is None and cache.get('d')
+    cache.put('e', b'x' * 11) # maior que o limite: não entra
+    assert cache.get('e') is None
@@ -0,0 +1,48 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from storage import S3Storage, document_key
+
+moto = pytest.importorskip('moto')
+
+HASH = document_key('a' * 64)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'teste')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'teste')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        storage = S3Storage('editais', prefix='docs/')
+        storage.client.create_bucket(Bucket='editais')
+        yield storage
+
+
+def gravar(storage, key):
+    storage.write(key, lambda f: f.write(b'docx'))
+
+
+def test_iter_objects_ignora_subprefixos(s3):
+    gravar(s3, HASH)
+    gravar(s3, 'edital_antigo.docx')
+    s3.client.put_object(Bucket='editais', Key='docs/quarentena/' + HASH, Body=b'docx')
+    s3.client.put_object(Bucket='editais', Key='docs/outros/relatorio.docx', Body=b'docx')
+
+    assert sorted(obj.key for obj in s3.iter_objects()) == sorted([HASH, 'edital_antigo.docx'])
+
+
+def test_touch(s3):
+    gravar(s3, HASH)
+    assert s3.touch(HASH) is True
+    assert s3.touch(document_key('b' * 64)) is False
+
+
+def test_touch_repassa_outros_erros(s3, monkeypatch):
+    def negado(**kwargs):
+        raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}}, 'CopyObject')
+
+    gravar(s3, HASH)
+    monkeypatch.setattr(s3.client, 'copy_object', negado)
+    with pytest.raises(ClientError):
+        s3.touch(HASH)
@@ -0,0 +1,45 @@
+from docx import Document
+
+from docx_render import substitute_document, substitute_paragraph
+
+
+def test_placeholder_dividido_em_runs():
+    paragraph = Document().add_paragraph('Data: ')
+    paragraph.add_run('{{ data_')
+    paragraph.add_run('sessao }}').bold = True
+    paragraph.add_run(' às {{ hora_sessao }}.')
+
+    replaced, missing = substitute_paragraph(paragraph, {'{{ data_sessao }}': '01/02/2026'})
+
+    assert paragraph.text == 'Data: 01/02/2026 às {{ hora_sessao }}.'
+    # O valor fica no primeiro run (com a formatação dele); os runs não são recriados
+    assert [run.text for run in paragraph.runs] == ['Data: ', '01/02/2026', '', ' às {{ hora_sessao }}.']
+    assert not paragraph.runs[1].bold and paragraph.runs[2].bold
+    assert (replaced, missing) == ({'{{ data_sessao }}'}, {'{{ hora_sessao }}'})
+
+
+def test_varios_placeholders_no_mesmo_run():
+    paragraph = Document().add_paragraph('{{ a }}-{{ b }}-{{ a }}')
+
+    replaced, missing = substitute_paragraph(paragraph, {'{{ a }}': 'x', '{{ b }}': 'yy'})
+
+    assert [run.text for run in paragraph.runs] == ['x-yy-x']
+    assert (replaced, missing) == ({'{{ a }}', '{{ b }}'}, set())
+
+
+def test_substitute_document_corpo_tabela_e_cabecalho():
+    document = Document()
+    paragraph = document.add_paragraph('Pregão {{ numero_')
+    paragraph.add_run('pregao }}')
+    document.add_table(rows=1, cols=1).cell(0, 0).text = 'Objeto: {{ objeto_servicos }}'
+    document.sections[0].header.paragraphs[0].text = 'Edital {{ numero_pregao }} {{ sem_valor }}'
+
+    report = substitute_document(document, {'{{ numero_pregao }}': '12/2026', '{{ objeto_servicos }}': 'Limpeza',
+                                            '{{ fora_do_modelo }}': '-'})
+
+    assert document.paragraphs[0].text == 'Pregão 12/2026'
+    assert document.tables[0].cell(0, 0).text == 'Objeto: Limpeza'
+    assert document.sections[0].header.paragraphs[0].text == 'Edital 12/2026 {{ sem_valor }}'
+    assert report.replaced == {'{{ numero_pregao }}', '{{ objeto_servicos }}'}
+    assert report.missing == {'{{ sem_valor }}'}
+    assert report.unused == {'{{ fora_do_modelo }}'}
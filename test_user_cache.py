@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from sqlalchemy import update
+
+from extensions import db
+from models import User
+from query_guard import assert_max_queries
+from user_cache import user_cache
+
+
+@pytest.fixture
+def maria(app):
+    user_cache.clear()
+    user_cache.ttl = 30
+    with app.app_context():
+        user = User(username='maria', email='maria@example.com')
+        user.set_password('senha123')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    assert client.post('/login', data={'username': 'maria', 'password': 'senha123'}).status_code == 302
+    yield user_id, client
+    user_cache.ttl = 0
+    user_cache.clear()
+
+
+def logado(client):
+    return client.get('/dashboard').status_code == 200
+
+
+def test_acerto_nao_consulta_o_usuario(maria):
+    _, client = maria
+    assert logado(client)
+    hits = user_cache.hits
+    # Só a página de editais: o usuário vem do cache
+    with assert_max_queries(1):
+        assert logado(client)
+    assert user_cache.hits == hits + 1
+
+
+def test_alteracao_no_processo_invalida_e_encerra_a_sessao(app, maria):
+    user_id, client = maria
+    assert logado(client)
+    invalidations = user_cache.invalidations
+    with app.app_context():
+        db.session.get(User, user_id).role = 'admin' # version_id_col: a versão sobe
+        db.session.commit()
+    assert user_cache.invalidations == invalidations + 1
+    assert not logado(client)
+
+
+def test_alteracao_em_outro_worker_vale_depois_do_ttl(app, maria):
+    user_id, client = maria
+    user_cache.ttl = 0.2
+    user_cache.clear()
+    assert logado(client)
+    # UPDATE sem passar pelo mapper deste processo, como um admin atendido por outro worker
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == user_id).values(version=User.version + 1))
+        db.session.commit()
+    assert logado(client) # ainda no cache, até `ttl` segundos
+    time.sleep(0.3)
+    assert not logado(client) # relido: a versão da sessão não confere mais
+
+
+def test_exclusao_encerra_a_sessao(app, maria):
+    user_id, client = maria
+    assert logado(client)
+    invalidations = user_cache.invalidations
+    admin = app.test_client()
+    admin.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert admin.post(f'/admin/delete_user/{user_id}').status_code == 302
+    assert user_cache.invalidations == invalidations + 1
+    assert not logado(client)
+
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from extensions import db
+from models import User
+
+
+class UserCache:
+    """Cache dos usuários carregados pelo user_loader do Flask-Login (LRU com TTL).
+
+    Guarda só os valores das colunas; em um acerto o User é remontado e
+    anexado à sessão com merge(load=False), sem SELECT. Alterações e
+    exclusões de usuários feitas neste processo removem a entrada na hora
+    (eventos do mapper). Nos outros workers do gunicorn a entrada vale no
+    máximo `ttl` segundos; depois disso o usuário é relido e a versão da
+    linha é conferida com a gravada na sessão (ver User.get_id).
+    """
+
+    def __init__(self, max_items=1024, ttl=30):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version=None):
+        """User anexado à sessão atual, ou None se não estiver em cache (ou estiver vencido/desatualizado)."""
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry is None or entry[0] < time.monotonic() or (version is not None and entry[1]['version'] != version):
+                self.misses += 1
+                return None
+            self._items.move_to_end(user_id)
+            self.hits += 1
+            values = entry[1]
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def put(self, user):
+        if not self.ttl:
+            return
+        values = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        with self._lock:
+            self._items[user.id] = (time.monotonic() + self.ttl, values)
+            self._items.move_to_end(user.id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._items.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'size': len(self._items),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    # Cadastro (ids podem ser reaproveitados no SQLite), troca de senha/perfil e exclusão
+    user_cache.invalidate(target.id)
@@ -0,0 +1,66 @@
+import os
+from collections import namedtuple
+
+# Memória de um processo em KB (Linux, /proc/<pid>/smaps_rollup):
+# - rss: páginas residentes, contando as compartilhadas com outros processos
+# - pss: rss com cada página compartilhada dividida entre os processos que a usam
+# - shared/private: páginas compartilhadas (copy-on-write do preload) e exclusivas
+ProcessMemory = namedtuple('ProcessMemory', ['pid', 'name', 'rss', 'pss', 'shared', 'private'])
+
+
+def process_memory(pid='self'):
+    """Memória do processo lida do smaps_rollup (None fora do Linux ou sem permissão)."""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    values[parts[0][:-1]] = int(parts[1])
+        with open(f'/proc/{pid}/comm') as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    real_pid = os.getpid() if pid == 'self' else int(pid)
+    return ProcessMemory(
+        real_pid, name, values.get('Rss', 0), values.get('Pss', 0),
+        values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0),
+        values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+    )
+
+
+def child_pids(pid):
+    """Processos filhos diretos de `pid` (os workers de um master do gunicorn)."""
+    children = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # O nome do processo (2º campo) pode ter espaços: o ppid vem depois do último ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == int(pid):
+            children.append(int(entry))
+    return sorted(children)
+
+
+def workers_memory(master_pid):
+    """Memória do master e de cada worker; os subprocessos de cada worker (pool de
+    geração, LibreOffice) não entram, só o processo que atende as requisições."""
+    pids = [int(master_pid)] + child_pids(master_pid)
+    return [memory for memory in map(process_memory, pids) if memory is not None]
+
+
+def memory_stats():
+    """Memória deste processo para o /metrics (ver Metrics.add_stats)."""
+    memory = process_memory()
+    if memory is None:
+        return {}
+    return {'rss_bytes': memory.rss * 1024, 'pss_bytes': memory.pss * 1024,
+            'shared_bytes': memory.shared * 1024, 'private_bytes': memory.private * 1024}
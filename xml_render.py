@@ -0,0 +1,156 @@
+import hashlib
+import io
+import os
+import posixpath
+import time
+import tracemalloc
+import zipfile
+
+from lxml import etree
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+
+from docx_render import CompiledTemplate, SubstitutionReport, index_paragraphs, substitute_indexed, stage, _add_to_index
+
+RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+class RenderedPackage:
+    """Documento .docx renderizado (bytes do pacote), com a mesma API de save do python-docx."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def save(self, path_or_stream):
+        if isinstance(path_or_stream, (str, os.PathLike)):
+            with open(path_or_stream, 'wb') as f:
+                f.write(self.data)
+        else:
+            path_or_stream.write(self.data)
+
+
+class XmlTemplate:
+    """Backend de renderização que trabalha direto no XML do pacote .docx.
+
+    Na compilação, as partes com placeholders (corpo, cabeçalhos e rodapés)
+    são indexadas e todas as outras (imagens, estilos, numeração...) são
+    gravadas uma única vez em um zip base, já comprimidas. Cada renderização
+    copia esse zip base byte a byte e acrescenta apenas as partes reescritas,
+    sem carregar o pacote inteiro no modelo de objetos do python-docx.
+    Mesma interface de CompiledTemplate.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.digest = hashlib.sha256(data).hexdigest()
+        # nome da parte no zip -> XML original
+        self.parts = {}
+        # nome da parte no zip -> {indice_paragrafo: ocorrências}
+        self.locations = {}
+        # placeholder -> [(parte, indice_paragrafo)]
+        self.index = {}
+        self.base = self._compile(data)
+
+    def _compile(self, data):
+        base = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(data)) as package:
+            for name in _story_part_names(package):
+                xml = package.read(name)
+                part_locations = index_paragraphs(parse_xml(xml))
+                if part_locations:
+                    self.parts[name] = xml
+                    self.locations[name] = part_locations
+                    _add_to_index(self.index, '/' + name, part_locations)
+            with zipfile.ZipFile(base, 'w') as out:
+                for info in package.infolist():
+                    if info.filename not in self.parts:
+                        out.writestr(info, package.read(info.filename))
+        return base.getvalue()
+
+    @property
+    def placeholders(self):
+        return set(self.index)
+
+    def render(self, replacements, timer=None):
+        """Gera o pacote com os placeholders substituídos; retorna (RenderedPackage, SubstitutionReport)."""
+        with stage(timer, 'template_open'):
+            buffer = io.BytesIO(self.base)
+            buffer.seek(0, io.SEEK_END)
+        replaced = set()
+        missing = set()
+        with stage(timer, 'substitution'), zipfile.ZipFile(buffer, 'a', compression=zipfile.ZIP_DEFLATED) as out:
+            for name, xml in self.parts.items():
+                element = parse_xml(xml)
+                p_replaced, p_missing = substitute_indexed(element, self.locations[name], replacements)
+                replaced |= p_replaced
+                missing |= p_missing
+                out.writestr(name, serialize_part_xml(element))
+        return RenderedPackage(buffer.getvalue()), SubstitutionReport(replaced, missing, set(replacements) - replaced)
+
+
+def _story_part_names(package):
+    """Nomes (no zip) do documento principal e das partes de cabeçalho/rodapé ligadas a ele."""
+    document_name = None
+    for rel in _read_rels(package, '_rels/.rels'):
+        if rel.get('Type') == RT.OFFICE_DOCUMENT:
+            document_name = rel.get('Target').lstrip('/')
+            break
+    if document_name is None:
+        return []
+
+    names = [document_name]
+    directory, filename = posixpath.split(document_name)
+    for rel in _read_rels(package, posixpath.join(directory, '_rels', filename + '.rels')):
+        if rel.get('Type') in (RT.HEADER, RT.FOOTER) and rel.get('TargetMode') != 'External':
+            target = rel.get('Target')
+            name = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(directory, target))
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def _read_rels(package, name):
+    try:
+        root = etree.fromstring(package.read(name))
+    except KeyError:
+        return []
+    return root.iter(f'{{{RELS_NS}}}Relationship')
+
+
+def benchmark_backends(path, rounds=20):
+    """Compara os backends 'docx' e 'xml' no modelo informado.
+
+    Para cada backend mede a compilação, o tempo médio de render + save em
+    memória e o pico de memória alocada (tracemalloc) em uma renderização.
+    """
+    results = {}
+    for backend, template_class in (('docx', CompiledTemplate), ('xml', XmlTemplate)):
+        started = time.perf_counter()
+        template = template_class(path)
+        compile_time = time.perf_counter() - started
+        replacements = {placeholder: f'valor {i}' for i, placeholder in enumerate(sorted(template.placeholders))}
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            document, _report = template.render(replacements)
+            output = io.BytesIO()
+            document.save(output)
+        render_time = (time.perf_counter() - started) / rounds
+
+        tracemalloc.start()
+        document, _report = template.render(replacements)
+        document.save(io.BytesIO())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[backend] = {
+            'compile_ms': compile_time * 1000,
+            'render_ms': render_time * 1000,
+            'peak_kb': peak / 1024,
+            'size_kb': len(output.getvalue()) / 1024,
+        }
+    return results
@@ -0,0 +1,60 @@
+import io
+import zipfile
+
+CHUNK_SIZE = 256 * 1024
+
+
+class _ZipOutput(io.RawIOBase):
+    """Destino do ZipFile que só acumula o que foi escrito até o gerador repassar.
+
+    Não é "seekable", então o zipfile grava cada entrada com data descriptor
+    (CRC e tamanhos depois dos dados) e nunca volta no arquivo.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """Gera os bytes de um ZIP à medida que as entradas são lidas.
+
+    `entries` é um iterável de (nome_no_zip, data_hora, arquivo_binario),
+    consumido sob demanda. Cada arquivo é copiado (e fechado) em blocos de
+    CHUNK_SIZE, então a memória usada não depende do tamanho do ZIP. Os .docx
+    já são comprimidos, por isso as entradas são apenas armazenadas.
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, date_time, source in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w') as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    data = output.take()
+                    if data:
+                        yield data
+            data = output.take()
+            if data:
+                yield data
+    yield output.take()